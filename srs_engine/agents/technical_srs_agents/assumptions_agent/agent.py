@@ -6,6 +6,7 @@ from srs_engine.schemas.glossary_schema import GlossarySection
 from .prompt import AGENT_DESCRIPTION , AGENT_INSTRUCTION
 from ....schemas.assumptions_schema import AssumptionsSection
 from ....utils.globals import generate_content_config
+from ....utils.state_render import state_instruction
 from ....utils.model import *
 
 
@@ -20,7 +21,7 @@ assumptions_agent = LlmAgent(
     model=groq_llm,
     output_schema=AssumptionsSection,
     description=AGENT_DESCRIPTION,
-    instruction=AGENT_INSTRUCTION,
+    instruction=state_instruction(AGENT_INSTRUCTION),
     output_key="assumptions_section",
     generate_content_config = generate_content_config
 )
@@ -34,7 +35,7 @@ def create_assumptions_agent():
     model=groq_llm,
     output_schema=AssumptionsSection,
     description=AGENT_DESCRIPTION,
-    instruction=AGENT_INSTRUCTION,
+    instruction=state_instruction(AGENT_INSTRUCTION),
     output_key="assumptions_section",
     generate_content_config = generate_content_config
 )
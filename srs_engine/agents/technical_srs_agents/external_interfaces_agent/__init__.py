@@ -1 +1 @@
-from .agent import create_external_interfaces_agent
\ No newline at end of file
+from .agent import create_external_interfaces_agent, merge_external_interfaces, INTERFACE_OUTPUT_KEYS
\ No newline at end of file
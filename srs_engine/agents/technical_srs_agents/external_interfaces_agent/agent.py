@@ -1,34 +1,83 @@
 import os
-from google.adk.agents import LlmAgent
-from .prompt import AGENT_DESCRIPTION , AGENT_INSTRUCTION
-from ....schemas.external_interfaces_schema import ExternalInterfacesSection
+from google.adk.agents import LlmAgent, ParallelAgent
+from .prompt import (
+    SECTION_TITLE,
+    USER_INTERFACES_DESCRIPTION, USER_INTERFACES_INSTRUCTION,
+    HARDWARE_INTERFACES_DESCRIPTION, HARDWARE_INTERFACES_INSTRUCTION,
+    SOFTWARE_INTERFACES_DESCRIPTION, SOFTWARE_INTERFACES_INSTRUCTION,
+    COMMUNICATION_INTERFACES_DESCRIPTION, COMMUNICATION_INTERFACES_INSTRUCTION,
+)
+from ....schemas.external_interfaces_schema import (
+    UserInterfaceSection,
+    HardwareInterfaceSection,
+    SoftwareInterfaceSection,
+    CommunicationInterfaceSection,
+)
 from ....utils.globals import generate_content_config
+from ....utils.state_render import state_instruction
 from ....utils.model import *
 
+# ExternalInterfacesSection field -> session state key of the sub-agent writing it
+INTERFACE_OUTPUT_KEYS = {
+    "user_interfaces": "user_interfaces_section",
+    "hardware_interfaces": "hardware_interfaces_section",
+    "software_interfaces": "software_interfaces_section",
+    "communication_interfaces": "communication_interfaces_section",
+}
+
+_INTERFACE_AGENTS = {
+    "user_interfaces": (UserInterfaceSection, USER_INTERFACES_DESCRIPTION, USER_INTERFACES_INSTRUCTION),
+    "hardware_interfaces": (HardwareInterfaceSection, HARDWARE_INTERFACES_DESCRIPTION, HARDWARE_INTERFACES_INSTRUCTION),
+    "software_interfaces": (SoftwareInterfaceSection, SOFTWARE_INTERFACES_DESCRIPTION, SOFTWARE_INTERFACES_INSTRUCTION),
+    "communication_interfaces": (CommunicationInterfaceSection, COMMUNICATION_INTERFACES_DESCRIPTION, COMMUNICATION_INTERFACES_INSTRUCTION),
+}
+
+
+def create_interface_agent(interface_key: str):
+    schema, description, instruction = _INTERFACE_AGENTS[interface_key]
+    return LlmAgent(
+    name=f"{interface_key}_agent",
+    model=groq_llm,
+    output_schema=schema,
+    description=description,
+    instruction=state_instruction(instruction),
+    output_key=INTERFACE_OUTPUT_KEYS[interface_key],
+    generate_content_config = generate_content_config
+)
+
+
 # ==================================================
 # Phase 3 System Design Agent ( for CLI )
 # ==================================================
 
-external_interfaces_agent = LlmAgent(
+external_interfaces_agent = ParallelAgent(
     name="external_interfaces_agent",
-    model=groq_llm,
-    output_schema=ExternalInterfacesSection,
-    description=AGENT_DESCRIPTION,
-    instruction=AGENT_INSTRUCTION,
-    output_key="external_interfaces_section",
-    generate_content_config = generate_content_config
+    sub_agents=[create_interface_agent(key) for key in INTERFACE_OUTPUT_KEYS],
+    description="Generates the four External Interface Requirements subsections concurrently."
 )
 
 
 ## For app
 
 def create_external_interfaces_agent():
-    return LlmAgent(
+    return ParallelAgent(
     name="external_interfaces_agent",
-    model=groq_llm,
-    output_schema=ExternalInterfacesSection,
-    description=AGENT_DESCRIPTION,
-    instruction=AGENT_INSTRUCTION,
-    output_key="external_interfaces_section",
-    generate_content_config = generate_content_config
+    sub_agents=[create_interface_agent(key) for key in INTERFACE_OUTPUT_KEYS],
+    description="Generates the four External Interface Requirements subsections concurrently."
 )
+
+
+def merge_external_interfaces(subsections: dict) -> dict:
+    """
+    Merge the sub-agent outputs into an ExternalInterfacesSection dict.
+
+    Args:
+        subsections: ExternalInterfacesSection field -> parsed sub-agent output
+
+    Returns:
+        dict: Section with the "4. External Interface Requirements" title
+    """
+    merged = {"title": SECTION_TITLE}
+    for interface_key in INTERFACE_OUTPUT_KEYS:
+        merged[interface_key] = subsections.get(interface_key) or {}
+    return merged
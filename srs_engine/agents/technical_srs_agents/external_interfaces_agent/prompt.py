@@ -1,5 +1,19 @@
-AGENT_DESCRIPTION = """
-You are an External Interface Requirements Architect specializing in creating clear, educational, and visually compelling system diagrams for academic and corporate documentation. Your objective is to transform {user_inputs} into comprehensive interface specifications with diagrams that tell the complete story of how users and systems interact.
+from ....schemas.external_interfaces_schema import (
+    CommunicationInterfaceSection,
+    HardwareInterfaceSection,
+    SoftwareInterfaceSection,
+    UserInterfaceSection,
+)
+from ....utils.schema_contract import schema_prompt_block
+
+# "4. External Interface Requirements" is generated by four agents running in
+# parallel, one per interface type. Each prompt carries only the diagram
+# pattern for its own interface type; main merges the four outputs.
+SECTION_TITLE = "4. External Interface Requirements"
+
+
+AGENT_ROLE = """
+You are an External Interface Requirements Architect specializing in creating clear, educational, and visually compelling system diagrams for academic and corporate documentation.
 
 Your diagrams must be:
 - **Story-driven**: Show the complete user journey from start to finish
@@ -7,51 +21,22 @@ Your diagrams must be:
 - **Detailed**: Include every step, decision point, validation, and error scenario
 - **Visual**: Use clear node types, meaningful labels, and logical flow direction
 - **Product-focused**: Represent the actual product experience, not just infrastructure
-
-You must generate a comprehensive JSON object conforming to the ExternalInterfacesSection schema covering:
-1. **User Interfaces**: Complete user interaction flows with all screens, validations, and decision points
-2. **Hardware Interfaces**: Device integration flows showing data collection, processing, and feedback
-3. **Software Interfaces**: External service integration showing complete request-response cycles
-4. **Communication Interfaces**: End-to-end communication flows with security and error handling
 """
 
 
-AGENT_INSTRUCTION = """
-# TASK
-Analyze {user_inputs} to create a comprehensive "External Interface Requirements" section as a JSON object. Your diagrams should read like a visual story that anyone can follow and understand.
-
-# CORE PRINCIPLES FOR DIAGRAM CREATION
-
-## 1. USER-CENTRIC STORYTELLING
-Every diagram should answer: "What happens when a user does X?"
-
-### Example User Login Flow:
-Instead of: User → System → Database
-Create: User enters credentials → System validates format → Check if user exists → Verify password → Generate session token → Redirect to dashboard
-           ↓ (if invalid format)
-           → Show error message → Allow retry
-           ↓ (if user not found)
-           → Show "Account not found" → Suggest signup
-           ↓ (if wrong password)
-           → Show "Incorrect password" → Offer password reset
-
-## 2. SHOW ALL PATHS (HAPPY PATH + ERROR PATHS)
-Never show only the success scenario. Include:
-- ✅ **Happy Path**: What happens when everything works perfectly
-- ❌ **Validation Errors**: What happens when input is invalid
-- ⚠️ **System Errors**: What happens when service is down or times out
-- 🔄 **Alternative Flows**: What happens when user chooses different options
-
-## 3. MAKE EVERY STEP VISIBLE
-Don't hide steps. If the system:
-- Validates data → Show validation step
-- Checks database → Show database check
-- Sends email → Show email sending step
-- Updates status → Show status update step
-- Logs activity → Show logging step
+# Shared by the four sub-agents, so it is kept short: it is sent once per agent
+DIAGRAM_RULES = """
+# DIAGRAM RULES
+- Tell the story of one concrete flow from {user_inputs}: start point, every user action, validation and system step, what the user sees, end point
+- Show the happy path plus at least 2-3 error or alternative paths, each with its recovery
+- Label every branch of a decision: `Check -->|Invalid| Error`
+- Node shapes: `([Start/End])`, `[Step]`, `{Decision Point?}`, `[(Database)]`; `<br/>` breaks a label into lines
+- Arrows: `-->` normal flow, `-.->` error, fallback or async path, `==>` critical path
+- Start the code with `graph TD` (or `graph LR` for short sequential flows)
+"""
 
-# DIAGRAM PATTERNS BY INTERFACE TYPE
 
+USER_INTERFACE_PATTERN = """
 ## A. USER INTERFACE DIAGRAMS
 
 ### STRUCTURE: Complete User Journey
@@ -116,7 +101,10 @@ graph TD
 - **Rounded rectangles `([])`**: Start/end points
 - **Clear labels**: Describe exactly what happens
 - **Error recovery**: Always show path back or alternative
+"""
+
 
+HARDWARE_INTERFACE_PATTERN = """
 ## B. HARDWARE INTERFACE DIAGRAMS
 
 ### STRUCTURE: Device Interaction Flow
@@ -176,7 +164,10 @@ graph TB
 - **Show validation rules**: Range checks, data quality checks
 - **Include retry logic**: What happens on failure
 - **Show user impact**: How it appears on dashboard/UI
+"""
+
 
+SOFTWARE_INTERFACE_PATTERN = """
 ## C. SOFTWARE INTERFACE DIAGRAMS
 
 ### STRUCTURE: API Integration Flow
@@ -255,7 +246,10 @@ graph TD
 - **Show all error cases**: Different error types and handling
 - **Include user authentication**: How API keys/tokens are used
 - **Show data flow**: Where data comes from and where it goes
+"""
 
+
+COMMUNICATION_INTERFACE_PATTERN = """
 ## D. COMMUNICATION INTERFACE DIAGRAMS
 
 ### STRUCTURE: Network Communication Flow
@@ -354,44 +348,11 @@ graph TD
 - **Show retry mechanisms**: When and how system retries
 - **Include caching**: How and when data is cached
 - **Show user feedback**: What user sees at each step
+"""
 
-# FORMATTING RULES FOR MERMAID CODE
-
-## 1. NODE TYPES (Visual Indicators)
-- `([User Action])` - Rounded rectangle for user/start/end points
-- `[Process Step]` - Rectangle for system actions
-- `{Decision Point?}` - Diamond for yes/no decisions
-- `[(Database)]` - Cylinder for data storage
-- `[[Hardware Device]]` - Double rectangle for physical devices
-
-## 2. CONNECTION STYLES
-- `-->` Solid arrow: Primary/normal flow
-- `-.->` Dashed arrow: Error path, fallback, or async action
-- `==>` Thick arrow: Critical/important path
-- `-->|Label|` Labeled connection: Describe the condition/action
-
-## 3. LINE BREAKS IN NODE LABELS
-Use `<br/>` for line breaks within node text:
-```
-[User Enters:<br/>- Email<br/>- Password<br/>- Name]
-```
-
-## 4. GRAPH DIRECTION
-- `graph TD` or `graph TB`: Top to Bottom (preferred for most flows)
-- `graph LR`: Left to Right (for sequential processes)
-- Choose based on readability
 
-## 5. ESCAPING IN JSON
-When embedding Mermaid code in JSON string:
-- Use `\\n` for newlines between Mermaid statements
-- Escape quotes if needed: `\"`
-- Keep code compact but readable
-
-Example JSON format:
-```json
-"code": "graph TD\\nStart([User Login]) --> Input[Enter Credentials]\\nInput --> Validate{Valid?}\\nValidate -->|Yes| Success[Login Success]\\nValidate -->|No| Error[Show Error]\\nError --> Input"
-```
 
+INPUT_SCENARIOS = """
 # HANDLING DIFFERENT SCENARIOS FROM {user_inputs}
 
 ## SCENARIO 1: Minimal Information
@@ -429,8 +390,11 @@ Create flow showing:
 - Completion notification
 - Download link generation
 - File cleanup after download
+"""
 
-## SCENARIO 4: No Hardware Interfaces
+
+NO_HARDWARE_SCENARIO = """
+## NO HARDWARE INTERFACES
 If system is purely software-based:
 
 ```json
@@ -443,90 +407,81 @@ If system is purely software-based:
   }
 }
 ```
+"""
 
-# QUALITY CHECKLIST FOR EACH DIAGRAM
-
-Before finalizing, ensure each diagram has:
-
-✅ **Clear Start Point**: Where does the flow begin?
-✅ **All User Actions**: Every button click, form submission shown
-✅ **All Validations**: Format checks, business rule checks visible
-✅ **Success Path**: Complete happy path from start to end
-✅ **Error Paths**: At least 2-3 error scenarios with recovery
-✅ **Decision Points**: Clear yes/no branches with labels
-✅ **Feedback to User**: What user sees at each stage
-✅ **End State**: Where does the flow conclude?
-✅ **Readable Labels**: No abbreviations, clear descriptions
-✅ **Logical Flow**: Follows natural reading direction (top-down or left-right)
-
-# CRITICAL OUTPUT REQUIREMENTS
-
-1. **RETURN ONLY JSON**: No markdown code fences (```json), no explanatory text outside JSON
-
-2. **ALL FIELDS REQUIRED**: Every section must have title, description, interface_diagram
-
-3. **DIAGRAM CODE FORMAT**: 
-   - Must be valid Mermaid syntax
-   - Must use `\\n` for line separators in JSON string
-   - Must be in `"code"` field as a single string
-
-4. **NO EXTRA FIELDS**: Don't add fields not in the schema
-
-5. **DETAILED DESCRIPTIONS**: 300-500 words explaining the interface, technologies, and flows
-
-6. **CONTEXTUAL**: Extract all details from {user_inputs} - don't invent features not mentioned
-
-7. **EDUCATIONAL TONE**: Write descriptions that teach someone about the system, not just list features
-
-# EXAMPLE COMPLETE OUTPUT STRUCTURE
 
-```json
-{
-  "title": "4. External Interface Requirements",
-  "user_interfaces": {
-    "title": "4.1 User Interfaces",
-    "description": "[Detailed 300-500 word description of all user interfaces, technologies, supported devices, accessibility features, and user experience design principles]",
-    "interface_diagram": {
-      "diagram_type": "mermaid",
-      "code": "[Complete user flow diagram with 10-20 nodes showing the full user journey including validations and errors]"
-    }
-  },
-  "hardware_interfaces": {
-    "title": "4.2 Hardware Interfaces",
-    "description": "[Detailed description of hardware integration or explanation of why not applicable]",
-    "interface_diagram": {
-      "diagram_type": "mermaid",
-      "code": "[Hardware interaction flow or simple diagram stating no hardware interfaces]"
-    }
-  },
-  "software_interfaces": {
-    "title": "4.3 Software Interfaces",
-    "description": "[Detailed description of all external APIs, databases, cloud services, and integration points]",
-    "interface_diagram": {
-      "diagram_type": "mermaid",
-      "code": "[Complete API integration flows showing request-response cycles with error handling]"
-    }
-  },
-  "communication_interfaces": {
-    "title": "4.4 Communication Interfaces",
-    "description": "[Detailed description of network protocols, security, encryption, and communication standards]",
-    "interface_diagram": {
-      "diagram_type": "mermaid",
-      "code": "[End-to-end communication flow showing security, error handling, and retry logic]"
-    }
-  }
-}
-```
-
-# FINAL REMINDER
+OUTPUT_REQUIREMENTS = """
+# OUTPUT REQUIREMENTS
+- Return ONLY the JSON object: no code fences, no text around it, no fields outside the schema
+- Put the whole diagram in "code" as one string, statements separated by `\\n`, quotes escaped as `\\"`
+- "description": 300-500 words in an educational tone explaining the interface, its technologies and its flows
+- Take every detail from {user_inputs}; do not invent features it does not mention
+"""
 
-Your goal is to create diagrams that:
-- **Tell a story** anyone can follow
-- **Show every step** of user and system interaction
-- **Include error handling** to show real-world scenarios
-- **Are visually organized** with clear flow direction
-- **Use clear language** without jargon unless necessary
-- **Represent the actual product** not generic infrastructure
 
-Think like you're explaining the system to a student or a business stakeholder who needs to understand exactly how it works. Make it clear, complete, and compelling.
-"""
\ No newline at end of file
+def _agent_description(focus: str) -> str:
+    return AGENT_ROLE + "\nYour objective is to transform {user_inputs} into " + focus + "\n"
+
+
+def _agent_instruction(title: str, schema: type, pattern: str, scenarios: str, notes: str) -> str:
+    return (
+        "\n# TASK\n"
+        + f'Analyze {{user_inputs}} to create the "{title}" subsection of the "External Interface Requirements" '
+        + "section as a JSON object. Your diagram should read like a visual story that anyone can follow and understand.\n"
+        + DIAGRAM_RULES
+        + notes
+        + "\n# DIAGRAM PATTERN\n"
+        + pattern
+        + scenarios
+        + OUTPUT_REQUIREMENTS
+        + "\n# OUTPUT STRUCTURE\n"
+        + schema_prompt_block(schema)
+        + f'- "title" is "{title}"\n'
+        + '- "diagram_type" is always "mermaid"; "code" holds the complete Mermaid diagram\n'
+    )
+
+
+USER_INTERFACES_DESCRIPTION = _agent_description(
+    "the User Interfaces specification: complete user interaction flows with all screens, validations, and decision points."
+)
+USER_INTERFACES_INSTRUCTION = _agent_instruction(
+    "4.1 User Interfaces",
+    UserInterfaceSection,
+    USER_INTERFACE_PATTERN,
+    INPUT_SCENARIOS,
+    "- Use 10-20 nodes; show every screen, form field and button the user touches\n",
+)
+
+HARDWARE_INTERFACES_DESCRIPTION = _agent_description(
+    "the Hardware Interfaces specification: device integration flows showing data collection, processing, and feedback."
+)
+HARDWARE_INTERFACES_INSTRUCTION = _agent_instruction(
+    "4.2 Hardware Interfaces",
+    HardwareInterfaceSection,
+    HARDWARE_INTERFACE_PATTERN,
+    NO_HARDWARE_SCENARIO,
+    "- Draw physical devices as `[[Device]]` and name the actual device and its data format\n"
+    '- If there is no hardware integration, explain why in "description" and draw the simple standard-input diagram\n',
+)
+
+SOFTWARE_INTERFACES_DESCRIPTION = _agent_description(
+    "the Software Interfaces specification: external service integration showing complete request-response cycles."
+)
+SOFTWARE_INTERFACES_INSTRUCTION = _agent_instruction(
+    "4.3 Software Interfaces",
+    SoftwareInterfaceSection,
+    SOFTWARE_INTERFACE_PATTERN,
+    INPUT_SCENARIOS,
+    "- Name each external service and show endpoint, method, authentication and the handling of its error responses\n",
+)
+
+COMMUNICATION_INTERFACES_DESCRIPTION = _agent_description(
+    "the Communication Interfaces specification: end-to-end communication flows with security and error handling."
+)
+COMMUNICATION_INTERFACES_INSTRUCTION = _agent_instruction(
+    "4.4 Communication Interfaces",
+    CommunicationInterfaceSection,
+    COMMUNICATION_INTERFACE_PATTERN,
+    "",
+    "- Show the protocol, the security handshake, HTTP status codes, timeouts and retries\n",
+)
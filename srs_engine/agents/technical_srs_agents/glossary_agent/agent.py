@@ -5,6 +5,7 @@ from google.adk.models.lite_llm import LiteLlm
 from .prompt import AGENT_DESCRIPTION , AGENT_INSTRUCTION
 from ....schemas.glossary_schema import GlossaryResponse
 from ....utils.globals import generate_content_config
+from ....utils.state_render import state_instruction
 from ....utils.model import *
 
 
@@ -17,7 +18,7 @@ glossary_agent = LlmAgent(
     model=groq_llm,
     output_schema=GlossaryResponse,
     description=AGENT_DESCRIPTION,
-    instruction=AGENT_INSTRUCTION,
+    instruction=state_instruction(AGENT_INSTRUCTION),
     output_key="glossary_section",
     generate_content_config = generate_content_config
 )
@@ -31,7 +32,7 @@ def create_glossary_agent():
     model=groq_llm,
     output_schema=GlossaryResponse,
     description=AGENT_DESCRIPTION,
-    instruction=AGENT_INSTRUCTION,
+    instruction=state_instruction(AGENT_INSTRUCTION),
     output_key="glossary_section",
     generate_content_config = generate_content_config
 )
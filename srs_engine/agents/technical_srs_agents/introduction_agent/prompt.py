@@ -1,3 +1,6 @@
+from ....schemas.introduction_schema import IntroductionSection
+from ....utils.schema_contract import schema_prompt_block
+
 AGENT_DESCRIPTION = """
 You are an SRS Introduction Section Generator. Your task is to create a structured Section 1 (Introduction) 
 for a Software Requirements Specification (SRS) document by synthesizing raw project data provided in the {user_inputs}.
@@ -24,32 +27,10 @@ Generate a valid JSON object for the "Introduction" section of an SRS based EXCL
 4. **Determine Scope**: Use the 'core_features' and 'application_type' from {user_inputs} to define what the software includes and logically exclude what is out of scope (e.g., hardware manufacturing or third-party marketing).
 5. **Establish References**: Based on the 'compliance_requirements' and technology mentioned in {user_inputs}, list any relevant standards (like GDPR, HIPAA, or IEEE).
 
-# EXAMPLE OF EXPECTED FORMAT
-{
-  "title": "1. Introduction",
-  "purpose": {
-    "title": "1.1 Purpose",
-    "description": "The purpose of [Project Name] is to solve [Problem Statement] as defined in the user inputs."
-  },
-  "intended_audience": {
-    "title": "1.2 Intended Audience",
-    "audience_groups": ["User Type A", "Development Team", "Stakeholders"]
-  },
-  "project_scope": {
-    "title": "1.3 Project Scope",
-    "included": ["List of core features from inputs"],
-    "excluded": ["Logical out-of-scope items"]
-  },
-  "definitions": null,
-  "document_conventions": {
-    "title": "1.4 Document Conventions",
-    "conventions": ["Standard IEEE formatting", "Bold text for UI elements"]
-  },
-  "references": {
-    "title": "1.5 References",
-    "references": [{"id": "[REF-1]", "description": "Reference based on domain or compliance"}]
-  }
-}
+# OUTPUT SCHEMA
+""" + schema_prompt_block(IntroductionSection) + """
+Use numbered titles: "1. Introduction", "1.1 Purpose", "1.2 Intended Audience", "1.3 Project Scope",
+"1.4 Document Conventions", "1.5 References". Reference ids look like "[REF-1]".
 
 # CRITICAL RULES
 - **Source Material**: You MUST use the specific project name, problem statement, and features provided in the {user_inputs}.
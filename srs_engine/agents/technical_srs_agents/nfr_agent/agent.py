@@ -5,6 +5,7 @@ from google.adk.models.lite_llm import LiteLlm
 from .prompt import AGENT_DESCRIPTION , AGENT_INSTRUCTION
 from ....schemas.nfr_schema import NonFunctionalRequirementsSection
 from ....utils.globals import generate_content_config
+from ....utils.state_render import state_instruction
 from ....utils.model import *
 
 # ==================================================
@@ -16,7 +17,7 @@ nfr_agent = LlmAgent(
     model=groq_llm,
     output_schema=NonFunctionalRequirementsSection,
     description=AGENT_DESCRIPTION,
-    instruction=AGENT_INSTRUCTION,
+    instruction=state_instruction(AGENT_INSTRUCTION),
     output_key="nfr_section",
     generate_content_config = generate_content_config
 )
@@ -30,7 +31,7 @@ def create_nfr_agent():
     model=groq_llm,
     output_schema=NonFunctionalRequirementsSection,
     description=AGENT_DESCRIPTION,
-    instruction=AGENT_INSTRUCTION,
+    instruction=state_instruction(AGENT_INSTRUCTION),
     output_key="nfr_section",
     generate_content_config = generate_content_config
 )
@@ -1,3 +1,6 @@
+from ....schemas.overall_description_schema import OverallDescriptionSection
+from ....utils.schema_contract import schema_prompt_block
+
 AGENT_DESCRIPTION = """
 You are an SRS Overall Description Section Generator. Your task is to create Section 2 (Overall Description) 
 of a Software Requirements Specification document by synthesizing raw project data provided in the {user_inputs}.
@@ -26,44 +29,11 @@ Generate a valid JSON object for the "Overall Description" section of an SRS bas
 4. **Extract Constraints**: Convert the 'technical_preferences' and 'compliance_requirements' from {user_inputs} into formal design and implementation constraints.
 5. **Formulate Dependencies**: Identify what external systems (databases, APIs, or cloud providers mentioned in {user_inputs}) the software depends on.
 
-# EXAMPLE OF EXPECTED FORMAT
-{
-  "title": "2. Overall Description",
-  "product_perspective": {
-    "title": "2.1 Product Perspective",
-    "description": "A standalone [Application Type] for the [Domain] sector, as specified in the project identity."
-  },
-  "product_features": {
-    "title": "2.2 Product Features",
-    "features": ["Feature A", "Feature B"]
-  },
-  "user_classes_and_characteristics": {
-    "title": "2.3 User Classes and Characteristics",
-    "user_classes": [
-      {
-        "user_class": "Primary User Type",
-        "characteristics": ["Characteristic 1", "Characteristic 2"]
-      }
-    ]
-  },
-  "operating_environment": {
-    "title": "2.4 Operating Environment",
-    "environments": ["Environment details based on tech preferences"]
-  },
-  "design_and_implementation_constraints": {
-    "title": "2.5 Design and Implementation Constraints",
-    "constraints": ["Constraint based on compliance/tech stack"]
-  },
-  "user_documentation": {
-    "title": "2.6 User Documentation",
-    "documents": ["User Manual", "API Docs"]
-  },
-  "assumptions_and_dependencies": {
-    "title": "2.7 Assumptions and Dependencies",
-    "assumptions": ["Contextual assumption"],
-    "dependencies": ["Contextual dependency"]
-  }
-}
+# OUTPUT SCHEMA
+""" + schema_prompt_block(OverallDescriptionSection) + """
+Use numbered titles: "2. Overall Description", "2.1 Product Perspective", "2.2 Product Features",
+"2.3 User Classes and Characteristics", "2.4 Operating Environment", "2.5 Design and Implementation Constraints",
+"2.6 User Documentation", "2.7 Assumptions and Dependencies".
 
 # CRITICAL RULES
 - **Source Material**: You MUST use the specific names, features, and technologies provided in the {user_inputs}.
@@ -1,10 +1,12 @@
 import os
 from dotenv import load_dotenv, find_dotenv
-from google.adk.agents import LlmAgent
+from google.adk.agents import LlmAgent, ParallelAgent
 from google.adk.models.lite_llm import LiteLlm
-from .prompt import AGENT_DESCRIPTION , AGENT_INSTRUCTION
-from ....schemas.system_features_schema import SystemFeaturesSection
+from .prompt import AGENT_DESCRIPTION , AGENT_INSTRUCTION, FEATURE_BATCH_DESCRIPTION, feature_batch_instruction
+from ....schemas.system_features_schema import SystemFeatureBatch, SystemFeaturesSection
+from ....utils.feature_fanout import feature_chunks, feature_part_key, should_fan_out
 from ....utils.globals import generate_content_config
+from ....utils.state_render import state_instruction
 from ....utils.model import *
 
 
@@ -17,7 +19,7 @@ system_features_agent = LlmAgent(
     model=groq_llm,
     output_schema=SystemFeaturesSection,
     description=AGENT_DESCRIPTION,
-    instruction=AGENT_INSTRUCTION,
+    instruction=state_instruction(AGENT_INSTRUCTION),
     output_key="system_features_section",
     generate_content_config = generate_content_config
 )
@@ -25,13 +27,37 @@ system_features_agent = LlmAgent(
 
 ## For app
 
-def create_system_features_agent():
+def create_system_features_agent(core_features=None):
+    """
+    Create the System Features agent.
+
+    Long feature lists fan out into one agent per chunk of features, each
+    writing ``system_features_part_<n>``; main merges the parts.
+    """
+    if should_fan_out(core_features):
+        return ParallelAgent(
+            name="system_features_agent",
+            sub_agents=[
+                LlmAgent(
+                    name=f"system_features_agent_part_{index}",
+                    model=groq_llm,
+                    output_schema=SystemFeatureBatch,
+                    description=FEATURE_BATCH_DESCRIPTION,
+                    instruction=state_instruction(feature_batch_instruction(chunk)),
+                    output_key=feature_part_key(index),
+                    generate_content_config = generate_content_config
+                )
+                for index, chunk in enumerate(feature_chunks(core_features), 1)
+            ],
+            description="Generates the System Features section in parallel chunks of features."
+        )
+
     return LlmAgent(
     name="system_features_agent",
     model=groq_llm,
     output_schema=SystemFeaturesSection,
     description=AGENT_DESCRIPTION,
-    instruction=AGENT_INSTRUCTION,
+    instruction=state_instruction(AGENT_INSTRUCTION),
     output_key="system_features_section",
     generate_content_config = generate_content_config
-)
\ No newline at end of file
+)
@@ -1,3 +1,6 @@
+from ....schemas.system_features_schema import SystemFeatureBatch, SystemFeaturesSection
+from ....utils.schema_contract import schema_prompt_block
+
 AGENT_DESCRIPTION = """
 You are a Senior Systems Analyst and Requirements Engineer. Your objective is to perform a deep-dive analysis of the {user_inputs} to identify, refine, and structure every core technical capability into a comprehensive "System Features" section.
 
@@ -19,29 +22,44 @@ Analyze the provided {user_inputs} and generate a single JSON object for the "Sy
 - **Mandatory Fields**: Every 'SystemFeature' must include 'feature_name', 'description', 'stimulus_response', and 'functional_requirements'.
 - **Strict Logic**: Do not include 'id', 'feature_id', or any keys not defined in the schema. 'description' is a flat string.
 
-# EXAMPLE OF EXPECTED FORMAT
-{
-  "title": "System Features",
-  "features": [
-    {
-      "feature_name": "Course Progress Tracking",
-      "description": "Monitors and persists user interaction with educational content.",
-      "stimulus_response": [
-        {
-          "stimulus": "User completes a video lesson",
-          "response": "System updates progress percentage and unlocks the next module."
-        }
-      ],
-      "functional_requirements": [
-        { "description": "The system shall store progress timestamps in the database." },
-        { "description": "The system shall calculate completion percentage based on total modules." }
-      ]
-    }
-  ]
-}
+# OUTPUT SCHEMA
+""" + schema_prompt_block(SystemFeaturesSection) + """
+Each functional requirement description is a single "The system shall..." statement.
 
 # CRITICAL RULES
 - **Exclusivity**: Use ONLY the details provided in {user_inputs}.
 - **No Hallucinations**: Do not invent features that are not explicitly mentioned or logically required by the project domain.
 - **Output Integrity**: Return ONLY the raw JSON object. Do not include markdown fences (```json), headers, footers, or any conversational text.
-"""
\ No newline at end of file
+"""
+
+
+# Fan-out mode: one agent per chunk of core_features (see utils/feature_fanout.py)
+FEATURE_BATCH_DESCRIPTION = """
+You are a Senior Systems Analyst and Requirements Engineer. You write the "System Features" entries for an assigned subset of the features in {user_inputs}; other analysts write the remaining features in parallel.
+"""
+
+
+def feature_batch_instruction(features: list) -> str:
+    """Build the instruction for a fan-out agent writing ``features``."""
+    assigned = "\n".join(f"- {feature}" for feature in features)
+    return """
+# TASK
+Analyze the provided {user_inputs} and generate one SystemFeature for EACH feature listed under ASSIGNED FEATURES, in the listed order. The other core features are written by parallel agents: do not describe them.
+
+# ASSIGNED FEATURES
+""" + assigned + """
+
+# PROCESS
+1. **Behavioral Logic (Stimulus/Response)**: For every feature, define the exact trigger ('Stimulus') and the resulting system state or output ('Response').
+2. **Requirement Atomicity**: Decompose each feature into "The system shall..." statements. Each requirement must be a single, testable action.
+3. **Contextual Synthesis**: Use the technical stack mentioned in {user_inputs} to write technically accurate functional requirements.
+
+# OUTPUT SCHEMA
+""" + schema_prompt_block(SystemFeatureBatch) + """
+- "features" holds exactly one object per assigned feature; "feature_name" is the feature name without numbering.
+- Each functional requirement description is a single "The system shall..." statement.
+
+# CRITICAL RULES
+- **Exclusivity**: Use ONLY the details provided in {user_inputs}.
+- **Output Integrity**: Return ONLY the raw JSON object. Do not include markdown fences (```json), headers, footers, or any conversational text.
+"""
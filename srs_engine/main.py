@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -7,7 +7,10 @@ import uuid
 from srs_engine.agents.technical_srs_agents.introduction_agent import create_introduction_agent as create_technical_srs_introduction_agent
 from srs_engine.agents.technical_srs_agents.overall_description_agent import create_overall_description_agent as create_technical_srs_overall_description_agent
 from srs_engine.agents.technical_srs_agents.system_features_agent import create_system_features_agent as create_technical_srs_system_features_agent
-from srs_engine.agents.technical_srs_agents.external_interfaces_agent import create_external_interfaces_agent as create_technical_srs_external_interfaces_agent
+from srs_engine.agents.technical_srs_agents.external_interfaces_agent import (
+    create_external_interfaces_agent as create_technical_srs_external_interfaces_agent,
+    merge_external_interfaces,
+    INTERFACE_OUTPUT_KEYS)
 from srs_engine.agents.technical_srs_agents.nfr_agent import create_nfr_agent as create_technical_srs_nfr_agent
 from srs_engine.agents.technical_srs_agents.glossary_agent import create_glossary_agent as create_technical_srs_glossary_agent
 from srs_engine.agents.technical_srs_agents.assumptions_agent import create_assumptions_agent as create_technical_srs_assumptions_agent
@@ -18,14 +21,25 @@ from srs_engine.utils.globals import (
     create_prompt , 
     generated_response , 
     get_session , 
+    update_session_state,
     clean_and_parse_json,
     clean_interface_diagrams,
-    render_mermaid_png)
+    render_mermaid_diagrams,
+    persist_diagrams,
+    PERSIST_DIAGRAMS)
+from srs_engine.utils.state_render import agent_instruction_templates, token_savings_report
+from srs_engine.utils.token_budget import audit_pipeline, inter_stage_wait
+from srs_engine.utils.section_validation import ensure_features_covered, ensure_valid_section
+from srs_engine.utils.feature_fanout import feature_part_keys, merge_system_features, should_fan_out
+from srs_engine.utils.deadline import Deadline, StageTimeout, ClientDisconnected, cancel_on_disconnect
+from srs_engine.utils.mermaid_renderer import DIAGRAM_RENDERER, renderer_pool
+from srs_engine.utils.artifact_store import JobWorkspace, artifact_store, safe_filename
+from srs_engine.utils.retention import RETENTION_ENABLED, retention_manager
 from google.adk.agents import SequentialAgent , ParallelAgent
-from pathlib import Path
 import time
+import asyncio
 from datetime import datetime
-from srs_engine.utils.srs_document_generator import generate_srs_document
+from srs_engine.utils.srs_document_generator import SRSDocumentBuilder
 
 today = datetime.today().strftime("%m/%d/%Y")
 
@@ -42,7 +56,41 @@ templates = Jinja2Templates(directory="srs_engine/templates")
 
 session_service_stateful = InMemorySessionService()
 
-async def create_technical_srs_agent():
+
+async def warm_up_diagram_renderer():
+    """Start a mermaid worker ahead of the first job so it skips browser startup."""
+    try:
+        await asyncio.to_thread(renderer_pool.warm_up)
+    except Exception as e:
+        print(f"⚠️ Mermaid renderer pool not started: {e}")
+
+
+@app.on_event("startup")
+async def start_diagram_renderer():
+    if DIAGRAM_RENDERER == "pool":
+        app.state.renderer_warm_up = asyncio.create_task(warm_up_diagram_renderer())
+
+
+@app.on_event("shutdown")
+async def stop_diagram_renderer():
+    renderer_pool.close()
+
+
+@app.on_event("startup")
+async def start_retention_sweeper():
+    if RETENTION_ENABLED:
+        app.state.retention_sweeper = asyncio.create_task(retention_manager.run())
+
+
+@app.on_event("shutdown")
+async def stop_retention_sweeper():
+    sweeper = getattr(app.state, "retention_sweeper", None)
+    if sweeper:
+        sweeper.cancel()
+    artifact_store.close()
+
+async def create_technical_srs_agent(inputs: dict = None):
+    core_features = (inputs or {}).get("functional_scope", {}).get("core_features")
      
     first_agent = SequentialAgent(
           name = "first_agent",
@@ -52,7 +100,7 @@ async def create_technical_srs_agent():
                     sub_agents = [
                          create_technical_srs_introduction_agent(),
                          create_technical_srs_overall_description_agent(),
-                         create_technical_srs_system_features_agent(),
+                         create_technical_srs_system_features_agent(core_features),
                          create_technical_srs_external_interfaces_agent(),
                          create_technical_srs_nfr_agent()
                     ],
@@ -95,9 +143,114 @@ async def root(request: Request):
     )
 
 
-@app.post("/generate_srs")
-async def generate_srs(srs_data: SRSRequest):
+@app.post("/preflight")
+async def preflight(srs_data: SRSRequest):
+    inputs = srs_data.dict()
+    first_agent , second_agent = await create_technical_srs_agent(inputs)
+    return audit_pipeline([first_agent, second_agent], inputs)
+
+
+async def validate_within(deadline: Deadline, section_key: str, data, inputs: dict, stage: str = "validation"):
+    """Validate a section within the ``stage`` budget, keeping it as-is on timeout."""
+    fallback = data if isinstance(data, dict) else {}
+    return await deadline.run(stage, ensure_valid_section(section_key, data, inputs), fallback=fallback)
+
+
+async def prepare_interface_diagrams(deadline: Deadline, state: dict, inputs: dict):
+    """
+    Validate the external interfaces section and render its diagrams.
+
+    The section is complete after stage 1, so this runs as a task alongside
+    stage 2 and keeps diagram rendering off the critical path.
+
+    Args:
+        deadline: Deadline of the job
+        state: Session state after stage 1
+        inputs: User inputs of the job
+
+    Returns:
+        tuple: (external interfaces section, render results of render_mermaid_diagrams)
+    """
+    external_interfaces_section = merge_external_interfaces({
+        interface_key: clean_and_parse_json(state.get(output_key, {}), output_key)
+        for interface_key, output_key in INTERFACE_OUTPUT_KEYS.items()
+    })
+    # Charged to the diagrams budget: starting the shared validation clock
+    # here would spend it on stage 2 time
+    external_interfaces_section = clean_interface_diagrams(await validate_within(deadline, "external_interfaces_section", external_interfaces_section, inputs, stage="diagrams"))
+    print("External Interfaces Section: ", external_interfaces_section)
 
+    # All diagrams render concurrently in memory; one that fails or misses the
+    # budget is left out and the document shows a placeholder
+    diagrams = {}
+    for interface_key in INTERFACE_OUTPUT_KEYS:
+        diagram_code = (external_interfaces_section.get(interface_key) or {}).get("interface_diagram", {}).get("code")
+        if diagram_code:
+            diagrams[interface_key] = diagram_code
+
+    render_results = await render_mermaid_diagrams(diagrams, deadline.budget("diagrams"))
+    for interface_key, result in render_results.items():
+        if result["error"]:
+            print(f"⚠️ {interface_key} diagram skipped: {result['error']}")
+    return external_interfaces_section, render_results
+
+
+# Sections 1-3 and 5 come from stage 1 and are laid out while stage 2 runs
+DRAFT_SECTION_KEYS = ["introduction_section", "overall_description_section", "system_features_section", "nfr_section"]
+
+
+async def draft_document(deadline: Deadline, state: dict, inputs: dict, diagram_task: asyncio.Task, project_name: str, authors: list, organization: str):
+    """
+    Validate the stage 1 sections and lay out sections 1-5 of the document.
+
+    Runs as a task alongside stage 2; section 4 waits for ``diagram_task``.
+
+    Args:
+        deadline: Deadline of the job
+        state: Session state after stage 1
+        inputs: User inputs of the job
+        diagram_task: Task running prepare_interface_diagrams
+        project_name: Name of the project
+        authors: Document authors
+        organization: Organization name
+
+    Returns:
+        tuple: (SRSDocumentBuilder holding sections 1-5, render results of the diagrams)
+    """
+    sections = {}
+    for section_key in DRAFT_SECTION_KEYS:
+        # Charged to the draft budget, which runs in parallel with stage 2
+        sections[section_key] = await validate_within(deadline, section_key, clean_and_parse_json(state.get(section_key, {}), section_key), inputs, stage="draft")
+        print(f"{section_key}: ", sections[section_key])
+
+    builder = await asyncio.to_thread(SRSDocumentBuilder, project_name, authors, organization)
+    for section_key in DRAFT_SECTION_KEYS[:3]:
+        await asyncio.to_thread(builder.add_section, section_key, sections[section_key])
+
+    external_interfaces_section, render_results = await diagram_task
+    images = {key: result["png"] for key, result in render_results.items() if result["png"]}
+    vector_images = {key: result["svg"] for key, result in render_results.items() if result["svg"]}
+    await asyncio.to_thread(builder.add_section, "external_interfaces_section", external_interfaces_section, images, vector_images)
+    await asyncio.to_thread(builder.add_section, "nfr_section", sections["nfr_section"])
+    return builder, render_results
+
+
+@app.post("/generate_srs")
+async def generate_srs(srs_data: SRSRequest, request: Request):
+    deadline = Deadline()
+    try:
+        return await cancel_on_disconnect(
+            request,
+            asyncio.wait_for(run_srs_job(srs_data, deadline), timeout=deadline.remaining())
+        )
+    except ClientDisconnected:
+        return {"status": "cancelled"}
+    except (asyncio.TimeoutError, StageTimeout):
+        raise HTTPException(status_code=504, detail=f"SRS generation exceeded its {deadline.seconds:.0f}s deadline")
+
+
+async def run_srs_job(srs_data: SRSRequest, deadline: Deadline):
+    """Generate the SRS document for one request within ``deadline``."""
 
     print("Received SRS Data: ", srs_data)
     session_id = str(uuid.uuid4())
@@ -124,104 +277,110 @@ async def generate_srs(srs_data: SRSRequest):
 
     print("Session created with ID: ", session_id)
 
-    first_agent , second_agent  = await create_technical_srs_agent()
+    first_agent , second_agent  = await create_technical_srs_agent(inputs)
+    budget = audit_pipeline([first_agent, second_agent], inputs)
+    print(f"Token budget: {budget['total_tokens']} tokens, ~{budget['estimated_seconds']}s, fits TPM: {budget['fits_tpm']}")
     runner = await create_runner(first_agent, project_name, session_service_stateful)
 
     print("Runner created for agent ")
+    print("Prompt token savings (stage 1): ", token_savings_report(agent_instruction_templates(first_agent), initial_state))
     prompt = await create_prompt()
 
     print("Prompt created for agent ")
 
-    response = await generated_response(runner , user_id , session_id , prompt)
+    # On timeout the agents are cancelled and the sections finished so far are kept
+    stage_started = time.monotonic()
+    response = await deadline.run("stage_1", generated_response(runner , user_id , session_id , prompt), fallback=None)
+    stage_elapsed = time.monotonic() - stage_started
 
     print("Response generated by agent ")
 
     session = await get_session(session_service_stateful,project_name , user_id , session_id)
 
     print("Session state after agent run: ", session.state)
-    
-    time.sleep(60) 
 
-    second_runner = await create_runner(second_agent, project_name, session_service_stateful)   
+    # Fan-out mode: merge the feature chunks so stage 2 sees one section
+    feature_parts = feature_part_keys(session.state)
+    core_features = inputs.get("functional_scope", {}).get("core_features")
+    if feature_parts or should_fan_out(core_features):
+        merged_features = merge_system_features([clean_and_parse_json(session.state.get(key), key) for key in feature_parts])
+        print(f"Merged {len(merged_features['features'])} features from {len(feature_parts)} parallel agents")
+        # Features of failed chunks are re-asked before stage 2 reads the
+        # section; charged to the draft budget, which validates it next
+        merged_features = await deadline.run(
+            "draft",
+            ensure_features_covered(merged_features, core_features, inputs),
+            fallback=merged_features,
+        )
+        await update_session_state(session_service_stateful, session, {"system_features_section": merged_features})
     
-    print(f"Second Runner created for agent ")
+    # Stage 1 sections are final: validate them, render the diagrams and lay
+    # out sections 1-5 while the TPM wait and the stage 2 agents run
+    stage_one_state = dict(session.state)
+    diagram_task = asyncio.create_task(prepare_interface_diagrams(deadline, stage_one_state, inputs))
+    draft_task = asyncio.create_task(draft_document(deadline, stage_one_state, inputs, diagram_task, project_name, author_list, organization_name))
+    try:
+        wait_seconds = inter_stage_wait(budget["stages"][0], budget["stages"][1], stage_elapsed, budget["tpm_limit"])
+        print(f"Waiting {wait_seconds:.1f}s for the TPM window before stage 2")
+        await asyncio.sleep(min(wait_seconds, deadline.budget("inter_stage_wait")))
 
-    second_response = await generated_response(second_runner , user_id , session_id , prompt)
+        second_runner = await create_runner(second_agent, project_name, session_service_stateful)   
 
-    print("Response generated by second agent ")
+        print(f"Second Runner created for agent ")
+        print("Prompt token savings (stage 2): ", token_savings_report(agent_instruction_templates(second_agent), session.state))
 
-    session = await get_session(session_service_stateful,project_name , user_id , session_id)
+        second_response = await deadline.run("stage_2", generated_response(second_runner , user_id , session_id , prompt), fallback=None)
 
-    print("Session state after second agent run: ", session.state)
-    
+        print("Response generated by second agent ")
 
-    introduction_section = clean_and_parse_json(session.state.get("introduction_section", {}))
-    print("Introduction Section: ", introduction_section)
-    overall_description_section = clean_and_parse_json(session.state.get("overall_description_section", {}))
-    print("Overall Description Section: ", overall_description_section)
-    system_features_section = clean_and_parse_json(session.state.get("system_features_section", {}))
-    print("System Features Section: ", system_features_section)
-    external_interfaces_section = clean_interface_diagrams(clean_and_parse_json(session.state.get("external_interfaces_section", {})))
-    print("External Interfaces Section: ", external_interfaces_section)
+        session = await get_session(session_service_stateful,project_name , user_id , session_id)
 
-    base_dir = Path("./srs_engine/generated_images") / project_name
-    base_dir.mkdir(parents=True, exist_ok=True)
+        print("Session state after second agent run: ", session.state)
 
-    image_paths = {
-    "user_interfaces": base_dir / f"{project_name}_user_interfaces_diagram.png",
-    "hardware_interfaces": base_dir / f"{project_name}_hardware_interfaces_diagram.png",
-    "software_interfaces": base_dir / f"{project_name}_software_interfaces_diagram.png",
-    "communication_interfaces": base_dir / f"{project_name}_communication_interfaces_diagram.png",
-}
 
+        glossary_section = await validate_within(deadline, "glossary_section", clean_and_parse_json(session.state.get("glossary_section", {}), "glossary_section"), inputs)
+        print("Glossary Section: ", glossary_section)
 
-    render_mermaid_png(external_interfaces_section['user_interfaces']['interface_diagram']['code'], image_paths['user_interfaces'])
-    render_mermaid_png(external_interfaces_section['hardware_interfaces']['interface_diagram']['code'], image_paths['hardware_interfaces'])
-    render_mermaid_png(external_interfaces_section['software_interfaces']['interface_diagram']['code'], image_paths['software_interfaces'])
-    render_mermaid_png(external_interfaces_section['communication_interfaces']['interface_diagram']['code'], image_paths['communication_interfaces'])
 
+        assumptions_section = await validate_within(deadline, "assumptions_section", clean_and_parse_json(session.state.get("assumptions_section", {}), "assumptions_section"), inputs)
+        print("Assumptions Section: ", assumptions_section)
 
+        builder, render_results = await draft_task
+    except BaseException:
+        draft_task.cancel()
+        diagram_task.cancel()
+        raise
 
 
-    nfr_section = clean_and_parse_json(session.state.get("nfr_section", {}))
-    print("Non-Functional Requirements Section: ", nfr_section)
-
-
-    glossary_section = clean_and_parse_json(session.state.get("glossary_section", {}))
-    print("Glossary Section: ", glossary_section)
-
+    ## SRS Making ##
+    # The job writes into its own workspace, so concurrent jobs for the same
+    # project cannot clobber each other; outputs then go to the artifact store
+    with JobWorkspace(project_name, job_id=session_id) as workspace:
+        if PERSIST_DIAGRAMS:
+            await asyncio.to_thread(persist_diagrams, render_results, workspace.directory, safe_filename(project_name))
 
-    assumptions_section = clean_and_parse_json(session.state.get("assumptions_section", {}))
-    print("Assumptions Section: ", assumptions_section)
+        output_path = workspace.path(f"{project_name}_SRS.docx")
 
+        # Only sections 6-7, the header/footer and the save are left; python-docx
+        # cannot be interrupted, so past the budget the job fails with 504
+        await deadline.run("document", asyncio.to_thread(
+            builder.finish,
+            str(output_path),
+            {"glossary_section": glossary_section, "assumptions_section": assumptions_section}
+        ))
 
-    ## SRS Making ##
-    output_path = f"./srs_engine/generated_srs/{project_name}_SRS.docx"
-
-    Path("./srs_engine/generated_srs").mkdir(exist_ok=True)
-
-    generated_path = generate_srs_document(
-        project_name=project_name,
-        introduction_section=introduction_section,
-        overall_description_section=overall_description_section,
-        system_features_section=system_features_section,
-        external_interfaces_section=external_interfaces_section,
-        nfr_section=nfr_section,
-        glossary_section=glossary_section,
-        assumptions_section=assumptions_section,
-        image_paths=image_paths,
-        output_path=output_path,
-        authors=author_list , # List of authors
-        organization=organization_name
-    )
+        artifacts = await asyncio.to_thread(workspace.commit)
 
-    print(f"✅ SRS document generated successfully: {generated_path}")
+    document = artifacts[output_path.name]
+    print(f"✅ SRS document generated successfully: {document.path}")
 
 
 
 
     return {
-        "srs_document_path": generated_path
+        "srs_document_path": str(document.path),
+        "job_id": workspace.job_id,
+        "artifacts": {name: artifact.digest for name, artifact in artifacts.items()}
     }
 
 
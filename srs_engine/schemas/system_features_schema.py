@@ -20,4 +20,9 @@ class SystemFeature(StrictBaseModel):
 # --- ADD THIS WRAPPER CLASS ---
 class SystemFeaturesSection(StrictBaseModel):
     title: str = Field(description="The title of the features section")  # Remove default
-    features: List[SystemFeature]
\ No newline at end of file
+    features: List[SystemFeature]
+
+
+class SystemFeatureBatch(StrictBaseModel):
+    """Features written by one fan-out agent; merged into SystemFeaturesSection"""
+    features: List[SystemFeature]
@@ -0,0 +1,267 @@
+"""
+Job Workspaces and Artifact Store
+
+Every SRS job writes its files into a workspace directory of its own (named
+by job id), so concurrent requests for the same project never overwrite
+each other mid-run. When the job is done its outputs are committed to a
+content-addressed store: blobs are named by their SHA-256, so an image or
+document produced by several jobs is kept once, and a SQLite index maps
+each job's artifacts (job id, file name) to the blobs.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+ARTIFACT_DIR = Path(os.getenv("SRS_ARTIFACT_DIR", "./srs_engine/artifacts"))
+WORKSPACE_DIR = Path(os.getenv("SRS_WORKSPACE_DIR", "./srs_engine/workspaces"))
+
+MEDIA_TYPES = {
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".pdf": "application/pdf",
+    ".png": "image/png",
+    ".svg": "image/svg+xml",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    media_type TEXT NOT NULL,
+    suffix TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    job_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    project_name TEXT NOT NULL,
+    digest TEXT NOT NULL REFERENCES blobs(digest),
+    created_at REAL NOT NULL,
+    PRIMARY KEY (job_id, name)
+);
+CREATE INDEX IF NOT EXISTS artifacts_digest ON artifacts(digest);
+CREATE INDEX IF NOT EXISTS artifacts_created ON artifacts(created_at);
+"""
+
+# Read files in chunks when hashing, so large documents are not loaded whole
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class Artifact:
+    """One job output and the blob that holds it."""
+    job_id: str
+    name: str
+    digest: str
+    size: int
+    media_type: str
+    path: Path
+
+
+def safe_filename(name: str) -> str:
+    """File name without path separators or characters filesystems reject."""
+    cleaned = re.sub(r"[^\w.-]+", "_", name).strip("._")
+    return cleaned or "artifact"
+
+
+def file_digest(path: Path) -> str:
+    """Hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed blob directory with a SQLite index.
+
+    Methods are blocking and thread-safe; call them from worker threads
+    (``asyncio.to_thread``) in request handlers.
+    """
+
+    def __init__(self, root: Path = ARTIFACT_DIR):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the module creates no files
+        if self._db is None:
+            self.blob_dir.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.root / "index.sqlite", check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    def blob_path(self, digest: str, suffix: str = "") -> Path:
+        # Two-character fan-out keeps directories small
+        return self.blob_dir / digest[:2] / f"{digest}{suffix}"
+
+    @contextmanager
+    def transaction(self):
+        """
+        Hold the store lock and a write transaction.
+
+        File moves and deletes happen inside it too, so a blob that one job
+        is being deduplicated against cannot be collected at the same time
+        (also across processes sharing the index).
+        """
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.db
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    def _put_blob(self, db: sqlite3.Connection, source: Path, digest: str):
+        """Move ``source`` into the blob directory unless the content is stored already."""
+        suffix = source.suffix.lower()
+        row = db.execute("SELECT suffix FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row and self.blob_path(digest, row[0]).exists():
+            source.unlink()
+            return
+        target = self.blob_path(digest, suffix)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(source), str(target))
+        db.execute(
+            "INSERT OR REPLACE INTO blobs (digest, size, media_type, suffix, created_at) VALUES (?, ?, ?, ?, ?)",
+            (digest, target.stat().st_size, MEDIA_TYPES.get(suffix, "application/octet-stream"), suffix, time.time()),
+        )
+
+    def add(self, job_id: str, project_name: str, source: Path, name: Optional[str] = None) -> Artifact:
+        """
+        Store a job output and record it in the index.
+
+        Identical content already in the store is reused and ``source`` is
+        dropped, so the file is kept once however many jobs produce it.
+
+        Args:
+            job_id: Job that produced the file
+            project_name: Project the job belongs to
+            source: File to ingest (consumed)
+            name: Artifact name within the job (default: the file name)
+
+        Returns:
+            Artifact: Index entry pointing at the stored blob
+        """
+        name = name or source.name
+        # Hashing is the slow part and needs no lock
+        digest = file_digest(source)
+        with self.transaction() as db:
+            self._put_blob(db, source, digest)
+            db.execute(
+                "INSERT OR REPLACE INTO artifacts (job_id, name, project_name, digest, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, name, project_name, digest, time.time()),
+            )
+        return self.job_artifacts(job_id, name)[0]
+
+    def remove_jobs(self, job_ids: List[str]) -> Tuple[int, int]:
+        """
+        Drop the index entries of ``job_ids`` and delete blobs no other job references.
+
+        Returns:
+            Tuple[int, int]: Blobs deleted and bytes freed
+        """
+        if not job_ids:
+            return 0, 0
+        marks = ",".join("?" * len(job_ids))
+        blobs = freed = 0
+        with self.transaction() as db:
+            candidates = [row[0] for row in db.execute(
+                f"SELECT DISTINCT digest FROM artifacts WHERE job_id IN ({marks})", job_ids
+            )]
+            db.execute(f"DELETE FROM artifacts WHERE job_id IN ({marks})", job_ids)
+            # Reference count: only the blobs these jobs used can have dropped to zero
+            for digest in candidates:
+                if db.execute("SELECT 1 FROM artifacts WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+                    continue
+                size, suffix = db.execute("SELECT size, suffix FROM blobs WHERE digest = ?", (digest,)).fetchone()
+                self.blob_path(digest, suffix).unlink(missing_ok=True)
+                db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                blobs += 1
+                freed += size
+        return blobs, freed
+
+    def job_artifacts(self, job_id: str, name: Optional[str] = None) -> List[Artifact]:
+        """Artifacts recorded for a job (optionally just the one called ``name``)."""
+        query = (
+            "SELECT a.job_id, a.name, a.digest, b.size, b.media_type, b.suffix "
+            "FROM artifacts a JOIN blobs b ON a.digest = b.digest WHERE a.job_id = ?"
+        )
+        params = [job_id]
+        if name is not None:
+            query += " AND a.name = ?"
+            params.append(name)
+        with self.lock:
+            rows = self.db.execute(query + " ORDER BY a.name", params).fetchall()
+        return [
+            Artifact(job_id, name, digest, size, media_type, self.blob_path(digest, suffix))
+            for job_id, name, digest, size, media_type, suffix in rows
+        ]
+
+    def close(self):
+        with self.lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class JobWorkspace:
+    """
+    Private scratch directory of one job; ``commit`` moves its files into the store.
+
+    Usable as a context manager that removes the directory on exit.
+    """
+
+    def __init__(self, project_name: str, job_id: Optional[str] = None, store: Optional[ArtifactStore] = None):
+        self.project_name = project_name
+        self.job_id = job_id or uuid.uuid4().hex
+        self.store = store or artifact_store
+        self.directory = WORKSPACE_DIR / safe_filename(self.job_id)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, name: str) -> Path:
+        """Location for an output file called ``name`` inside the workspace."""
+        return self.directory / safe_filename(name)
+
+    def commit(self) -> Dict[str, Artifact]:
+        """
+        Move every file in the workspace into the artifact store.
+
+        Returns:
+            Dict[str, Artifact]: file name -> stored artifact
+        """
+        return {
+            source.name: self.store.add(self.job_id, self.project_name, source)
+            for source in sorted(self.directory.iterdir())
+            if source.is_file()
+        }
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> "JobWorkspace":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+
+artifact_store = ArtifactStore()
@@ -0,0 +1,127 @@
+"""
+Job Deadline Utility
+
+Every SRS job gets an end-to-end deadline that is split into budgets per
+stage (agent runs, section validation, diagram rendering, document build).
+Work that misses its budget is cancelled and the job degrades gracefully
+with whatever was produced in time; the whole job is cancelled when the
+HTTP client disconnects.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Dict
+
+
+JOB_DEADLINE_SECONDS = float(os.getenv("SRS_JOB_DEADLINE_SECONDS", "600"))
+DISCONNECT_POLL_SECONDS = 1.0
+
+# Share of the job deadline each stage may use. Shares add up to more than
+# 1 on purpose: a fast stage leaves its unused time to the later ones, and
+# every budget is still capped by the time left on the job.
+STAGE_BUDGET_SHARES: Dict[str, float] = {
+    "stage_1": 0.45,
+    "inter_stage_wait": 0.15,
+    "stage_2": 0.30,
+    "validation": 0.20,
+    # Validating and laying out sections 1-5, alongside stage 2
+    "draft": 0.30,
+    "diagrams": 0.15,
+    "document": 0.10,
+}
+
+_RAISE = object()
+
+
+class StageTimeout(TimeoutError):
+    """A stage ran past its budget and no fallback was given."""
+
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away while the job was running."""
+
+
+class Deadline:
+    """End-to-end deadline of one job, with cumulative per-stage budgets."""
+
+    def __init__(self, seconds: float = JOB_DEADLINE_SECONDS):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.stage_started: Dict[str, float] = {}
+
+    def remaining(self) -> float:
+        """Seconds left on the job (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def budget(self, stage: str) -> float:
+        """
+        Seconds left for ``stage``.
+
+        The stage clock starts on first use, so several calls in the same
+        stage (e.g. one validation per section) share one budget.
+
+        Args:
+            stage: Key of STAGE_BUDGET_SHARES
+
+        Returns:
+            float: Remaining budget, capped by the time left on the job
+        """
+        started = self.stage_started.setdefault(stage, time.monotonic())
+        stage_left = STAGE_BUDGET_SHARES.get(stage, 1.0) * self.seconds - (time.monotonic() - started)
+        return max(0.0, min(stage_left, self.remaining()))
+
+    async def run(self, stage: str, awaitable: Awaitable, fallback: Any = _RAISE) -> Any:
+        """
+        Await ``awaitable`` within the stage budget, cancelling it on expiry.
+
+        Args:
+            stage: Key of STAGE_BUDGET_SHARES
+            awaitable: Work to run
+            fallback: Value returned on timeout (raise StageTimeout if omitted)
+
+        Returns:
+            Any: Result of the work, or ``fallback`` on timeout
+        """
+        budget = self.budget(stage)
+        try:
+            return await asyncio.wait_for(awaitable, timeout=budget)
+        except asyncio.TimeoutError:
+            print(f"⏱️ {stage} exceeded its {budget:.1f}s budget, cancelled")
+            if fallback is _RAISE:
+                raise StageTimeout(stage)
+            return fallback
+
+
+async def cancel_on_disconnect(request, awaitable: Awaitable, poll_interval: float = DISCONNECT_POLL_SECONDS) -> Any:
+    """
+    Run ``awaitable`` and cancel it as soon as the HTTP client disconnects.
+
+    Args:
+        request: Starlette/FastAPI request of the job
+        awaitable: The job
+        poll_interval: Seconds between disconnect checks
+
+    Returns:
+        Any: Result of the job
+
+    Raises:
+        ClientDisconnected: If the client went away first
+    """
+    job = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({job}, timeout=poll_interval)
+            if done:
+                return job.result()
+            if await request.is_disconnected():
+                print("🔌 Client disconnected, cancelling job")
+                job.cancel()
+                try:
+                    await job
+                except BaseException:
+                    pass
+                raise ClientDisconnected()
+    finally:
+        if not job.done():
+            job.cancel()
@@ -0,0 +1,146 @@
+"""
+Diagram Render Cache
+
+Content-addressed disk cache of rendered diagrams. The key is a SHA-256 of
+the normalised mermaid source plus everything that changes the image
+(output format, render and optimisation options), so identical diagrams - including the
+shared "No Interface Defined" fallback - cost a file read instead of a
+browser render. The store is bounded in size and evicts least recently
+used entries.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from .image_optimizer import OPTIMIZE_OPTIONS
+from .mermaid_renderer import DIAGRAM_RENDERER, RENDER_OPTIONS
+
+
+DIAGRAM_CACHE_ENABLED = os.getenv("SRS_DIAGRAM_CACHE", "true").lower() == "true"
+DIAGRAM_CACHE_DIR = Path(os.getenv("SRS_DIAGRAM_CACHE_DIR", "./srs_engine/generated_images/.cache"))
+DIAGRAM_CACHE_MAX_MB = float(os.getenv("SRS_DIAGRAM_CACHE_MAX_MB", "200"))
+
+# Bump when a renderer change makes cached images stale
+CACHE_VERSION = 1
+# Share of the size limit an eviction pass shrinks the cache to
+EVICT_TO_SHARE = 0.8
+# The pool and mmdc draw identical images; the native renderer does not
+RENDERER_FAMILY = "native" if DIAGRAM_RENDERER == "native" else "mermaid"
+
+
+def normalize_mermaid(mermaid_code: str) -> str:
+    """Strip indentation, trailing spaces and blank lines so layout-only edits share a key."""
+    return "\n".join(line.strip() for line in mermaid_code.strip().splitlines() if line.strip())
+
+
+def cache_key(mermaid_code: str, output_format: str = "png", options: Optional[dict] = None) -> str:
+    """
+    Content address of a rendered diagram.
+
+    Args:
+        mermaid_code: Sanitised mermaid source
+        output_format: "png" or "svg"
+        options: Render options (defaults to RENDER_OPTIONS, the renderer family and OPTIMIZE_OPTIONS)
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    material = json.dumps(
+        {
+            "version": CACHE_VERSION,
+            "format": output_format,
+            "options": options or {**RENDER_OPTIONS, "renderer": RENDERER_FAMILY, "optimize": OPTIMIZE_OPTIONS},
+            "source": normalize_mermaid(mermaid_code),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class DiagramCache:
+    """Size-bounded LRU store of rendered diagrams, one file per key."""
+
+    def __init__(self, directory: Path = DIAGRAM_CACHE_DIR, max_bytes: int = int(DIAGRAM_CACHE_MAX_MB * 1024 * 1024)):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Running size estimate; the directory is only scanned to evict
+        self.total_bytes: Optional[int] = None
+
+    def _path(self, key: str, output_format: str) -> Path:
+        # Two-character fan-out keeps directories small
+        return self.directory / key[:2] / f"{key}.{output_format}"
+
+    def get(self, mermaid_code: str, output_format: str = "png") -> Optional[bytes]:
+        """
+        Look up the cached render of ``mermaid_code``.
+
+        Returns:
+            Optional[bytes]: The image on a cache hit, else None
+        """
+        if not DIAGRAM_CACHE_ENABLED:
+            return None
+        entry = self._path(cache_key(mermaid_code, output_format), output_format)
+        try:
+            data = entry.read_bytes()
+            # Recency for LRU eviction
+            os.utime(entry)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        print(f"♻️ Diagram cache hit: {entry.name}")
+        return data
+
+    def put(self, mermaid_code: str, data: bytes, output_format: str = "png"):
+        """Add a fresh render to the cache and evict old entries past the size limit."""
+        if not DIAGRAM_CACHE_ENABLED or not data:
+            return
+        entry = self._path(cache_key(mermaid_code, output_format), output_format)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so concurrent readers never see a partial file
+        temp = entry.with_name(f".{entry.name}.{uuid.uuid4().hex}.tmp")
+        temp.write_bytes(data)
+        os.replace(temp, entry)
+        with self.lock:
+            if self.total_bytes is not None:
+                self.total_bytes += len(data)
+            needs_scan = self.total_bytes is None or self.total_bytes > self.max_bytes
+        if needs_scan:
+            self.evict()
+
+    def evict(self):
+        """
+        Delete least recently used entries until the store fits ``max_bytes``.
+
+        Evicts down to EVICT_TO_SHARE of the limit, so the next scans are
+        many stores away.
+        """
+        with self.lock:
+            entries = []
+            for path in self.directory.glob("*/*"):
+                if path.name.startswith("."):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                for _, size, path in sorted(entries):
+                    if total <= self.max_bytes * EVICT_TO_SHARE:
+                        break
+                    path.unlink(missing_ok=True)
+                    total -= size
+            self.total_bytes = total
+
+
+diagram_cache = DiagramCache()
@@ -0,0 +1,154 @@
+"""
+DOCX Writer Benchmark
+
+Builds a synthetic SRS with thousands of requirements and glossary terms
+with each document writer backend and reports build time, peak RSS and file
+size. Every run happens in a fresh interpreter, so the peak RSS of one
+backend does not hide the other's.
+
+Usage:
+    python -m srs_engine.utils.docx_benchmark [--features 500] [--requirements 10] [--terms 5000] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+WRITERS = ["python-docx", "stream"]
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def synthetic_sections(features: int, requirements: int, terms: int) -> Dict[str, Any]:
+    """Section data shaped like the agents' output, scaled up."""
+    sentence = "The system shall process the request and record the outcome in the audit log"
+    return {
+        "introduction_section": {
+            "purpose": {"description": sentence},
+            "intended_audience": {"audience_groups": [f"Audience {i}" for i in range(10)]},
+            "project_scope": {"included": [sentence] * 20, "excluded": [sentence] * 10},
+            "document_conventions": {"conventions": [sentence] * 5},
+            "references": {"references": [{"id": f"REF-{i}", "description": sentence} for i in range(20)]},
+        },
+        "overall_description_section": {
+            "product_perspective": {"description": sentence},
+            "product_features": {"features": [f"Feature {i}: {sentence}" for i in range(features)]},
+            "user_classes_and_characteristics": {"user_classes": [
+                {"user_class": f"User class {i}", "characteristics": [sentence] * 5} for i in range(10)
+            ]},
+        },
+        "system_features_section": {"features": [
+            {
+                "feature_name": f"Feature {i}",
+                "description": sentence,
+                "stimulus_response": [{"stimulus": sentence, "response": sentence}] * 3,
+                "functional_requirements": [
+                    {"description": f"FR-{i}.{j}: {sentence}"} for j in range(requirements)
+                ],
+            }
+            for i in range(features)
+        ]},
+        "external_interfaces_section": {key: {"description": sentence} for key in (
+            "user_interfaces", "hardware_interfaces", "software_interfaces", "communication_interfaces"
+        )},
+        "nfr_section": {key: {"requirements": [
+            {"description": f"NFR-{i}: {sentence}", "rationale": sentence} for i in range(requirements * 50)
+        ]} for key in ("performance_requirements", "safety_requirements", "security_requirements", "quality_attributes")},
+        "glossary_section": {"sections": [
+            {"title": f"Terms {s}", "terms": [
+                {"term": f"Term {s}.{i}", "definition": sentence} for i in range(terms // 10)
+            ]}
+            for s in range(10)
+        ]},
+        "assumptions_section": {"assumptions": [
+            {"description": sentence, "impact": sentence} for _ in range(requirements * 20)
+        ]},
+    }
+
+
+def run_writer(writer: str, features: int, requirements: int, terms: int) -> Dict[str, Any]:
+    """Build one document with ``writer`` in this process and measure it."""
+    from .srs_document_generator import SRSDocumentBuilder, base_template
+
+    sections = synthetic_sections(features, requirements, terms)
+    # The template is built once per process in production too
+    base_template()
+    baseline = _peak_rss_mb()
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, "benchmark.docx")
+        started = time.perf_counter()
+        builder = SRSDocumentBuilder("Benchmark", ["Author"], "Organization", writer=writer)
+        for section_key in SRSDocumentBuilder.SECTION_ORDER[:5]:
+            builder.add_section(section_key, sections[section_key])
+        builder.finish(output_path, sections)
+        seconds = time.perf_counter() - started
+        size = os.path.getsize(output_path)
+
+    peak = _peak_rss_mb()
+    return {
+        "writer": writer,
+        "seconds": round(seconds, 3),
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        "rss_growth_mb": round(peak - baseline, 1) if peak is not None else None,
+        "file_kb": round(size / 1024),
+    }
+
+
+def benchmark(features: int, requirements: int, terms: int, writers: List[str] = WRITERS) -> List[Dict[str, Any]]:
+    """Run every writer in its own interpreter and collect the measurements."""
+    results = []
+    for writer in writers:
+        output = subprocess.run(
+            [sys.executable, "-m", "srs_engine.utils.docx_benchmark", "--run", writer,
+             "--features", str(features), "--requirements", str(requirements), "--terms", str(terms)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the SRS document writer backends.")
+    parser.add_argument("--features", type=int, default=500, help="System features")
+    parser.add_argument("--requirements", type=int, default=10, help="Functional requirements per feature")
+    parser.add_argument("--terms", type=int, default=5000, help="Glossary terms")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--run", choices=WRITERS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run:
+        print(json.dumps(run_writer(args.run, args.features, args.requirements, args.terms)))
+        return
+
+    results = benchmark(args.features, args.requirements, args.terms)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.features} features x {args.requirements} requirements, {args.terms} glossary terms")
+    for result in results:
+        print(
+            f"  {result['writer']:<12} {result['seconds']:>7.2f}s  peak RSS {result['peak_rss_mb']} MB "
+            f"(+{result['rss_growth_mb']} MB)  {result['file_kb']} KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
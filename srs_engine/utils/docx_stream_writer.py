@@ -0,0 +1,406 @@
+"""
+Streaming DOCX Writer
+
+python-docx keeps the whole document as an lxml tree until ``save`` and
+serialises it in one go, so memory and save time grow with the number of
+requirements. This backend gives ``SRSDocumentGenerator`` a document object
+with the small part of the python-docx API its section methods use
+(``add_heading``, ``add_paragraph``, ``add_run``, ``add_picture``,
+``add_section``) and writes each paragraph as WordprocessingML straight into
+the ``word/document.xml`` zip entry once the next one starts. Only the
+paragraph being built and the embedded images are held in memory.
+
+Everything else in the package (styles, numbering, settings, theme) is
+copied from the cached styled template, so both backends produce the same
+document. Select it with ``SRS_DOCX_WRITER=stream``.
+"""
+
+import hashlib
+import io
+import re
+import shutil
+import tempfile
+import zipfile
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from docx import Document
+from docx.image.image import Image
+from lxml import etree
+
+from .srs_document_generator import (
+    SRSDocumentGenerator,
+    SVG_BLIP_EXTENSION,
+    SVG_NAMESPACE,
+    base_template,
+    fit_picture_to_svg,
+    style_key,
+)
+
+
+RELATIONSHIP_TYPES = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+IMAGE_RELATIONSHIP = RELATIONSHIP_TYPES + "/image"
+HEADER_RELATIONSHIP = RELATIONSHIP_TYPES + "/header"
+FOOTER_RELATIONSHIP = RELATIONSHIP_TYPES + "/footer"
+HEADER_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"
+FOOTER_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.footer+xml"
+W_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NAMESPACE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+# Parts rewritten for every document; the rest of the template is copied as is
+GENERATED_PARTS = {"word/document.xml", "word/_rels/document.xml.rels", "[Content_Types].xml", "word/settings.xml"}
+
+# Body XML is written to the zip entry in chunks of about this many characters
+FLUSH_CHARS = 64 * 1024
+
+# Characters XML 1.0 cannot carry (python-docx rejects them; here they are dropped)
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+# Style name -> style id, per template style key
+_style_ids: Dict[str, Dict[str, str]] = {}
+
+
+def _style_id(name: str) -> str:
+    """Style id of ``name`` in the base template (e.g. "List Bullet" -> "ListBullet")."""
+    key = style_key()
+    ids = _style_ids.get(key)
+    if ids is None:
+        styles = Document(io.BytesIO(base_template())).styles
+        ids = _style_ids[key] = {style.name: style.style_id for style in styles}
+    return ids.get(name, name.replace(" ", ""))
+
+
+def _run_text(text: str) -> str:
+    """WordprocessingML for run text, with line breaks and tabs as python-docx writes them."""
+    parts = []
+    for piece in re.split(r"(\r\n|\n|\r|\t)", _INVALID_XML_CHARS.sub("", text)):
+        if piece in ("\r\n", "\n", "\r"):
+            parts.append("<w:br/>")
+        elif piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece:
+            space = ' xml:space="preserve"' if piece != piece.strip() else ""
+            parts.append(f"<w:t{space}>{escape(piece)}</w:t>")
+    return "".join(parts)
+
+
+class _Font:
+    def __init__(self):
+        self.name = None
+        self.size = None
+        self.bold = None
+        self.italic = None
+        self.color = SimpleNamespace(rgb=None)
+
+    def xml(self) -> str:
+        properties = []
+        if self.name:
+            properties.append(f"<w:rFonts w:ascii={quoteattr(self.name)} w:hAnsi={quoteattr(self.name)}/>")
+        if self.bold is not None:
+            properties.append("<w:b/>" if self.bold else '<w:b w:val="0"/>')
+        if self.italic is not None:
+            properties.append("<w:i/>" if self.italic else '<w:i w:val="0"/>')
+        if self.color.rgb is not None:
+            properties.append(f'<w:color w:val="{self.color.rgb}"/>')
+        if self.size is not None:
+            properties.append(f'<w:sz w:val="{round(self.size.pt * 2)}"/>')
+        return f"<w:rPr>{''.join(properties)}</w:rPr>" if properties else ""
+
+
+class _Picture:
+    """Inline picture; width and height (EMU) may change until its paragraph is written."""
+
+    def __init__(self, rel_id: str, shape_id: int, width: int, height: int):
+        self.rel_id = rel_id
+        self.shape_id = shape_id
+        self.width = width
+        self.height = height
+        self.svg_rel_id: Optional[str] = None
+
+    def xml(self) -> str:
+        extension = ""
+        if self.svg_rel_id:
+            extension = (
+                f'<a:extLst><a:ext uri="{SVG_BLIP_EXTENSION}">'
+                f'<asvg:svgBlip xmlns:asvg="{SVG_NAMESPACE}" r:embed="{self.svg_rel_id}"/></a:ext></a:extLst>'
+            )
+        return (
+            '<w:drawing><wp:inline xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+            'xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+            f'<wp:extent cx="{self.width}" cy="{self.height}"/>'
+            f'<wp:docPr id="{self.shape_id}" name="Picture {self.shape_id}"/>'
+            '<wp:cNvGraphicFramePr><a:graphicFrameLocks noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+            '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture"><pic:pic>'
+            '<pic:nvPicPr><pic:cNvPr id="0" name="image.png"/><pic:cNvPicPr/></pic:nvPicPr>'
+            f'<pic:blipFill><a:blip r:embed="{self.rel_id}">{extension}</a:blip>'
+            '<a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+            '<pic:spPr><a:xfrm><a:off x="0" y="0"/>'
+            f'<a:ext cx="{self.width}" cy="{self.height}"/></a:xfrm><a:prstGeom prst="rect"/></pic:spPr>'
+            '</pic:pic></a:graphicData></a:graphic></wp:inline></w:drawing>'
+        )
+
+
+class _Run:
+    def __init__(self, document: "StreamingDocument", text: Optional[str]):
+        self.document = document
+        self.text = text or ""
+        self.font = _Font()
+        # Raw elements appended by field code (fldChar, instrText), as in python-docx
+        self._r: List[etree._Element] = []
+        self.picture: Optional[_Picture] = None
+
+    @property
+    def bold(self):
+        return self.font.bold
+
+    @bold.setter
+    def bold(self, value):
+        self.font.bold = value
+
+    @property
+    def italic(self):
+        return self.font.italic
+
+    @italic.setter
+    def italic(self, value):
+        self.font.italic = value
+
+    def add_picture(self, image_stream, width: int = None, height: int = None) -> _Picture:
+        self.picture = self.document.add_image(image_stream.read(), width, height)
+        return self.picture
+
+    def xml(self) -> str:
+        content = _run_text(self.text)
+        if self.picture is not None:
+            content += self.picture.xml()
+        content += "".join(etree.tostring(element, encoding="unicode") for element in self._r)
+        properties = self.font.xml()
+        return f"<w:r>{properties}{content}</w:r>" if properties or content else "<w:r/>"
+
+
+class _Paragraph:
+    def __init__(self, document: "StreamingDocument", style: Optional[str]):
+        self.document = document
+        self.style = style
+        self.alignment = None
+        self.paragraph_format = SimpleNamespace(space_after=None)
+        self.runs: List[_Run] = []
+        self.section_xml = ""
+
+    def add_run(self, text: Optional[str] = None, style: Optional[str] = None) -> _Run:
+        run = _Run(self.document, text)
+        self.runs.append(run)
+        return run
+
+    def xml(self) -> str:
+        properties = []
+        if self.style:
+            properties.append(f'<w:pStyle w:val="{_style_id(self.style)}"/>')
+        if self.paragraph_format.space_after is not None:
+            properties.append(f'<w:spacing w:after="{self.paragraph_format.space_after.twips}"/>')
+        if self.alignment is not None:
+            properties.append(f'<w:jc w:val="{self.alignment.xml_value}"/>')
+        properties.append(self.section_xml)
+        properties = "".join(properties)
+        content = "".join(run.xml() for run in self.runs)
+        if not properties and not content:
+            return "<w:p/>"
+        return f"<w:p>{f'<w:pPr>{properties}</w:pPr>' if properties else ''}{content}</w:p>"
+
+
+class StreamingDocument:
+    """
+    Write-once document with the python-docx calls SRSDocumentGenerator makes.
+
+    Paragraphs go to the zip as soon as the next one is added; ``save``
+    completes the package and copies it to the output path.
+    """
+
+    def __init__(self):
+        template = base_template()
+        self.template = zipfile.ZipFile(io.BytesIO(template))
+        document_xml = self.template.read("word/document.xml").decode("utf-8")
+        body_start = document_xml.index("<w:body>") + len("<w:body>")
+        self.section_properties = re.search(r"<w:sectPr\b.*?</w:sectPr>", document_xml, re.S).group(0)
+        # Page setup of every section, without the template's revision ids
+        self.page_setup = re.search(r"<w:pgSz\b.*?(?=</w:sectPr>)", self.section_properties, re.S).group(0)
+
+        rels = self.template.read("word/_rels/document.xml.rels").decode("utf-8")
+        self.next_rel = max(int(n) for n in re.findall(r'Id="rId(\d+)"', rels)) + 1
+        self.relationships: List[Tuple[str, str, str]] = []
+        # Header and footer ids are fixed up front, since the first section break references them
+        self.header_rel_id = self._relate(HEADER_RELATIONSHIP, "header1.xml")
+        self.footer_rel_id = self._relate(FOOTER_RELATIONSHIP, "footer1.xml")
+        self.header_xml = self.footer_xml = "<w:p/>"
+        self.update_fields = False
+
+        # SHA-1 -> (relationship id, part name, blob), so repeated images share one part
+        self.media: Dict[str, Tuple[str, str, bytes]] = {}
+        self.media_counts: Dict[str, int] = {}
+        self.media_types: Dict[str, str] = {}
+        self.shape_ids = 0
+        self.sections = 1
+        self.last_section: Optional[SimpleNamespace] = None
+
+        self.file = tempfile.TemporaryFile()
+        self.package = zipfile.ZipFile(self.file, "w", zipfile.ZIP_DEFLATED)
+        self.body = self.package.open("word/document.xml", "w")
+        self.buffer: List[str] = [document_xml[:body_start]]
+        self.buffered = 0
+        self.pending: Optional[_Paragraph] = None
+
+    def _relate(self, rel_type: str, target: str) -> str:
+        rel_id = f"rId{self.next_rel}"
+        self.next_rel += 1
+        self.relationships.append((rel_id, rel_type, target))
+        return rel_id
+
+    def _write(self, xml: str):
+        self.buffer.append(xml)
+        self.buffered += len(xml)
+        if self.buffered >= FLUSH_CHARS:
+            self.body.write("".join(self.buffer).encode("utf-8"))
+            self.buffer, self.buffered = [], 0
+
+    def _flush_paragraph(self):
+        if self.pending is not None:
+            self._write(self.pending.xml())
+            self.pending = None
+
+    def add_paragraph(self, text: str = "", style: Optional[str] = None) -> _Paragraph:
+        self._flush_paragraph()
+        paragraph = self.pending = _Paragraph(self, style)
+        if text:
+            paragraph.add_run(text)
+        return paragraph
+
+    def add_heading(self, text: str = "", level: int = 1) -> _Paragraph:
+        return self.add_paragraph(text, "Title" if level == 0 else f"Heading {level}")
+
+    def add_section(self, start_type=None) -> SimpleNamespace:
+        """End the current section with a page break, as python-docx's ``add_section`` does."""
+        self._flush_paragraph()
+        # python-docx attaches the header/footer to the first section and later ones inherit it
+        references = ""
+        if self.sections == 1:
+            references = (
+                f'<w:headerReference w:type="default" r:id="{self.header_rel_id}"/>'
+                f'<w:footerReference w:type="default" r:id="{self.footer_rel_id}"/>'
+            )
+        self._write(f"<w:p><w:pPr><w:sectPr>{references}{self.page_setup}</w:sectPr></w:pPr></w:p>")
+        self.sections += 1
+        self.last_section = SimpleNamespace(start_type=start_type, page_number_start=None)
+        return self.last_section
+
+    def add_image(self, blob: bytes, width: Optional[int] = None, height: Optional[int] = None) -> _Picture:
+        """Store an image part (once per content) and size its picture like python-docx."""
+        image = Image.from_blob(blob)
+        rel_id = self.add_media(blob, image.ext, image.sha1, image.content_type)
+        width, height = image.scaled_dimensions(width, height)
+        self.shape_ids += 1
+        return _Picture(rel_id, self.shape_ids, int(width), int(height))
+
+    def add_media(self, blob: bytes, ext: str, digest: str, content_type: str) -> str:
+        """Relationship id of a media part holding ``blob``."""
+        self.media_types[ext] = content_type
+        if digest not in self.media:
+            self.media_counts[ext] = self.media_counts.get(ext, 0) + 1
+            part_name = f"media/image{self.media_counts[ext]}.{ext}"
+            self.media[digest] = (self._relate(IMAGE_RELATIONSHIP, part_name), part_name, blob)
+        return self.media[digest][0]
+
+    def _header_footer_part(self, root: str) -> bytes:
+        return (
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+            f'<w:{root} xmlns:w="{W_NAMESPACE}" xmlns:r="{R_NAMESPACE}">'
+            f"{self.header_xml if root == 'hdr' else self.footer_xml}</w:{root}>"
+        ).encode("utf-8")
+
+    def _content_types(self) -> bytes:
+        types = self.template.read("[Content_Types].xml").decode("utf-8")
+        additions = [
+            f'<Default Extension="{ext}" ContentType="{content_type}"/>'
+            for ext, content_type in self.media_types.items()
+            if f'Extension="{ext}"' not in types
+        ]
+        additions += [
+            f'<Override PartName="/word/header1.xml" ContentType="{HEADER_CONTENT_TYPE}"/>',
+            f'<Override PartName="/word/footer1.xml" ContentType="{FOOTER_CONTENT_TYPE}"/>',
+        ]
+        return types.replace("</Types>", "".join(additions) + "</Types>").encode("utf-8")
+
+    def _relationships(self) -> bytes:
+        rels = self.template.read("word/_rels/document.xml.rels").decode("utf-8")
+        additions = "".join(
+            f'<Relationship Id="{rel_id}" Type="{rel_type}" Target="{target}"/>'
+            for rel_id, rel_type, target in self.relationships
+        )
+        return rels.replace("</Relationships>", additions + "</Relationships>").encode("utf-8")
+
+    def _settings(self) -> bytes:
+        settings = self.template.read("word/settings.xml").decode("utf-8")
+        if self.update_fields and "<w:updateFields" not in settings:
+            settings = settings.replace("</w:settings>", '<w:updateFields w:val="true"/></w:settings>')
+        return settings.encode("utf-8")
+
+    def save(self, output_path: str):
+        """Close the body, write the remaining parts and copy the package to ``output_path``."""
+        self._flush_paragraph()
+        section_type = ""
+        if self.last_section is not None and self.last_section.start_type is not None:
+            section_type = '<w:type w:val="nextPage"/>'
+        final_section = self.section_properties.replace(self.page_setup, section_type + self.page_setup, 1)
+        self._write(final_section + "</w:body></w:document>")
+        self.body.write("".join(self.buffer).encode("utf-8"))
+        self.buffer, self.buffered = [], 0
+        self.body.close()
+
+        self.package.writestr("word/_rels/document.xml.rels", self._relationships())
+        self.package.writestr("[Content_Types].xml", self._content_types())
+        self.package.writestr("word/settings.xml", self._settings())
+        self.package.writestr("word/header1.xml", self._header_footer_part("hdr"))
+        self.package.writestr("word/footer1.xml", self._header_footer_part("ftr"))
+        for _, part_name, blob in self.media.values():
+            self.package.writestr(f"word/{part_name}", blob)
+        for item in self.template.infolist():
+            if item.filename not in GENERATED_PARTS:
+                self.package.writestr(item, self.template.read(item.filename))
+        self.package.close()
+
+        self.file.seek(0)
+        with open(output_path, "wb") as output:
+            shutil.copyfileobj(self.file, output)
+        self.file.close()
+
+
+class StreamingSRSDocumentGenerator(SRSDocumentGenerator):
+    """SRSDocumentGenerator writing through StreamingDocument instead of python-docx."""
+
+    def __init__(self, project_name: str, authors: List[str] = None, organization: str = "Organization Name"):
+        self.project_name = project_name
+        self.authors = authors if authors else ["Author Name"]
+        self.organization = organization
+        self.doc = StreamingDocument()
+        # SVG digest -> relationship id, so repeated diagrams share one part
+        self._svg_rel_ids: Dict[str, str] = {}
+
+    def _set_update_fields_on_open(self):
+        self.doc.update_fields = True
+
+    def _attach_svg(self, picture: _Picture, svg: bytes):
+        picture.svg_rel_id = self.doc.add_media(svg, "svg", hashlib.sha1(svg).hexdigest(), "image/svg+xml")
+        fit_picture_to_svg(picture, svg)
+
+    def _add_header_footer(self):
+        """Header with the project name and a right-aligned page number footer (Arial 10)."""
+        font = '<w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/><w:sz w:val="20"/></w:rPr>'
+        self.doc.header_xml = (
+            f'<w:p><w:pPr><w:pStyle w:val="{_style_id("Header")}"/><w:jc w:val="left"/></w:pPr>'
+            f"<w:r>{font}{_run_text(f'SRS for {self.project_name}')}</w:r></w:p>"
+        )
+        self.doc.footer_xml = (
+            f'<w:p><w:pPr><w:pStyle w:val="{_style_id("Footer")}"/><w:jc w:val="right"/></w:pPr>'
+            f'<w:r>{font}<w:fldChar w:fldCharType="begin"/><w:instrText xml:space="preserve">PAGE</w:instrText>'
+            '<w:fldChar w:fldCharType="end"/></w:r></w:p>'
+        )
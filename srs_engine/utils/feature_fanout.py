@@ -0,0 +1,120 @@
+"""
+System Features Fan-Out Utility
+
+For large ``core_features`` lists the System Features section is generated
+map-reduce style: the features are split into small chunks, one agent per
+chunk writes its ``SystemFeature`` objects in parallel, and the parts are
+merged and renumbered into a single ``SystemFeaturesSection``. Latency then
+follows the slowest chunk instead of the whole list.
+"""
+
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+
+FANOUT_THRESHOLD = int(os.getenv("SRS_FEATURE_FANOUT_THRESHOLD", "8"))
+FEATURES_PER_AGENT = int(os.getenv("SRS_FEATURES_PER_AGENT", "2"))
+# Upper bound on concurrent feature agents; chunks grow instead past this.
+MAX_FEATURE_AGENTS = int(os.getenv("SRS_MAX_FEATURE_AGENTS", "6"))
+
+FEATURE_PART_PREFIX = "system_features_part_"
+FEATURES_TITLE = "System Features"
+
+_NUMBER_PREFIX = re.compile(r"^\s*(?:(?:feature|fr|sf)[\s-]*)?\d+(?:\.\d+)*[.:)\-]?\s+", re.IGNORECASE)
+
+
+def should_fan_out(core_features: Optional[List[str]]) -> bool:
+    """Return True when the feature list is long enough to split."""
+    return bool(core_features) and len(core_features) > FANOUT_THRESHOLD
+
+
+def feature_chunks(core_features: List[str]) -> List[List[str]]:
+    """
+    Split the feature list into contiguous chunks, one per agent.
+
+    Args:
+        core_features: ``FunctionalScope.core_features``
+
+    Returns:
+        List[List[str]]: Chunks in the original feature order
+    """
+    per_agent = max(1, FEATURES_PER_AGENT, math.ceil(len(core_features) / max(1, MAX_FEATURE_AGENTS)))
+    return [core_features[i:i + per_agent] for i in range(0, len(core_features), per_agent)]
+
+
+def feature_part_key(index: int) -> str:
+    """Session state key written by the chunk agent at ``index`` (1-based)."""
+    return f"{FEATURE_PART_PREFIX}{index}"
+
+
+def feature_part_keys(state: Dict[str, Any]) -> List[str]:
+    """Return the chunk output keys present in ``state``, in chunk order."""
+    keys = [key for key in state.keys() if key.startswith(FEATURE_PART_PREFIX)]
+    return sorted(keys, key=lambda key: int(key[len(FEATURE_PART_PREFIX):]))
+
+
+def merge_system_features(parts: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Merge chunk outputs into one SystemFeaturesSection dict.
+
+    Numbering the chunk agents added on their own ("3.2 Login", "Feature 4:")
+    is stripped so the document generator numbers the merged list once, and
+    features written by more than one chunk are kept only once. Chunks that
+    produced nothing are logged; ``missing_features`` finds what they lost.
+
+    Args:
+        parts: Parsed chunk outputs (``{"features": [...]}``), in chunk order
+
+    Returns:
+        Dict[str, Any]: ``{"title": ..., "features": [...]}``
+    """
+    features, seen = [], set()
+    for index, part in enumerate(parts, 1):
+        chunk_features = part.get("features") if isinstance(part, dict) else None
+        if not chunk_features:
+            print(f"⚠️ Feature chunk {index} produced no features")
+            continue
+        for feature in chunk_features:
+            if not isinstance(feature, dict):
+                continue
+            name = _feature_name(feature.get("feature_name", ""))
+            if name and name.lower() in seen:
+                continue
+            seen.add(name.lower())
+            features.append({**feature, "feature_name": name})
+    return {"title": FEATURES_TITLE, "features": features}
+
+
+def _feature_name(name: Any) -> str:
+    return _NUMBER_PREFIX.sub("", str(name)).strip()
+
+
+def missing_features(section: Dict[str, Any], core_features: Optional[List[str]]) -> List[str]:
+    """
+    Return the core features the merged section does not cover.
+
+    A core feature counts as covered when a feature name matches it, ignoring
+    case and numbering, or one of the two contains the other ("Login" and
+    "User Login" match).
+
+    Args:
+        section: Merged SystemFeaturesSection dict
+        core_features: ``FunctionalScope.core_features``
+
+    Returns:
+        List[str]: Uncovered core features, in their original order
+    """
+    names = [
+        _feature_name(feature.get("feature_name", "")).lower()
+        for feature in section.get("features") or []
+        if isinstance(feature, dict)
+    ]
+    names = [name for name in names if name]
+    missing = []
+    for core_feature in core_features or []:
+        wanted = _feature_name(core_feature).lower()
+        if wanted and not any(wanted in name or name in wanted for name in names):
+            missing.append(core_feature)
+    return missing
@@ -0,0 +1,651 @@
+"""
+Native Flowchart Renderer
+
+Renders the flowchart subset parsed by ``mermaid_lint`` without a browser.
+Nodes are ranked into layers (longest path, with cycles broken), ordered
+within each layer by barycenters to cut edge crossings, and placed so each
+node sits near its neighbours; long edges are routed through the layers
+they cross. The layout is written as SVG, or painted to PNG with Pillow
+when it is installed. A typical interface diagram renders in milliseconds.
+"""
+
+import html
+import io
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .mermaid_lint import Edge, Flowchart, parse_flowchart
+from .mermaid_renderer import RENDER_OPTIONS, RendererUnavailable
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    PNG_BACKEND = "pillow"
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = ImageDraw = ImageFont = None
+    PNG_BACKEND = None
+
+
+FONT_SIZE = 14
+LINE_HEIGHT = 18
+# Average glyph width of a sans-serif font at FONT_SIZE, used without Pillow
+CHAR_WIDTH = 7.4
+PADDING_X = 16
+PADDING_Y = 10
+MIN_NODE_WIDTH = 60
+LAYER_GAP = 56
+NODE_GAP = 36
+DUMMY_SIZE = 8
+MARGIN = 24
+CLUSTER_PADDING = 16
+ORDERING_SWEEPS = 6
+PLACEMENT_SWEEPS = 4
+
+# Colours of mermaid's "forest" theme
+THEME = {
+    "background": "#ffffff",
+    "node_fill": "#cde498",
+    "node_stroke": "#13540c",
+    "edge": "#333333",
+    "text": "#000000",
+    "label_fill": "#e8e8e8",
+    "cluster_fill": "#f2f9e6",
+    "cluster_stroke": "#6eaa49",
+}
+
+FONT_CANDIDATES = ("DejaVuSans.ttf", "Arial.ttf", "arial.ttf", "LiberationSans-Regular.ttf")
+
+_BREAK = re.compile(r"<br\s*/?>", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+
+_fonts: Dict[int, object] = {}
+
+
+def _font(size: int):
+    """Pillow font at ``size`` pixels (cached)."""
+    if size not in _fonts:
+        font = None
+        for name in FONT_CANDIDATES:
+            try:
+                font = ImageFont.truetype(name, size)
+                break
+            except OSError:
+                continue
+        if font is None:
+            try:
+                font = ImageFont.load_default(size=size)
+            except TypeError:
+                font = ImageFont.load_default()
+        _fonts[size] = font
+    return _fonts[size]
+
+
+def label_lines(text: str) -> List[str]:
+    """Split a node/edge label into display lines (``<br/>`` breaks, tags dropped)."""
+    text = text.replace("#quot;", '"')
+    lines = [html.unescape(_TAG.sub("", line)).strip() for line in _BREAK.split(text)]
+    return [line for line in lines if line] or [""]
+
+
+def text_width(line: str) -> float:
+    if PNG_BACKEND:
+        return _font(FONT_SIZE).getlength(line)
+    return len(line) * CHAR_WIDTH
+
+
+class _Box:
+    __slots__ = ("id", "x", "y", "w", "h", "shape", "lines", "dummy")
+
+    def __init__(self, node_id, w, h, shape="rect", lines=None, dummy=False):
+        self.id, self.w, self.h, self.shape = node_id, w, h, shape
+        self.lines, self.dummy = lines or [], dummy
+        self.x = self.y = 0.0
+
+
+class Layout:
+    """Positioned nodes, edge polylines and cluster boxes of one diagram."""
+
+    def __init__(self):
+        self.boxes: Dict[str, _Box] = {}
+        self.edges: List[Tuple[Edge, List[Tuple[float, float]]]] = []
+        self.clusters: List[Tuple[str, Tuple[float, float, float, float]]] = []
+        self.width = 0.0
+        self.height = 0.0
+
+
+def _node_box(node) -> _Box:
+    lines = label_lines(node.label if node.label is not None else node.id)
+    w = max(MIN_NODE_WIDTH, max(text_width(line) for line in lines) + 2 * PADDING_X)
+    h = len(lines) * LINE_HEIGHT + 2 * PADDING_Y
+    shape = node.shape
+    if shape == "diamond":
+        w, h = w * 1.5, h * 1.6
+    elif shape in ("circle", "double_circle"):
+        w = h = max(w, h)
+    elif shape == "hexagon":
+        w += h / 2
+    elif shape in ("parallelogram", "parallelogram_alt", "trapezoid", "trapezoid_alt", "flag"):
+        w += h / 2
+    elif shape == "cylinder":
+        h += 12
+    return _Box(node.id, w, h, shape, lines)
+
+
+def _endpoint(chart: Flowchart, node_id: str) -> str:
+    """Edges to a subgraph attach to its first member node."""
+    for subgraph in chart.subgraphs:
+        if subgraph.id == node_id:
+            if subgraph.node_ids:
+                return subgraph.node_ids[0]
+            for child in chart.subgraphs:
+                if child.parent == subgraph.id:
+                    return _endpoint(chart, child.id)
+    return node_id
+
+
+def _rank(node_ids: List[str], edges: List[Tuple[str, str]]) -> Tuple[Dict[str, int], set]:
+    """Longest-path layering; returns ranks and the edges reversed to break cycles."""
+    outgoing = {node_id: [] for node_id in node_ids}
+    for source, target in edges:
+        outgoing[source].append(target)
+
+    reversed_edges, state = set(), {}
+    for root in node_ids:
+        if root in state:
+            continue
+        stack = [(root, iter(outgoing[root]))]
+        state[root] = "open"
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if state.get(child) == "open":
+                    reversed_edges.add((node, child))
+                elif child not in state:
+                    state[child] = "open"
+                    stack.append((child, iter(outgoing[child])))
+                    break
+            else:
+                state[node] = "done"
+                stack.pop()
+
+    incoming = {node_id: 0 for node_id in node_ids}
+    dag = {node_id: [] for node_id in node_ids}
+    for source, target in edges:
+        if (source, target) in reversed_edges:
+            source, target = target, source
+        dag[source].append(target)
+        incoming[target] += 1
+
+    rank = {node_id: 0 for node_id in node_ids}
+    queue = [node_id for node_id in node_ids if incoming[node_id] == 0]
+    while queue:
+        node = queue.pop(0)
+        for child in dag[node]:
+            rank[child] = max(rank[child], rank[node] + 1)
+            incoming[child] -= 1
+            if incoming[child] == 0:
+                queue.append(child)
+    return rank, reversed_edges
+
+
+def _order_layers(layers: List[List[str]], up: Dict[str, List[str]], down: Dict[str, List[str]]):
+    """Barycenter sweeps, alternating downwards and upwards."""
+    for sweep in range(ORDERING_SWEEPS):
+        downward = sweep % 2 == 0
+        indices = range(1, len(layers)) if downward else range(len(layers) - 2, -1, -1)
+        for index in indices:
+            neighbour_layer = layers[index - 1] if downward else layers[index + 1]
+            position = {node: i for i, node in enumerate(neighbour_layer)}
+            neighbours = up if downward else down
+
+            def barycenter(item):
+                i, node = item
+                linked = [position[n] for n in neighbours[node] if n in position]
+                return sum(linked) / len(linked) if linked else i
+
+            layers[index] = [node for _, node in sorted(enumerate(layers[index]), key=barycenter)]
+
+
+def _place_layer(layer: List[str], desired: Dict[str, float], size: Dict[str, float]):
+    """Move nodes towards ``desired`` centres while keeping order and gaps."""
+    if not layer:
+        return {}
+    positions = []
+    for i, node in enumerate(layer):
+        position = desired[node]
+        if i:
+            previous = layer[i - 1]
+            position = max(position, positions[-1] + (size[previous] + size[node]) / 2 + NODE_GAP)
+        positions.append(position)
+    # Pushing only rightwards drifts the layer; re-centre it on the targets
+    shift = sum(desired[node] - p for node, p in zip(layer, positions)) / len(layer)
+    return {node: p + shift for node, p in zip(layer, positions)}
+
+
+def layout_flowchart(chart: Flowchart) -> Layout:
+    """
+    Compute node positions and edge routes for a parsed flowchart.
+
+    Args:
+        chart: Output of ``mermaid_lint.parse_flowchart``
+
+    Returns:
+        Layout: Coordinates in unscaled pixels
+    """
+    layout = Layout()
+    subgraph_ids = {subgraph.id for subgraph in chart.subgraphs}
+    for node in chart.nodes.values():
+        if node.id in subgraph_ids and node.label is None:
+            continue
+        layout.boxes[node.id] = _node_box(node)
+
+    edges = []
+    for edge in chart.edges:
+        source, target = _endpoint(chart, edge.source), _endpoint(chart, edge.target)
+        if source in layout.boxes and target in layout.boxes:
+            edges.append((edge, source, target))
+
+    node_ids = list(layout.boxes)
+    rank, reversed_edges = _rank(node_ids, [(s, t) for _, s, t in edges if s != t])
+
+    # Long edges get a dummy node on every layer they cross
+    up = {node_id: [] for node_id in node_ids}
+    down = {node_id: [] for node_id in node_ids}
+    chains = []
+    for index, (edge, source, target) in enumerate(edges):
+        if source == target:
+            chains.append((edge, [source]))
+            continue
+        flipped = (source, target) in reversed_edges
+        top, bottom = (target, source) if flipped else (source, target)
+        chain = [top]
+        for step in range(rank[top] + 1, rank[bottom]):
+            dummy = f"__dummy_{index}_{step}"
+            layout.boxes[dummy] = _Box(dummy, DUMMY_SIZE, DUMMY_SIZE, dummy=True)
+            rank[dummy] = step
+            up[dummy], down[dummy] = [], []
+            chain.append(dummy)
+        chain.append(bottom)
+        for upper, lower in zip(chain, chain[1:]):
+            down[upper].append(lower)
+            up[lower].append(upper)
+        chains.append((edge, chain[::-1] if flipped else chain))
+
+    layers: List[List[str]] = [[] for _ in range(max(rank.values(), default=0) + 1)]
+    for node_id in layout.boxes:
+        layers[rank[node_id]].append(node_id)
+    _order_layers(layers, up, down)
+
+    horizontal = chart.direction in ("LR", "RL")
+    # Extent of a box along the layer axis and across it
+    depth = {n: (b.w if horizontal else b.h) for n, b in layout.boxes.items()}
+    breadth = {n: (b.h if horizontal else b.w) for n, b in layout.boxes.items()}
+
+    across: Dict[str, float] = {}
+    for layer in layers:
+        across.update(_place_layer(layer, {n: 0.0 for n in layer}, breadth))
+    for sweep in range(PLACEMENT_SWEEPS):
+        neighbours = up if sweep % 2 == 0 else down
+        ordered = layers if sweep % 2 == 0 else layers[::-1]
+        for layer in ordered:
+            desired = {}
+            for node in layer:
+                linked = [across[n] for n in neighbours[node]]
+                desired[node] = sum(linked) / len(linked) if linked else across[node]
+            across.update(_place_layer(layer, desired, breadth))
+
+    along: Dict[str, float] = {}
+    offset = 0.0
+    for layer in layers:
+        thickness = max((depth[n] for n in layer), default=0)
+        for node in layer:
+            along[node] = offset + thickness / 2
+        offset += thickness + LAYER_GAP
+
+    total_along = offset - LAYER_GAP
+    for node_id, box in layout.boxes.items():
+        a = along[node_id]
+        if chart.direction in ("BT", "RL"):
+            a = total_along - a
+        box.x, box.y = (a, across[node_id]) if horizontal else (across[node_id], a)
+
+    _add_clusters(chart, layout)
+
+    # Shift everything into view
+    min_x = min([b.x - b.w / 2 for b in layout.boxes.values()] + [c[1][0] for c in layout.clusters])
+    min_y = min([b.y - b.h / 2 for b in layout.boxes.values()] + [c[1][1] for c in layout.clusters])
+    dx, dy = MARGIN - min_x, MARGIN - min_y
+    for box in layout.boxes.values():
+        box.x += dx
+        box.y += dy
+    layout.clusters = [(title, (x + dx, y + dy, w, h)) for title, (x, y, w, h) in layout.clusters]
+    layout.width = max([b.x + b.w / 2 for b in layout.boxes.values()] + [x + w for _, (x, _, w, _) in layout.clusters]) + MARGIN
+    layout.height = max([b.y + b.h / 2 for b in layout.boxes.values()] + [y + h for _, (_, y, _, h) in layout.clusters]) + MARGIN
+
+    for edge, chain in chains:
+        layout.edges.append((edge, _route(layout, chain)))
+    return layout
+
+
+def _add_clusters(chart: Flowchart, layout: Layout):
+    """Boxes around subgraph members, outermost first."""
+    members: Dict[str, List[str]] = {}
+
+    def collect(subgraph_id):
+        if subgraph_id not in members:
+            subgraph = next(s for s in chart.subgraphs if s.id == subgraph_id)
+            ids = [n for n in subgraph.node_ids if n in layout.boxes]
+            for child in chart.subgraphs:
+                if child.parent == subgraph_id:
+                    ids += collect(child.id)
+            members[subgraph_id] = ids
+        return members[subgraph_id]
+
+    def nesting(subgraph):
+        level, parent = 0, subgraph.parent
+        while parent:
+            level += 1
+            parent = next((s.parent for s in chart.subgraphs if s.id == parent), None)
+        return level
+
+    for subgraph in sorted(chart.subgraphs, key=nesting):
+        boxes = [layout.boxes[n] for n in collect(subgraph.id)]
+        if not boxes:
+            continue
+        pad = CLUSTER_PADDING * (1 + max(0, 2 - nesting(subgraph)) * 0.5)
+        x0 = min(b.x - b.w / 2 for b in boxes) - pad
+        y0 = min(b.y - b.h / 2 for b in boxes) - pad - LINE_HEIGHT
+        x1 = max(b.x + b.w / 2 for b in boxes) + pad
+        y1 = max(b.y + b.h / 2 for b in boxes) + pad
+        layout.clusters.append((subgraph.title or subgraph.id, (x0, y0, x1 - x0, y1 - y0)))
+
+
+def _clip(box: _Box, toward: Tuple[float, float]) -> Tuple[float, float]:
+    """Point where the segment from the box centre to ``toward`` leaves the box."""
+    dx, dy = toward[0] - box.x, toward[1] - box.y
+    if box.dummy or (dx == 0 and dy == 0):
+        return box.x, box.y
+    if box.shape == "diamond":
+        scale = 1 / (abs(dx) / (box.w / 2) + abs(dy) / (box.h / 2))
+    elif box.shape in ("circle", "double_circle"):
+        scale = (box.w / 2) / (dx * dx + dy * dy) ** 0.5
+    else:
+        scale = min(
+            (box.w / 2) / abs(dx) if dx else float("inf"),
+            (box.h / 2) / abs(dy) if dy else float("inf"),
+        )
+    return box.x + dx * scale, box.y + dy * scale
+
+
+def _route(layout: Layout, chain: List[str]) -> List[Tuple[float, float]]:
+    boxes = [layout.boxes[n] for n in chain]
+    if len(boxes) == 1:
+        # Self-loop on the right side of the node
+        box = boxes[0]
+        right, top = box.x + box.w / 2, box.y - box.h / 4
+        return [(right, top), (right + 24, top), (right + 24, box.y + box.h / 4), (right, box.y + box.h / 4)]
+    points = [(b.x, b.y) for b in boxes]
+    points[0] = _clip(boxes[0], points[1])
+    points[-1] = _clip(boxes[-1], points[-2])
+    return points
+
+
+def _shape_points(box: _Box) -> Optional[List[Tuple[float, float]]]:
+    """Polygon outline of ``box``, or None for shapes drawn as rounded rects/ellipses."""
+    x0, y0, x1, y1 = box.x - box.w / 2, box.y - box.h / 2, box.x + box.w / 2, box.y + box.h / 2
+    slant = box.h / 4
+    if box.shape == "diamond":
+        return [(box.x, y0), (x1, box.y), (box.x, y1), (x0, box.y)]
+    if box.shape == "hexagon":
+        return [(x0 + slant, y0), (x1 - slant, y0), (x1, box.y), (x1 - slant, y1), (x0 + slant, y1), (x0, box.y)]
+    if box.shape == "parallelogram":
+        return [(x0 + slant, y0), (x1, y0), (x1 - slant, y1), (x0, y1)]
+    if box.shape == "parallelogram_alt":
+        return [(x0, y0), (x1 - slant, y0), (x1, y1), (x0 + slant, y1)]
+    if box.shape == "trapezoid":
+        return [(x0 + slant, y0), (x1 - slant, y0), (x1, y1), (x0, y1)]
+    if box.shape == "trapezoid_alt":
+        return [(x0, y0), (x1, y0), (x1 - slant, y1), (x0 + slant, y1)]
+    if box.shape == "flag":
+        return [(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0 + slant, box.y)]
+    return None
+
+
+def _corner_radius(box: _Box) -> float:
+    return {"round": 8, "stadium": box.h / 2}.get(box.shape, 0)
+
+
+def _label_anchor(points: List[Tuple[float, float]]) -> Tuple[float, float]:
+    middle = len(points) // 2
+    (ax, ay), (bx, by) = points[middle - 1], points[middle]
+    return (ax + bx) / 2, (ay + by) / 2
+
+
+def _arrow_direction(points: List[Tuple[float, float]], at_end: bool = True) -> Tuple[float, float]:
+    (ax, ay), (bx, by) = (points[-2], points[-1]) if at_end else (points[1], points[0])
+    length = ((bx - ax) ** 2 + (by - ay) ** 2) ** 0.5 or 1
+    return (bx - ax) / length, (by - ay) / length
+
+
+def _arrowhead(tip, direction, size=9) -> List[Tuple[float, float]]:
+    (x, y), (ux, uy) = tip, direction
+    return [(x, y), (x - ux * size - uy * size / 2, y - uy * size + ux * size / 2),
+            (x - ux * size + uy * size / 2, y - uy * size - ux * size / 2)]
+
+
+# ---------- SVG ----------
+
+def render_svg(chart: Flowchart, layout: Optional[Layout] = None) -> str:
+    """Write a laid-out flowchart as a standalone SVG document."""
+    layout = layout or layout_flowchart(chart)
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{layout.width:.0f}" height="{layout.height:.0f}" '
+        f'viewBox="0 0 {layout.width:.1f} {layout.height:.1f}" font-family="DejaVu Sans, Arial, sans-serif" '
+        f'font-size="{FONT_SIZE}">',
+        f'<rect width="100%" height="100%" fill="{THEME["background"]}"/>',
+    ]
+    for title, (x, y, w, h) in layout.clusters:
+        out.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{w:.1f}" height="{h:.1f}" rx="4" '
+                   f'fill="{THEME["cluster_fill"]}" stroke="{THEME["cluster_stroke"]}"/>')
+        out.append(f'<text x="{x + w / 2:.1f}" y="{y + LINE_HEIGHT:.1f}" text-anchor="middle">{html.escape(title)}</text>')
+
+    for edge, points in layout.edges:
+        width = 3 if edge.line == "thick" else 1.5
+        dash = ' stroke-dasharray="4 4"' if edge.line == "dotted" else ""
+        path = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+        out.append(f'<polyline points="{path}" fill="none" stroke="{THEME["edge"]}" stroke-width="{width}"{dash}/>')
+        out.extend(_svg_head(edge.head, points[-1], _arrow_direction(points)))
+        if edge.bidirectional:
+            out.extend(_svg_head(edge.head, points[0], _arrow_direction(points, at_end=False)))
+        if edge.label:
+            out.extend(_svg_text_block(label_lines(edge.label), _label_anchor(points), THEME["label_fill"]))
+
+    for box in layout.boxes.values():
+        if box.dummy:
+            continue
+        out.extend(_svg_shape(box))
+        out.extend(_svg_text_block(box.lines, (box.x, box.y)))
+    out.append("</svg>")
+    return "\n".join(out)
+
+
+def _svg_head(head: str, tip, direction) -> List[str]:
+    if head == ">":
+        points = " ".join(f"{x:.1f},{y:.1f}" for x, y in _arrowhead(tip, direction))
+        return [f'<polygon points="{points}" fill="{THEME["edge"]}"/>']
+    if head == "o":
+        return [f'<circle cx="{tip[0]:.1f}" cy="{tip[1]:.1f}" r="4" fill="{THEME["background"]}" stroke="{THEME["edge"]}"/>']
+    if head == "x":
+        x, y = tip
+        return [f'<path d="M{x - 4:.1f},{y - 4:.1f} L{x + 4:.1f},{y + 4:.1f} M{x - 4:.1f},{y + 4:.1f} '
+                f'L{x + 4:.1f},{y - 4:.1f}" stroke="{THEME["edge"]}" stroke-width="2"/>']
+    return []
+
+
+def _svg_shape(box: _Box) -> List[str]:
+    style = f'fill="{THEME["node_fill"]}" stroke="{THEME["node_stroke"]}" stroke-width="1.5"'
+    x0, y0 = box.x - box.w / 2, box.y - box.h / 2
+    polygon = _shape_points(box)
+    if polygon:
+        return [f'<polygon points="{" ".join(f"{x:.1f},{y:.1f}" for x, y in polygon)}" {style}/>']
+    if box.shape in ("circle", "double_circle"):
+        shapes = [f'<circle cx="{box.x:.1f}" cy="{box.y:.1f}" r="{box.w / 2:.1f}" {style}/>']
+        if box.shape == "double_circle":
+            shapes.append(f'<circle cx="{box.x:.1f}" cy="{box.y:.1f}" r="{box.w / 2 - 4:.1f}" {style}/>')
+        return shapes
+    if box.shape == "cylinder":
+        rx, ry = box.w / 2, 6
+        return [
+            f'<path d="M{x0:.1f},{y0 + ry:.1f} a{rx:.1f},{ry} 0 0,0 {box.w:.1f},0 a{rx:.1f},{ry} 0 0,0 {-box.w:.1f},0 '
+            f'v{box.h - 2 * ry:.1f} a{rx:.1f},{ry} 0 0,0 {box.w:.1f},0 v{-(box.h - 2 * ry):.1f}" {style}/>'
+        ]
+    shapes = [f'<rect x="{x0:.1f}" y="{y0:.1f}" width="{box.w:.1f}" height="{box.h:.1f}" '
+              f'rx="{_corner_radius(box):.1f}" {style}/>']
+    if box.shape == "subroutine":
+        for x in (x0 + 8, x0 + box.w - 8):
+            shapes.append(f'<line x1="{x:.1f}" y1="{y0:.1f}" x2="{x:.1f}" y2="{y0 + box.h:.1f}" {style}/>')
+    return shapes
+
+
+def _svg_text_block(lines: List[str], center, background: Optional[str] = None) -> List[str]:
+    cx, cy = center
+    top = cy - len(lines) * LINE_HEIGHT / 2
+    out = []
+    if background:
+        w = max(text_width(line) for line in lines) + 8
+        out.append(f'<rect x="{cx - w / 2:.1f}" y="{top - 2:.1f}" width="{w:.1f}" '
+                   f'height="{len(lines) * LINE_HEIGHT + 4:.1f}" fill="{background}"/>')
+    for i, line in enumerate(lines):
+        y = top + (i + 0.5) * LINE_HEIGHT
+        out.append(f'<text x="{cx:.1f}" y="{y:.1f}" text-anchor="middle" dominant-baseline="central" '
+                   f'fill="{THEME["text"]}">{html.escape(line)}</text>')
+    return out
+
+
+# ---------- PNG ----------
+
+def render_png(chart: Flowchart, scale: float = RENDER_OPTIONS["scale"], layout: Optional[Layout] = None) -> bytes:
+    """
+    Paint a laid-out flowchart to PNG with Pillow.
+
+    Raises:
+        RendererUnavailable: If Pillow is not installed
+    """
+    if PNG_BACKEND is None:
+        raise RendererUnavailable("Pillow is not installed; the native renderer can only write SVG")
+    layout = layout or layout_flowchart(chart)
+
+    def s(value):
+        return value * scale
+
+    def pts(points):
+        return [(s(x), s(y)) for x, y in points]
+
+    image = Image.new("RGB", (int(s(layout.width)), int(s(layout.height))), THEME["background"])
+    draw = ImageDraw.Draw(image)
+    font = _font(int(FONT_SIZE * scale))
+
+    for title, (x, y, w, h) in layout.clusters:
+        draw.rounded_rectangle([s(x), s(y), s(x + w), s(y + h)], radius=s(4),
+                               fill=THEME["cluster_fill"], outline=THEME["cluster_stroke"], width=max(1, int(s(1))))
+        _png_text(draw, font, [title], (s(x + w / 2), s(y + LINE_HEIGHT * 0.75)), s(LINE_HEIGHT))
+
+    for edge, points in layout.edges:
+        width = max(1, int(s(3 if edge.line == "thick" else 1.5)))
+        if edge.line == "dotted":
+            _png_dashed(draw, pts(points), width, s(4))
+        else:
+            draw.line(pts(points), fill=THEME["edge"], width=width, joint="curve")
+        _png_head(draw, edge.head, pts(points)[-1], _arrow_direction(points), scale)
+        if edge.bidirectional:
+            _png_head(draw, edge.head, pts(points)[0], _arrow_direction(points, at_end=False), scale)
+        if edge.label:
+            lines = label_lines(edge.label)
+            cx, cy = _label_anchor(points)
+            w = max(text_width(line) for line in lines) + 8
+            h = len(lines) * LINE_HEIGHT + 4
+            draw.rectangle([s(cx - w / 2), s(cy - h / 2), s(cx + w / 2), s(cy + h / 2)], fill=THEME["label_fill"])
+            _png_text(draw, font, lines, (s(cx), s(cy)), s(LINE_HEIGHT))
+
+    outline = {"fill": THEME["node_fill"], "outline": THEME["node_stroke"], "width": max(1, int(s(1.5)))}
+    for box in layout.boxes.values():
+        if box.dummy:
+            continue
+        x0, y0, x1, y1 = s(box.x - box.w / 2), s(box.y - box.h / 2), s(box.x + box.w / 2), s(box.y + box.h / 2)
+        polygon = _shape_points(box)
+        if polygon:
+            draw.polygon(pts(polygon), **outline)
+        elif box.shape in ("circle", "double_circle"):
+            draw.ellipse([x0, y0, x1, y1], **outline)
+            if box.shape == "double_circle":
+                draw.ellipse([x0 + s(4), y0 + s(4), x1 - s(4), y1 - s(4)], **outline)
+        elif box.shape == "cylinder":
+            ry = s(6)
+            draw.rectangle([x0, y0 + ry, x1, y1 - ry], fill=THEME["node_fill"])
+            draw.ellipse([x0, y1 - 2 * ry, x1, y1], **outline)
+            draw.rectangle([x0 + outline["width"], y1 - 2 * ry, x1 - outline["width"], y1 - ry], fill=THEME["node_fill"])
+            draw.line([(x0, y0 + ry), (x0, y1 - ry)], fill=THEME["node_stroke"], width=outline["width"])
+            draw.line([(x1, y0 + ry), (x1, y1 - ry)], fill=THEME["node_stroke"], width=outline["width"])
+            draw.ellipse([x0, y0, x1, y0 + 2 * ry], **outline)
+        else:
+            draw.rounded_rectangle([x0, y0, x1, y1], radius=s(_corner_radius(box)), **outline)
+            if box.shape == "subroutine":
+                for x in (x0 + s(8), x1 - s(8)):
+                    draw.line([(x, y0), (x, y1)], fill=THEME["node_stroke"], width=outline["width"])
+        _png_text(draw, font, box.lines, (s(box.x), s(box.y)), s(LINE_HEIGHT))
+
+    buffer = io.BytesIO()
+    # Fast compression; size is optimised separately
+    image.save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def _png_text(draw, font, lines, center, line_height):
+    cx, cy = center
+    top = cy - len(lines) * line_height / 2
+    for i, line in enumerate(lines):
+        draw.text((cx, top + (i + 0.5) * line_height), line, fill=THEME["text"], font=font, anchor="mm")
+
+
+def _png_dashed(draw, points, width, dash):
+    for (ax, ay), (bx, by) in zip(points, points[1:]):
+        length = ((bx - ax) ** 2 + (by - ay) ** 2) ** 0.5
+        steps = max(1, int(length // dash))
+        for i in range(0, steps, 2):
+            t0, t1 = i / steps, min(1, (i + 1) / steps)
+            draw.line([(ax + (bx - ax) * t0, ay + (by - ay) * t0), (ax + (bx - ax) * t1, ay + (by - ay) * t1)],
+                      fill=THEME["edge"], width=width)
+
+
+def _png_head(draw, head, tip, direction, scale):
+    if head == ">":
+        draw.polygon(_arrowhead(tip, direction, 9 * scale), fill=THEME["edge"])
+    elif head == "o":
+        r = 4 * scale
+        draw.ellipse([tip[0] - r, tip[1] - r, tip[0] + r, tip[1] + r], fill=THEME["background"], outline=THEME["edge"])
+    elif head == "x":
+        r = 4 * scale
+        x, y = tip
+        draw.line([(x - r, y - r), (x + r, y + r)], fill=THEME["edge"], width=max(1, int(2 * scale)))
+        draw.line([(x - r, y + r), (x + r, y - r)], fill=THEME["edge"], width=max(1, int(2 * scale)))
+
+
+def render_flowchart(mermaid_code: str, output_format: str = "png") -> bytes:
+    """
+    Render mermaid flowchart source to image bytes without a browser.
+
+    Args:
+        mermaid_code: Flowchart/graph source
+        output_format: "png" or "svg"
+
+    Returns:
+        bytes: Rendered image
+
+    Raises:
+        MermaidSyntaxError: If the source is not a usable flowchart
+        RendererUnavailable: If PNG is requested and Pillow is not installed
+    """
+    chart = parse_flowchart(mermaid_code)
+    layout = layout_flowchart(chart)
+    if output_format == "svg":
+        return render_svg(chart, layout).encode("utf-8")
+    return render_png(chart, layout=layout)
@@ -1,8 +1,25 @@
 from google.genai import types
 from google.adk.runners import Runner
+from google.adk.events import Event, EventActions
 from google.adk.agents import SequentialAgent , ParallelAgent
-import json , shutil , re , subprocess
+import shutil , subprocess , os , time , asyncio , signal
 from pathlib import Path
+from .json_repair import repair_json, JSON_BACKEND
+from .mermaid_lint import lint_mermaid
+from .diagram_cache import diagram_cache
+from .flowchart_renderer import render_flowchart
+from .image_optimizer import optimize_rendered_png
+from .mermaid_renderer import (DIAGRAM_FORMAT, DIAGRAM_RENDERER, RENDER_OPTIONS, SVG_CONFIG_FILE,
+                               renderer_pool, RenderError, RendererUnavailable)
+
+
+# Global limit on concurrent diagram renders, shared by all requests
+RENDER_CONCURRENCY = int(os.getenv("SRS_RENDER_CONCURRENCY", str(os.cpu_count() or 1)))
+_render_slots = asyncio.Semaphore(RENDER_CONCURRENCY)
+# Render with the in-process flowchart renderer when the browser renderer fails
+NATIVE_FALLBACK = os.getenv("SRS_NATIVE_FALLBACK", "true").lower() == "true"
+# Diagrams are embedded from memory; set to also keep them under generated_images/
+PERSIST_DIAGRAMS = os.getenv("SRS_PERSIST_DIAGRAMS", "false").lower() == "true"
 
 
 
@@ -82,33 +99,25 @@ async def generated_response(runner, user_id, session_id, prompt):
     return response
 
 
-def clean_and_parse_json(raw_response):
+def clean_and_parse_json(raw_response, section_name: str = "section"):
+    """
+    Parse an agent's section output into a dict, repairing malformed JSON.
+
+    Every repair applied is reported so drifting prompts can be spotted.
+    Returns None only when nothing parseable could be recovered.
+    """
     if isinstance(raw_response, dict):
         return raw_response
     
     if not isinstance(raw_response, str):
         return None
 
-    cleaned = raw_response.strip()
-    
-    # 1. Remove Markdown Code Blocks
-    if cleaned.startswith("```"):
-        lines = cleaned.splitlines()
-        if lines and lines[0].startswith("```"):
-            lines = lines[1:]
-        if lines and lines[-1].strip().startswith("```"):
-            lines = lines[:-1]
-        cleaned = "\n".join(lines).strip()
-    
-    try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
-        try:
-            cleaned = re.sub(r"[\x00-\x1F\x7F]", " ", cleaned) 
-            return json.loads(cleaned)
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse JSON string: {e}")
-            return None
+    parsed, repairs = repair_json(raw_response)
+    if repairs:
+        print(f"🔧 Repaired {section_name} JSON ({JSON_BACKEND}): {', '.join(repairs)}")
+    if parsed is None:
+        print(f"Failed to parse JSON string for {section_name}")
+    return parsed
 
 
 async def get_session(session_service_stateful ,app_name , user_id , session_id):
@@ -118,67 +127,31 @@ async def get_session(session_service_stateful ,app_name , user_id , session_id)
         user_id=user_id,
         session_id=session_id
     )
-    
-
-
-
-def sanitize_mermaid_output(text: str) -> str | None:
-    if not text or not isinstance(text, str):
-        return None
 
-    lowered = text.lower()
 
-    refusal_markers = [
-        "i can't help",
-        "i cannot help",
-        "sorry",
-        "unable to",
-        "as an ai",
-        "cannot generate"
-    ]
-    if any(marker in lowered for marker in refusal_markers):
-        return None
-
-    # Remove markdown fences
-    text = text.strip()
-    text = re.sub(r"^```[a-zA-Z]*", "", text)
-    text = re.sub(r"```$", "", text)
-
-    lines = text.splitlines()
-    cleaned_lines = []
+async def update_session_state(session_service_stateful, session, state_delta: dict):
+    """Write values into the session state (e.g. sections merged between stages)"""
+    await session_service_stateful.append_event(
+        session,
+        Event(author="system", actions=EventActions(state_delta=state_delta))
+    )
+    
 
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
 
-        # Normalize labeled arrows
-        line = re.sub(
-            r"(.*?)-->\s*\|\s*(.*?)\s*\|\s*(.*)",
-            r"\1-->| \2 | \3",
-            line
-        )
 
-        # Normalize arrow variants
-        line = re.sub(r"-{3,}>", "-->", line)
-        line = re.sub(r"<-{3,}", "<--", line)
-        line = re.sub(r"==>", "-->", line)
+FALLBACK_DIAGRAM = "flowchart LR\n    NA[No Interface Defined]"
 
-        cleaned_lines.append(line)
 
-    if not cleaned_lines:
+def sanitize_mermaid_output(text: str) -> str | None:
+    if not text or not isinstance(text, str):
         return None
 
-    first = cleaned_lines[0]
-    valid_headers = (
-        "flowchart", "graph", "erDiagram",
-        "sequenceDiagram", "stateDiagram", "classDiagram"
-    )
-
-    if not first.startswith(valid_headers):
-        cleaned_lines.insert(0, "flowchart LR")
-
-    return "\n".join(cleaned_lines)
+    # Parse, auto-fix and canonicalise. Refusals and other prose do not
+    # parse as flowchart statements, so they are rejected here as well.
+    result = lint_mermaid(text)
+    if result.issues:
+        print(f"🩹 Mermaid lint: {'; '.join(result.issues)}")
+    return result.code if result.ok else None
 
 
 
@@ -209,7 +182,7 @@ def clean_interface_diagrams(external_interfaces: dict) -> dict:
                 external_interfaces[key]["interface_diagram"]["code"] = cleaned_code
             else:
                 # Optional: Provide a minimal valid fallback if sanitization returns None
-                external_interfaces[key]["interface_diagram"]["code"] = "flowchart LR\n    N/A[No Interface Defined]"
+                external_interfaces[key]["interface_diagram"]["code"] = FALLBACK_DIAGRAM
         
         except (KeyError, TypeError):
             # Skip if the specific interface section is missing from the input
@@ -218,39 +191,217 @@ def clean_interface_diagrams(external_interfaces: dict) -> dict:
     return external_interfaces
 
 
-def render_mermaid_png(mermaid_code: str, output_png: Path):
+def _finish_render(mermaid_code: str, image: bytes, output_format: str, name: str, cache: bool = True) -> bytes:
+    """Optimises a fresh PNG render for the document, then adds it to the render cache."""
+    if output_format == "png":
+        image = optimize_rendered_png(image, name)
+    if cache:
+        diagram_cache.put(mermaid_code, image, output_format)
+    return image
+
+
+def _render_native(mermaid_code: str, output_format: str, name: str) -> bytes:
+    """Renders a flowchart to PNG or SVG in-process (no browser)."""
+    image = render_flowchart(mermaid_code, output_format)
+    print(f"✅ Diagram rendered natively: {name}")
+    return image
+
+
+def _mmdc_command(output_format: str) -> list:
     """
-    Renders Mermaid code into a PNG file using mmdc (npm).
+    Build the mmdc command line: source is read from stdin and the image
+    written to stdout. The executable comes from MMDC_PATH or the PATH
+    (which also finds mmdc.cmd on Windows).
     """
-    # Check if mmdc is available
-    if not shutil.which("mmdc"):
+    mmdc = os.getenv("MMDC_PATH") or shutil.which("mmdc")
+    if not mmdc:
         raise FileNotFoundError(
             "mmdc command not found. Please install it using: npm install -g @mermaid-js/mermaid-cli"
         )
-    
-    output_png.parent.mkdir(parents=True, exist_ok=True)
-    mmd_path = output_png.with_suffix(".mmd")
+    cmd = [
+        mmdc,
+        "-i", "-",
+        "-o", "-",
+        "-e", output_format,
+        "-q",
+        "-w", str(RENDER_OPTIONS["width"]),
+        "-H", str(RENDER_OPTIONS["height"]),
+        "-t", RENDER_OPTIONS["theme"],
+        "-b", RENDER_OPTIONS["background"],
+        "-s", str(RENDER_OPTIONS["scale"])
+    ]
+    if output_format == "svg":
+        cmd += ["-c", str(SVG_CONFIG_FILE)]
+    return cmd
 
-    with open(mmd_path, "w", encoding="utf-8") as f:
-        f.write(mermaid_code)
 
-    css_path = Path("srs_engine/static/custom-diagram.css")
+def _kill_process_tree(pid: int):
+    """Kill a process and its children (mmdc leaves a headless browser behind otherwise)."""
+    try:
+        if os.name == "posix":
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True)
+    except (ProcessLookupError, OSError):
+        pass
+
+
+async def _render_with_mmdc_async(mermaid_code: str, output_format: str, name: str) -> bytes:
+    """
+    Renders Mermaid code using mmdc (npm) as an async subprocess, without
+    temporary files; the mmdc process is killed when the awaiting task is
+    cancelled or times out.
+    """
+    cmd = _mmdc_command(output_format)
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        # Own process group so the browser mmdc launches can be killed with it
+        start_new_session=(os.name == "posix")
+    )
+    try:
+        image, stderr = await process.communicate(mermaid_code.encode("utf-8"))
+    except BaseException:
+        _kill_process_tree(process.pid)
+        await process.wait()
+        print(f"⏱️ mmdc killed: {name}")
+        raise
+    if process.returncode != 0:
+        stderr = stderr.decode("utf-8", errors="replace")
+        print(f"❌ mmdc error: {stderr}")
+        raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    if not image:
+        raise RenderError("mmdc wrote no image")
+    print(f"✅ Mermaid diagram rendered: {name}")
+    return image
+
+
+async def render_mermaid_image_async(mermaid_code: str, output_format: str = "png", timeout: float | None = None,
+                                     name: str = "diagram") -> bytes:
+    """
+    Renders Mermaid code to PNG or SVG bytes in memory, without blocking the
+    event loop. Uses the warm renderer pool and falls back to mmdc (npm) when
+    the pool cannot run here (SRS_DIAGRAM_RENDERER=mmdc|native picks one
+    directly). Pool and native renders run in a worker thread and mmdc as an
+    async subprocess; the cache lookup and the native fallback on any failure
+    are done by ``_render_image``.
+    """
+    if DIAGRAM_RENDERER == "native":
+        image = await asyncio.to_thread(_render_native, mermaid_code, output_format, name)
+        return await asyncio.to_thread(_finish_render, mermaid_code, image, output_format, name)
+
+    image = None
+    if DIAGRAM_RENDERER == "pool":
+        try:
+            image = await asyncio.to_thread(renderer_pool.render, mermaid_code, output_format, timeout)
+            print(f"✅ Mermaid diagram rendered: {name}")
+        except RendererUnavailable as e:
+            print(f"⚠️ Mermaid renderer pool unavailable ({e}), falling back to mmdc")
+
+    if image is None:
+        image = await _render_with_mmdc_async(mermaid_code, output_format, name)
+    return await asyncio.to_thread(_finish_render, mermaid_code, image, output_format, name)
 
-    cmd = [
-        "C:\\Users\\Smit\\AppData\\Roaming\\npm\\mmdc.CMD",
-        "-i", str(mmd_path),
-        "-o", str(output_png),
-        "-w", "2400",
-        "-H", "1600",
-        "-t", "forest",
-        "-b", "white",
-        "-s", "2"
-    ]
 
+async def _render_limited(mermaid_code: str, output_format: str, timeout: float | None, name: str) -> bytes:
+    async with _render_slots:
+        return await render_mermaid_image_async(mermaid_code, output_format, timeout, name)
 
+
+async def _render_image(mermaid_code: str, output_format: str, timeout: float | None, name: str) -> tuple:
+    """
+    Render one image of a diagram, from the cache if possible.
+
+    Returns:
+        tuple: (image bytes or None, error or None, served from cache)
+    """
+    # Cache hits skip the render slot entirely
+    cached = await asyncio.to_thread(diagram_cache.get, mermaid_code, output_format)
+    if cached:
+        return cached, None, True
     try:
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
-        print(f"✅ Mermaid diagram saved: {output_png}")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ mmdc error: {e.stderr}")
-        raise
\ No newline at end of file
+        # The slot is acquired inside the timeout so queueing counts against it
+        image = await asyncio.wait_for(_render_limited(mermaid_code, output_format, timeout, name), timeout)
+        return image, None, False
+    except asyncio.TimeoutError as e:
+        error = str(e) or f"timed out after {timeout:.1f}s"
+    except Exception as e:
+        error = (getattr(e, "stderr", None) or str(e) or type(e).__name__).strip()
+
+    # A slow, missing or failing browser renderer still yields a diagram
+    if NATIVE_FALLBACK and DIAGRAM_RENDERER != "native":
+        try:
+            image = await asyncio.to_thread(_render_native, mermaid_code, output_format, name)
+            image = await asyncio.to_thread(_finish_render, mermaid_code, image, output_format, name, False)
+            print(f"🩹 Native fallback used for {name}: {error}")
+            return image, None, False
+        except Exception as e:
+            print(f"❌ Native fallback failed for {name}: {e}")
+    return None, error, False
+
+
+async def _render_one(mermaid_code: str, timeout: float | None, name: str) -> dict:
+    started = time.monotonic()
+    formats = ["png", "svg"] if DIAGRAM_FORMAT == "svg" else ["png"]
+    outcomes = dict(zip(formats, await asyncio.gather(*(
+        _render_image(mermaid_code, output_format, timeout, f"{name}.{output_format}") for output_format in formats
+    ))))
+
+    png, error, _ = outcomes["png"]
+    svg, svg_error, _ = outcomes.get("svg", (None, None, True))
+    if png and svg_error:
+        print(f"⚠️ {name}.svg not rendered, embedding the PNG only: {svg_error}")
+    return {
+        "png": png,
+        # The PNG is the fallback inside the document, so an SVG alone is not used
+        "svg": svg if png else None,
+        "error": error,
+        "seconds": round(time.monotonic() - started, 3),
+        "cached": all(cached for _, _, cached in outcomes.values()),
+    }
+
+
+async def render_mermaid_diagrams(diagrams: dict, timeout: float | None = None) -> dict:
+    """
+    Render several Mermaid diagrams concurrently without blocking the event loop.
+
+    At most RENDER_CONCURRENCY renders run at once across all requests. A
+    failed diagram does not stop the others. Images stay in memory; with
+    SRS_DIAGRAM_FORMAT=svg each diagram is also rendered as SVG next to its
+    (fallback) PNG.
+
+    Args:
+        diagrams: key -> mermaid_code
+        timeout: Seconds each diagram may take, including time spent queueing
+
+    Returns:
+        dict: key -> {"png": bytes or None, "svg": bytes or None, "error": str or None,
+                      "seconds": float, "cached": bool}
+    """
+    results = await asyncio.gather(*(
+        _render_one(code, timeout, key)
+        for key, code in diagrams.items()
+    ))
+    return dict(zip(diagrams.keys(), results))
+
+
+def persist_diagrams(render_results: dict, directory: Path, prefix: str) -> dict:
+    """
+    Write rendered diagrams to disk as ``<prefix>_<key>_diagram.<format>``.
+
+    Args:
+        render_results: Output of ``render_mermaid_diagrams``
+        directory: Folder to write to
+        prefix: File name prefix (the project name)
+
+    Returns:
+        dict: key -> {format: Path} of the files written
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    written = {}
+    for key, result in render_results.items():
+        for output_format in ("png", "svg"):
+            if result.get(output_format):
+                path = directory / f"{prefix}_{key}_diagram.{output_format}"
+                path.write_bytes(result[output_format])
+                written.setdefault(key, {})[output_format] = path
+    return written
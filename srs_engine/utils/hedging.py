@@ -0,0 +1,148 @@
+"""
+Request Hedging Utility
+
+Cuts the tail latency of a ParallelAgent stage. When an LLM call has not
+finished by a percentile of its historical latency, a duplicate request is
+sent (optionally to a backup model); whichever usable result arrives first
+wins and the other call is cancelled. Hedged requests draw from a rolling
+token budget so hedging can never eat the provider's TPM quota.
+"""
+
+import asyncio
+import os
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from .token_budget import RATE_WINDOW_SECONDS, TPM_LIMIT
+
+
+HEDGING_ENABLED = os.getenv("SRS_HEDGING", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("SRS_HEDGE_PERCENTILE", "90"))
+HEDGE_MIN_SAMPLES = int(os.getenv("SRS_HEDGE_MIN_SAMPLES", "5"))
+# Delay used until enough latency history exists for a call type
+HEDGE_DEFAULT_DELAY = float(os.getenv("SRS_HEDGE_DEFAULT_DELAY", "30"))
+HEDGE_BACKUP_MODEL = os.getenv("SRS_HEDGE_BACKUP_MODEL") or None
+HEDGE_TOKENS_PER_MINUTE = int(os.getenv("SRS_HEDGE_TOKENS_PER_MINUTE", str(TPM_LIMIT // 10)))
+
+HISTORY_SIZE = 50
+DEFAULT_OUTPUT_TOKENS = 1000
+
+
+class LatencyTracker:
+    """Recent latencies and output sizes per call type (e.g. output schema)."""
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self.latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=history_size))
+        self.output_tokens: Dict[str, Deque[int]] = defaultdict(lambda: deque(maxlen=history_size))
+
+    def record(self, key: str, seconds: float, output_tokens: Optional[int] = None):
+        self.latencies[key].append(seconds)
+        if output_tokens:
+            self.output_tokens[key].append(output_tokens)
+
+    def percentile(self, key: str, percentile: float) -> Optional[float]:
+        """Latency percentile for ``key`` (None without enough samples)."""
+        samples = sorted(self.latencies.get(key, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        rank = (len(samples) - 1) * percentile / 100
+        low = int(rank)
+        high = min(low + 1, len(samples) - 1)
+        return samples[low] + (samples[high] - samples[low]) * (rank - low)
+
+    def typical_output_tokens(self, key: str) -> int:
+        samples = sorted(self.output_tokens.get(key, ()))
+        return samples[len(samples) // 2] if samples else DEFAULT_OUTPUT_TOKENS
+
+
+class HedgeBudget:
+    """Rolling tokens-per-minute allowance for duplicate requests."""
+
+    def __init__(self, tokens_per_minute: int = HEDGE_TOKENS_PER_MINUTE):
+        self.tokens_per_minute = tokens_per_minute
+        self.spent: Deque[tuple] = deque()
+
+    def try_spend(self, tokens: int) -> bool:
+        """Reserve ``tokens`` for a hedge; False when the window is exhausted."""
+        now = time.monotonic()
+        while self.spent and now - self.spent[0][0] > RATE_WINDOW_SECONDS:
+            self.spent.popleft()
+        used = sum(amount for _, amount in self.spent)
+        if used + tokens > self.tokens_per_minute:
+            return False
+        self.spent.append((now, tokens))
+        return True
+
+
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget()
+
+
+def hedge_delay(key: str) -> float:
+    """Seconds to wait for the primary call before hedging."""
+    threshold = latency_tracker.percentile(key, HEDGE_PERCENTILE)
+    return HEDGE_DEFAULT_DELAY if threshold is None else threshold
+
+
+async def _cancel(task: asyncio.Task):
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+
+
+async def hedged_call(
+    key: str,
+    call: Callable[[Optional[str]], Awaitable[Any]],
+    input_tokens: int,
+    usable: Callable[[Any], bool] = lambda result: result is not None,
+    output_tokens: Callable[[Any], Optional[int]] = lambda result: None,
+) -> Any:
+    """
+    Run ``call``, hedging it with a duplicate when it is slow.
+
+    Args:
+        key: Call type used for latency history (e.g. output schema name)
+        call: Factory taking an optional model override and returning the call
+        input_tokens: Prompt size, used to cost the hedge against the budget
+        usable: Whether a result is good enough to win the race
+        output_tokens: Extracts the output token count from a result
+
+    Returns:
+        Any: The first usable result (or the last result if none is usable)
+    """
+    started = time.monotonic()
+    primary = asyncio.create_task(call(None))
+    pending = {primary}
+    result, error = None, None
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_delay(key))
+        if not done:
+            cost = input_tokens + latency_tracker.typical_output_tokens(key)
+            if hedge_budget.try_spend(cost):
+                print(f"🪁 {key}: no response after {time.monotonic() - started:.1f}s, "
+                      f"hedging to {HEDGE_BACKUP_MODEL or 'the same model'}")
+                pending.add(asyncio.create_task(call(HEDGE_BACKUP_MODEL)))
+            else:
+                print(f"⏳ {key}: hedge skipped, hedge token budget exhausted")
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer the primary when both finish together
+            for task in sorted(done, key=lambda t: t is not primary):
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                result = task.result()
+                if usable(result):
+                    # Latency as seen by the caller, so hedged calls keep the tail in the history
+                    latency_tracker.record(key, time.monotonic() - started, output_tokens(result))
+                    return result
+        if error is not None and result is None:
+            raise error
+        return result
+    finally:
+        for task in pending:
+            await _cancel(task)
@@ -0,0 +1,121 @@
+"""
+Diagram Image Optimizer
+
+Diagrams are rendered at 2400x1600 with scale 2 but shown 6 inches wide in
+the SRS document, so the raw PNGs carry several times the pixels Word can
+display. After a render the image is flattened onto white, cropped to its
+content, downsampled to ``EMBED_DPI`` at the embed width and quantised to
+a palette before being recompressed. Flowcharts are flat colours and
+antialiased text, so a 256-colour palette is visually lossless.
+"""
+
+import io
+import os
+
+try:
+    from PIL import Image, ImageChops
+    IMAGE_BACKEND = "pillow"
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = ImageChops = None
+    IMAGE_BACKEND = None
+
+
+IMAGE_OPTIMIZE = os.getenv("SRS_IMAGE_OPTIMIZE", "true").lower() == "true"
+# Width diagrams are shown at in the document (see add_external_interfaces_section)
+EMBED_WIDTH_INCHES = 6.0
+EMBED_DPI = int(os.getenv("SRS_IMAGE_DPI", "200"))
+PALETTE_COLORS = int(os.getenv("SRS_IMAGE_COLORS", "256"))
+# Whitespace kept around the cropped content, in source pixels
+CROP_MARGIN = 24
+# Channel difference from the background still counted as background
+CROP_TOLERANCE = 8
+
+# Part of the diagram cache key: changing any of these changes the stored bytes
+OPTIMIZE_OPTIONS = {
+    "enabled": IMAGE_OPTIMIZE and IMAGE_BACKEND is not None,
+    "width_inches": EMBED_WIDTH_INCHES,
+    "dpi": EMBED_DPI,
+    "colors": PALETTE_COLORS,
+}
+
+
+def _flatten(image: "Image.Image") -> "Image.Image":
+    """Composite transparency onto white and return an RGB image."""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGBA", image.size, "white")
+        return Image.alpha_composite(background, image).convert("RGB")
+    return image.convert("RGB")
+
+
+def _crop(image: "Image.Image") -> "Image.Image":
+    """Trim the uniform border (the colour of the top-left pixel) down to CROP_MARGIN."""
+    background = Image.new("RGB", image.size, image.getpixel((0, 0)))
+    difference = ImageChops.difference(image, background).convert("L")
+    bbox = difference.point(lambda value: 255 if value > CROP_TOLERANCE else 0).getbbox()
+    if not bbox:
+        return image
+    left, top, right, bottom = bbox
+    return image.crop((
+        max(0, left - CROP_MARGIN),
+        max(0, top - CROP_MARGIN),
+        min(image.width, right + CROP_MARGIN),
+        min(image.height, bottom + CROP_MARGIN),
+    ))
+
+
+def optimize_png(
+    data: bytes,
+    width_inches: float = EMBED_WIDTH_INCHES,
+    dpi: int = EMBED_DPI,
+    colors: int = PALETTE_COLORS,
+) -> bytes:
+    """
+    Shrink a rendered diagram to what the document can display.
+
+    Args:
+        data: PNG bytes from the renderer
+        width_inches: Width the image is embedded at
+        dpi: Target resolution at that width
+        colors: Palette size (0 keeps full colour)
+
+    Returns:
+        bytes: Optimised PNG, or ``data`` unchanged if it was already smaller
+    """
+    if IMAGE_BACKEND is None:
+        return data
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = _crop(_flatten(source))
+
+    max_width = round(width_inches * dpi)
+    if image.width > max_width:
+        height = max(1, round(image.height * max_width / image.width))
+        image = image.resize((max_width, height), Image.LANCZOS)
+
+    if colors:
+        image = image.quantize(colors, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", optimize=True, dpi=(dpi, dpi))
+    optimized = buffer.getvalue()
+    return optimized if len(optimized) < len(data) else data
+
+
+def optimize_rendered_png(data: bytes, name: str) -> bytes:
+    """
+    Optimise a fresh render when enabled and report the saving.
+
+    Args:
+        data: PNG bytes from the renderer
+        name: Diagram name used in the report
+
+    Returns:
+        bytes: The image to embed
+    """
+    if not OPTIMIZE_OPTIONS["enabled"]:
+        return data
+    optimized = optimize_png(data)
+    before, after = len(data), len(optimized)
+    print(f"🗜️ {name}: {before / 1024:.0f} KB → {after / 1024:.0f} KB ({1 - after / max(before, 1):.0%} smaller)")
+    return optimized
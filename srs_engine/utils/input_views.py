@@ -0,0 +1,131 @@
+"""
+Per-Agent Input Views
+
+Declares which parts of the SRSRequest each agent actually reads, so that
+``{user_inputs}`` is rendered with only the relevant subset instead of the
+full ``srs_data.dict()``.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Union
+
+
+ALL_FIELDS = "*"
+
+# agent name -> {SRSRequest group -> list of fields, or ALL_FIELDS}
+# Agents without an entry receive the full user_inputs.
+AGENT_INPUT_VIEWS: Dict[str, Dict[str, Union[str, List[str]]]] = {
+    "introduction_agent": {
+        "project_identity": ["project_name", "problem_statement", "target_users"],
+        "system_context": ALL_FIELDS,
+        "functional_scope": ["core_features"],
+        "security_and_compliance": ["compliance_requirements"],
+        # Only the stack shows up in the references
+        "technical_preferences": ["preferred_backend", "database_preference"],
+        "output_control": ["srs_detail_level"],
+    },
+    "overall_description_agent": {
+        "project_identity": ["project_name", "problem_statement", "target_users"],
+        "system_context": ALL_FIELDS,
+        "functional_scope": ALL_FIELDS,
+        "security_and_compliance": ["compliance_requirements"],
+        "technical_preferences": ALL_FIELDS,
+        "output_control": ALL_FIELDS,
+    },
+    "system_features_agent": {
+        "project_identity": ["project_name", "problem_statement", "target_users"],
+        "system_context": ALL_FIELDS,
+        "functional_scope": ALL_FIELDS,
+        "technical_preferences": ["preferred_backend", "database_preference"],
+        "output_control": ALL_FIELDS,
+    },
+    "external_interfaces_agent": {
+        "project_identity": ["project_name", "problem_statement", "target_users"],
+        "system_context": ALL_FIELDS,
+        "functional_scope": ALL_FIELDS,
+        "security_and_compliance": ["authentication_required"],
+        "technical_preferences": ALL_FIELDS,
+    },
+    # External interface sub-agents (the merged section re-asks with the view above)
+    "user_interfaces_agent": {
+        "project_identity": ["project_name", "problem_statement", "target_users"],
+        "system_context": ALL_FIELDS,
+        "functional_scope": ALL_FIELDS,
+        "security_and_compliance": ["authentication_required"],
+    },
+    "hardware_interfaces_agent": {
+        "project_identity": ["project_name", "problem_statement"],
+        "system_context": ALL_FIELDS,
+        "functional_scope": ["core_features"],
+        "technical_preferences": ["deployment_preference"],
+    },
+    "software_interfaces_agent": {
+        "project_identity": ["project_name", "problem_statement"],
+        "system_context": ALL_FIELDS,
+        "functional_scope": ["core_features"],
+        "security_and_compliance": ["authentication_required"],
+        "technical_preferences": ALL_FIELDS,
+    },
+    "communication_interfaces_agent": {
+        "project_identity": ["project_name", "target_users"],
+        "system_context": ALL_FIELDS,
+        "functional_scope": ["core_features"],
+        "security_and_compliance": ["authentication_required", "sensitive_data_handling"],
+        "technical_preferences": ALL_FIELDS,
+    },
+    "nfr_agent": {
+        "project_identity": ["project_name", "target_users"],
+        "system_context": ALL_FIELDS,
+        "non_functional_requirements": ALL_FIELDS,
+        "security_and_compliance": ALL_FIELDS,
+        "technical_preferences": ["deployment_preference", "database_preference"],
+        "output_control": ALL_FIELDS,
+    },
+    # Stage-two agents already receive every generated section.
+    "glossary_agent": {
+        "project_identity": ["project_name"],
+        "system_context": ALL_FIELDS,
+    },
+    "assumptions_agent": {
+        "project_identity": ["project_name", "problem_statement"],
+        "system_context": ALL_FIELDS,
+        "non_functional_requirements": ALL_FIELDS,
+        "technical_preferences": ALL_FIELDS,
+    },
+}
+
+
+def get_input_view(agent_name: Optional[str]) -> Optional[Dict[str, Union[str, List[str]]]]:
+    """Return the declared input view for an agent, or None for full inputs."""
+    if not agent_name:
+        return None
+    # Fan-out agents ("system_features_agent_part_3") share their parent's view
+    return AGENT_INPUT_VIEWS.get(re.sub(r"_part_\d+$", "", agent_name))
+
+
+def slice_user_inputs(agent_name: Optional[str], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Select the subset of user inputs an agent needs.
+
+    Args:
+        agent_name: Name of the agent being prompted
+        inputs: Full user inputs (``SRSRequest.dict()``)
+
+    Returns:
+        Dict[str, Any]: Sliced inputs (the original dict if no view is declared)
+    """
+    view = get_input_view(agent_name)
+    if view is None or not isinstance(inputs, dict):
+        return inputs
+
+    sliced = {}
+    for group, fields in view.items():
+        group_data = inputs.get(group)
+        if group_data is None:
+            continue
+        if fields == ALL_FIELDS or not isinstance(group_data, dict):
+            sliced[group] = group_data
+        else:
+            sliced[group] = {field: group_data[field] for field in fields if field in group_data}
+    return sliced
+
@@ -0,0 +1,470 @@
+"""
+JSON Repair Utility
+
+Tolerant parser for LLM section outputs. Valid JSON takes the fast path
+(orjson when installed); anything else goes through a single-pass repairer
+that fixes the usual model mistakes and reports every change it made:
+
+- markdown fences and prose around the object, including bracketed prose
+  before it ("Here is the result [JSON]:")
+- trailing / doubled / missing commas and missing colons
+- single-quoted strings, unescaped inner quotes, raw control characters
+- Python literals (True/False/None), bare keys, // and /* */ comments
+- NaN/Infinity (replaced with null) and numbers like ``.5``, ``01``, ``+1``
+- unterminated strings and unclosed brackets
+
+Run ``python -m srs_engine.utils.json_repair`` to check the repairer
+against REGRESSION_CASES.
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+try:
+    import orjson
+
+    def _loads(text: str) -> Any:
+        return orjson.loads(text)
+
+    JSON_BACKEND = "orjson"
+except ImportError:  # pragma: no cover - depends on environment
+    def _loads(text: str) -> Any:
+        # json accepts NaN/Infinity, orjson does not; keep both backends alike
+        return json.loads(text, parse_constant=lambda constant: None)
+
+    JSON_BACKEND = "json"
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_JSON_LITERALS = {"true", "false", "null"}
+_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_NON_FINITE = {"NaN", "Infinity", "+Infinity", "-Infinity", "nan", "inf", "-inf"}
+_BARE_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.+-$")
+# Numbers as models write them: optional sign, leading dot or zeros, trailing dot
+_LOOSE_NUMBER = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?([eE][+-]?\d+)?")
+_JSON_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_QUOTES = "\"'"
+# Bracket positions tried as the start of the output before giving up on prose
+MAX_START_CANDIDATES = 8
+
+
+def _normalize_number(token: str) -> Optional[str]:
+    """JSON spelling of a loosely written number, or None if ``token`` is not one."""
+    if _JSON_NUMBER.fullmatch(token):
+        return token
+    match = _LOOSE_NUMBER.fullmatch(token)
+    if not match or not (match.group(2) or match.group(3)):
+        return None
+    sign, integer, fraction, exponent = match.groups()
+    number = ("-" if sign == "-" else "") + (integer.lstrip("0") or "0")
+    if fraction:
+        number += "." + fraction
+    return number + (exponent or "")
+
+
+# Inputs that once broke the repairer and the values they must parse to
+REGRESSION_CASES = [
+    ('{"text": "he said "x", then", "c": 1}', {"text": 'he said "x", then', "c": 1}),
+    ('{"a": NaN, "b": Infinity, "c": -Infinity}', {"a": None, "b": None, "c": None}),
+    ('{"a": .5, "b": 01, "c": -.25, "d": +3, "e": 5.}', {"a": 0.5, "b": 1, "c": -0.25, "d": 3, "e": 5}),
+    ('["a "quoted" word", "b"]', ['a "quoted" word', "b"]),
+    ('{"a": "x" "b": "y"}', {"a": "x", "b": "y"}),
+    ('{"a": "ends with "quote"", }', {"a": 'ends with "quote"'}),
+    ('Here is the result [JSON]:\n{"a": 1}', {"a": 1}),
+    ('Sure! (see [1]) {"purpose": "x",}', {"purpose": "x"}),
+]
+
+
+class _Repairer:
+    """Single-pass JSON rewriter driven by an object/array state machine."""
+
+    def __init__(self, text: str, start: int = 0):
+        self.text = text
+        self.start = start
+        self.end = start
+        self.out: List[str] = []
+        self.repairs: List[str] = []
+        # Each frame is [bracket, state]; states are
+        # object: "key" | "colon" | "value" | "comma", array: "value" | "comma"
+        self.stack: List[List[str]] = []
+        self.pending_comma = False
+
+    def note(self, message: str):
+        if message not in self.repairs:
+            self.repairs.append(message)
+
+    # -- value placement -------------------------------------------------
+
+    def _begin_value(self) -> str:
+        """Prepare the output for a new token; returns "key" or "value"."""
+        if not self.stack:
+            return "value"
+        frame = self.stack[-1]
+        bracket, state = frame
+
+        if state == "comma":
+            self.note("inserted missing comma")
+            self.pending_comma = True
+            state = "key" if bracket == "{" else "value"
+        elif state == "colon":
+            self.note("inserted missing colon")
+            self.out.append(":")
+            state = "value"
+
+        if self.pending_comma:
+            self.out.append(",")
+            self.pending_comma = False
+
+        if bracket == "{" and state == "key":
+            frame[1] = "colon"
+            return "key"
+        frame[1] = "comma"
+        return "value"
+
+    def _after_close(self):
+        if self.stack:
+            self.stack[-1][1] = "comma"
+
+    # -- scanners --------------------------------------------------------
+
+    def _skip_space(self, j: int) -> int:
+        text, n = self.text, len(self.text)
+        while j < n and text[j] in " \t\r\n":
+            j += 1
+        return j
+
+    def _bare_end(self, j: int) -> int:
+        while j < len(self.text) and self.text[j] in _BARE_CHARS:
+            j += 1
+        return j
+
+    def _string_end(self, j: int) -> Optional[int]:
+        """Index of the quote closing the string that starts at ``text[j]``."""
+        text, quote = self.text, self.text[j]
+        j += 1
+        while j < len(text):
+            if text[j] == "\\":
+                j += 2
+                continue
+            if text[j] == quote:
+                return j
+            j += 1
+        return None
+
+    def _key_follows(self, j: int) -> bool:
+        """Whether an object key (string or bare word) and its colon start at ``j``."""
+        text, n = self.text, len(self.text)
+        if j < n and text[j] in _QUOTES:
+            end = self._string_end(j)
+            if end is None:
+                return False
+            j = end + 1
+        elif j < n and text[j] in _BARE_CHARS:
+            j = self._bare_end(j)
+        else:
+            return False
+        j = self._skip_space(j)
+        return j < n and text[j] == ":"
+
+    def _value_follows(self, j: int) -> bool:
+        """Whether an array element starts at ``j``."""
+        text, n = self.text, len(self.text)
+        if j >= n or text[j] in _QUOTES + "{[":
+            return True
+        if text[j] not in _BARE_CHARS:
+            return False
+        end = self._bare_end(j)
+        token = text[j:end]
+        scalar = (
+            token in _JSON_LITERALS or token in _PY_LITERALS or token in _NON_FINITE
+            or _normalize_number(token) is not None
+        )
+        end = self._skip_space(end)
+        return scalar and (end >= n or text[end] in ",]")
+
+    def _structure_follows(self, j: int, role: str) -> bool:
+        """
+        Whether a quote followed by ``text[j]`` can close the current string.
+
+        The delimiter must fit the string's role, and what comes after it
+        must continue the document (a key after a comma in an object, an
+        element after a comma in an array, a closer after a bracket).
+        """
+        text, n = self.text, len(self.text)
+        if j >= n or text.startswith("```", j):
+            return True
+        ch = text[j]
+        if ch == ":":
+            return role == "key"
+        if role == "key" and ch != ":":
+            return ch == "}" or (ch == "," and self._key_follows(self._skip_space(j + 1)))
+        bracket = self.stack[-1][0] if self.stack else None
+        if ch in "}]":
+            if len(self.stack) <= 1:
+                return True
+            k = self._skip_space(j + 1)
+            return k >= n or text[k] in ",}]" or text.startswith("```", k)
+        # A comma: the next element has to make sense too
+        k = self._skip_space(j + 1)
+        if k >= n or text[k] in ",/" or (bracket == "{" and text[k] == "}") or (bracket == "[" and text[k] == "]"):
+            return True
+        if bracket == "{":
+            return self._key_follows(k)
+        return self._value_follows(k)
+
+    def _read_string(self, i: int, quote: str, role: str = "value") -> int:
+        """Copy a string starting at ``text[i] == quote``; returns next index."""
+        text, n = self.text, len(self.text)
+        if quote == "'":
+            self.note("converted single-quoted strings")
+        buf = ['"']
+        # First quote followed by a delimiter: used when no quote passes the
+        # structure check, so a misjudged string never swallows the rest
+        fallback: Optional[Tuple[int, int]] = None
+        i += 1
+        while i < n:
+            ch = text[i]
+            if ch == "\\" and i + 1 < n:
+                nxt = text[i + 1]
+                if nxt == "'":
+                    buf.append("'")
+                elif nxt in '"\\/bfnrtu':
+                    buf.append(ch + nxt)
+                else:
+                    self.note("fixed invalid escape sequences")
+                    buf.append("\\\\" + nxt)
+                i += 2
+                continue
+            if ch == quote:
+                j = self._skip_space(i + 1)
+                at_delimiter = j >= n or text[j] in ",:}]" or text.startswith("```", j)
+                # Closing quote: followed by a delimiter and valid structure, or
+                # by whitespace and the start of another string (a missing comma)
+                if (at_delimiter and self._structure_follows(j, role)) or (j > i + 1 and j < n and text[j] in "\"'{["):
+                    buf.append('"')
+                    self.out.append("".join(buf))
+                    return i + 1
+                if at_delimiter and fallback is None:
+                    fallback = (i, len(buf))
+                # A quote followed by more text is part of the string.
+                if quote == '"':
+                    self.note("escaped unescaped inner quotes")
+                buf.append('\\"' if quote == '"' else "'")
+                i += 1
+                continue
+            if ch == '"':
+                buf.append('\\"')
+            elif ch in _ESCAPES:
+                self.note("escaped control characters in strings")
+                buf.append(_ESCAPES[ch])
+            elif ord(ch) < 0x20 or ord(ch) == 0x7F:
+                self.note("escaped control characters in strings")
+                buf.append(f"\\u{ord(ch):04x}")
+            else:
+                buf.append(ch)
+            i += 1
+
+        if fallback is not None:
+            i, length = fallback
+            self.out.append("".join(buf[:length]) + '"')
+            return i + 1
+        self.note("closed unterminated string")
+        buf.append('"')
+        self.out.append("".join(buf))
+        return n
+
+    def _read_bare(self, i: int, role: str) -> int:
+        text, n = self.text, len(self.text)
+        j = i
+        while j < n and text[j] in _BARE_CHARS:
+            j += 1
+        token = text[i:j]
+        if role == "key":
+            self.note("quoted bare keys")
+            self.out.append(json.dumps(token))
+        elif token in _JSON_LITERALS:
+            self.out.append(token)
+        elif _normalize_number(token) is not None:
+            number = _normalize_number(token)
+            if number != token:
+                self.note("normalised numbers")
+            self.out.append(number)
+        elif token in _NON_FINITE:
+            self.note("replaced NaN/Infinity with null")
+            self.out.append("null")
+        elif token in _PY_LITERALS:
+            self.note("converted Python literals")
+            self.out.append(_PY_LITERALS[token])
+        else:
+            self.note("quoted bare words")
+            self.out.append(json.dumps(token))
+        return j
+
+    def _skip_comment(self, i: int) -> int:
+        text = self.text
+        self.note("removed comments")
+        if text.startswith("//", i):
+            end = text.find("\n", i)
+            return len(text) if end == -1 else end
+        end = text.find("*/", i + 2)
+        return len(text) if end == -1 else end + 2
+
+    # -- driver ----------------------------------------------------------
+
+    def run(self) -> Optional[str]:
+        text, n = self.text, len(self.text)
+
+        start = self.start
+        prefix = text[:start].strip()
+        if prefix:
+            fence_lang = prefix.lstrip("`")
+            is_fence = prefix.startswith("```") and (not fence_lang or fence_lang.isalpha())
+            self.note("removed markdown fence" if is_fence else "removed leading text")
+
+        i = start
+        while i < n:
+            ch = text[i]
+
+            if ch in " \t\r\n":
+                self.out.append(ch)
+                i += 1
+            elif ch in "{[":
+                self._begin_value()
+                self.out.append(ch)
+                self.stack.append([ch, "key" if ch == "{" else "value"])
+                i += 1
+            elif ch in "}]":
+                if not self.stack:
+                    self.note("removed unmatched closing brackets")
+                    i += 1
+                    continue
+                bracket, state = self.stack.pop()
+                if self.pending_comma:
+                    self.note("removed trailing commas")
+                    self.pending_comma = False
+                if state == "colon":
+                    self.note("filled missing values with null")
+                    self.out.append(":null")
+                elif bracket == "{" and state == "value":
+                    self.note("filled missing values with null")
+                    self.out.append("null")
+                if ch != _CLOSERS[bracket]:
+                    self.note("fixed mismatched brackets")
+                self.out.append(_CLOSERS[bracket])
+                self._after_close()
+                i += 1
+                if not self.stack:
+                    break
+            elif ch == ":":
+                if self.stack and self.stack[-1] == ["{", "colon"]:
+                    self.out.append(":")
+                    self.stack[-1][1] = "value"
+                else:
+                    self.note("removed stray colons")
+                i += 1
+            elif ch == ",":
+                if self.stack and self.stack[-1][1] == "comma":
+                    self.pending_comma = True
+                    self.stack[-1][1] = "key" if self.stack[-1][0] == "{" else "value"
+                else:
+                    self.note("removed extra commas")
+                i += 1
+            elif ch in "\"'":
+                role = self._begin_value()
+                i = self._read_string(i, ch, role)
+            elif ch == "/" and text.startswith(("//", "/*"), i):
+                i = self._skip_comment(i)
+            elif ch in _BARE_CHARS:
+                role = self._begin_value()
+                i = self._read_bare(i, role)
+            else:
+                self.note("removed stray characters")
+                i += 1
+
+        self.end = i
+        if self.stack:
+            if self.pending_comma:
+                self.note("removed trailing commas")
+            closers = []
+            for bracket, state in reversed(self.stack):
+                if state == "colon":
+                    closers.append(":null")
+                elif bracket == "{" and state == "value":
+                    closers.append("null")
+                closers.append(_CLOSERS[bracket])
+            self.note(f"closed {len(self.stack)} unclosed bracket(s)")
+            self.out.append("".join(closers))
+        elif i < n:
+            trailing = text[i:].strip()
+            if trailing and trailing.strip("`").strip():
+                self.note("removed trailing text")
+            elif trailing:
+                self.note("removed markdown fence")
+
+        return "".join(self.out)
+
+
+def repair_json(raw: str) -> Tuple[Any, List[str]]:
+    """
+    Parse JSON produced by an LLM, repairing it when necessary.
+
+    Args:
+        raw: Raw model output
+
+    Returns:
+        Tuple[Any, List[str]]: Parsed value (None if unrepairable) and the
+        list of repairs applied (empty when the input was valid JSON)
+    """
+    if not isinstance(raw, str):
+        return None, ["input is not a string"]
+
+    try:
+        return _loads(raw), []
+    except ValueError:
+        pass
+
+    text = raw.strip()
+    fallback = None
+    resume = 0
+    for start in _start_candidates(text):
+        if start < resume:
+            continue
+        repairer = _Repairer(text, start)
+        repaired = repairer.run()
+        try:
+            result = _loads(repaired), repairer.repairs
+        except ValueError as e:
+            result = None, repairer.repairs + [f"unrepairable: {e}"]
+        parsed = result[0]
+        # Section outputs are objects: "[JSON]" or "see [1]" in leading prose
+        # parses as a list of scalars, so keep looking for the real object
+        if isinstance(parsed, dict) or (isinstance(parsed, list) and any(isinstance(v, (dict, list)) for v in parsed)):
+            return result
+        if parsed is not None:
+            resume = repairer.end
+        if fallback is None or (fallback[0] is None and parsed is not None):
+            fallback = result
+    return fallback or (None, ["no JSON object or array found"])
+
+
+def _start_candidates(text: str) -> List[int]:
+    """Positions of the first ``MAX_START_CANDIDATES`` opening brackets."""
+    starts = []
+    for match in re.finditer(r"[{\[]", text):
+        starts.append(match.start())
+        if len(starts) == MAX_START_CANDIDATES:
+            break
+    return starts
+
+
+if __name__ == "__main__":
+    failures = 0
+    for raw, expected in REGRESSION_CASES:
+        parsed, repairs = repair_json(raw)
+        if parsed != expected:
+            failures += 1
+            print(f"FAIL {raw!r}: got {parsed!r} ({', '.join(repairs)})")
+    print(f"{len(REGRESSION_CASES) - failures}/{len(REGRESSION_CASES)} regression cases pass")
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,522 @@
+"""
+Mermaid Flowchart Parser and Linter
+
+Parses the flowchart/graph subset of Mermaid the interface agents emit into
+a small AST (nodes, edges, subgraphs, style directives) and prints it back in
+one canonical form. Common model mistakes - ``->`` arrows, node ids with
+spaces, brackets inside unquoted labels, unclosed labels or subgraphs, the
+reserved ``end`` id - are fixed while parsing; statements that cannot be
+understood are dropped. A diagram that is mostly unparseable is rejected, so
+it can be re-asked or replaced before anything is sent to a renderer.
+
+Run ``python -m srs_engine.utils.mermaid_lint`` to check the linter against
+ROUND_TRIP_CASES.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+FLOWCHART_HEADERS = ("flowchart", "graph")
+OTHER_DIAGRAM_HEADERS = (
+    "sequenceDiagram", "erDiagram", "stateDiagram", "classDiagram",
+    "gantt", "pie", "journey", "mindmap", "timeline", "gitGraph",
+)
+DIRECTIONS = ("TB", "TD", "BT", "LR", "RL")
+# Direction used when the header is missing (same as the previous sanitizer)
+DEFAULT_DIRECTION = "LR"
+DIRECTIVES = ("classDef", "class", "style", "linkStyle", "click")
+RESERVED_IDS = {"end", "graph", "flowchart", "subgraph", "class", "style", "click", "direction"}
+
+# Share of statements that may be dropped before the diagram is rejected
+MAX_DROPPED_SHARE = 0.5
+
+# (source, expected canonical code); the canonical code must lint to itself
+ROUND_TRIP_CASES = [
+    (
+        "flowchart TD\n A[User] --> B[Server]\n subgraph S1 [Zone]\n A\n end",
+        "flowchart TD\n    B[Server]\n    subgraph S1 [Zone]\n        A[User]\n    end\n    A --> B",
+    ),
+    (
+        "graph LR\n A --> B\n subgraph S\n B --> C\n end",
+        "graph LR\n    subgraph S\n        B\n        C\n    end\n    A --> B\n    B --> C",
+    ),
+    (
+        "graph TD\n subgraph Outer\n A --> B\n subgraph Inner\n B\n end\n end",
+        "graph TD\n    subgraph Outer\n        A\n        subgraph Inner\n            B\n        end\n    end\n    A --> B",
+    ),
+]
+
+# opener -> [(closer, shape)], longest openers first
+SHAPE_OPENERS = [
+    ("(((", [(")))", "double_circle")]),
+    ("([", [("])", "stadium")]),
+    ("[(", [(")]", "cylinder")]),
+    ("[[", [("]]", "subroutine")]),
+    ("((", [("))", "circle")]),
+    ("{{", [("}}", "hexagon")]),
+    ("[/", [("/]", "parallelogram"), ("\\]", "trapezoid")]),
+    ("[\\", [("\\]", "parallelogram_alt"), ("/]", "trapezoid_alt")]),
+    ("(", [(")", "round")]),
+    ("[", [("]", "rect")]),
+    ("{", [("}", "diamond")]),
+    (">", [("]", "flag")]),
+]
+_SHAPE_CLOSERS = dict(SHAPE_OPENERS)
+SHAPE_DELIMITERS = {
+    shape: (opener, closer)
+    for opener, closers in SHAPE_OPENERS
+    for closer, shape in closers
+}
+
+_OPENER = re.compile("|".join(re.escape(opener) for opener, _ in SHAPE_OPENERS))
+_ID = re.compile(r"\w+(?:-\w+)*")
+_SPACED_ID = re.compile(r"\w+(?:[ \t]+\w+)+")
+_CLASS = re.compile(r":::(\w+)")
+_AMPERSAND = re.compile(r"\s*&")
+_HEADER = re.compile(
+    r"^(flowchart|graph)(?:\s+(TB|TD|BT|LR|RL)\b)?(?=\s|;|$)(?!\s*(?:<?[-=.]{2}|[\[({>&]))\s*", re.IGNORECASE
+)
+_EDGE_TEXT = re.compile(
+    r"(<)?(--|-\.|==)\s+([^\s|>][^|]*?)\s+(-{2,}>|\.-+>|\.-+|={2,}>|-{3,}|={3,}|-{2,}[ox]|={2,}[ox])"
+)
+_EDGE = re.compile(
+    r"(<)?(-{2,}>|-\.+-*>|={2,}>|-{2,}[ox](?=\s)|={2,}[ox](?=\s)|-{3,}|-\.+-+|={3,}|->|=>|→|⟶)"
+)
+_EDGE_LABEL = re.compile(r"\s*\|([^|]*)\|")
+_LABEL_BOUNDARY = re.compile(r"\s*(?:$|&|:::|;|<?[-=]{2}|-\.|->|=>|→)")
+_EDGE_START = re.compile(r"\s+(?:<?[-=]{2}|-\.|->|=>|→)")
+_NEEDS_QUOTES = re.compile(r"[()\[\]{}|;\"]")
+
+
+class MermaidSyntaxError(ValueError):
+    """The diagram could not be parsed into a usable flowchart."""
+
+
+@dataclass
+class Node:
+    id: str
+    label: Optional[str] = None
+    shape: str = "rect"
+    classes: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Edge:
+    source: str
+    target: str
+    label: Optional[str] = None
+    line: str = "solid"          # solid | dotted | thick
+    head: str = ">"              # ">" | "o" | "x" | "" (no arrowhead)
+    bidirectional: bool = False
+
+
+@dataclass
+class Subgraph:
+    id: str
+    title: Optional[str] = None
+    direction: Optional[str] = None
+    parent: Optional[str] = None
+    node_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Flowchart:
+    direction: str = DEFAULT_DIRECTION
+    header: str = "flowchart"
+    nodes: Dict[str, Node] = field(default_factory=dict)
+    edges: List[Edge] = field(default_factory=list)
+    subgraphs: List[Subgraph] = field(default_factory=list)
+    directives: List[str] = field(default_factory=list)
+
+    def to_mermaid(self) -> str:
+        """Print the diagram in canonical Mermaid syntax."""
+        subgraph_ids = {subgraph.id for subgraph in self.subgraphs}
+        members = {node_id for subgraph in self.subgraphs for node_id in subgraph.node_ids}
+        lines = [f"{self.header} {self.direction}"]
+
+        def emit_nodes(node_ids, indent, bare=True):
+            for node_id in node_ids:
+                node = self.nodes[node_id]
+                # Bare ids only matter inside subgraphs, where they set membership
+                if node.label is None and not node.classes and (not bare or node_id in subgraph_ids):
+                    continue
+                lines.append(indent + _format_node(node))
+
+        def emit_subgraph(subgraph, indent):
+            title = f" [{_quote_label(subgraph.title)}]" if subgraph.title else ""
+            lines.append(f"{indent}subgraph {subgraph.id}{title}")
+            if subgraph.direction:
+                lines.append(f"{indent}    direction {subgraph.direction}")
+            emit_nodes(subgraph.node_ids, indent + "    ")
+            for child in self.subgraphs:
+                if child.parent == subgraph.id:
+                    emit_subgraph(child, indent + "    ")
+            lines.append(f"{indent}end")
+
+        emit_nodes([node_id for node_id in self.nodes if node_id not in members], "    ", bare=False)
+        for subgraph in self.subgraphs:
+            if subgraph.parent is None:
+                emit_subgraph(subgraph, "    ")
+        for edge in self.edges:
+            label = f"|{_quote_label(edge.label)}|" if edge.label else ""
+            lines.append(f"    {edge.source} {_edge_operator(edge)}{label} {edge.target}")
+        lines.extend(f"    {directive}" for directive in self.directives)
+        return "\n".join(lines)
+
+
+@dataclass
+class LintResult:
+    ok: bool
+    code: Optional[str]
+    issues: List[str] = field(default_factory=list)
+    diagram: Optional[Flowchart] = None
+
+
+def _quote_label(label: str) -> str:
+    label = label.replace('"', "#quot;")
+    return f'"{label}"' if _NEEDS_QUOTES.search(label) else label
+
+
+def _format_node(node: Node) -> str:
+    text = node.id
+    if node.label is not None:
+        opener, closer = SHAPE_DELIMITERS[node.shape]
+        text += f"{opener}{_quote_label(node.label)}{closer}"
+    return text + "".join(f":::{cls}" for cls in node.classes)
+
+
+def _edge_operator(edge: Edge) -> str:
+    head = edge.head
+    if edge.line == "dotted":
+        # Mermaid has no circle/cross heads on dotted links
+        body = "-.-" if not head else "-.->"
+    elif edge.line == "thick":
+        body = "===" if not head else "==" + head
+    else:
+        body = "---" if not head else "--" + head
+    return "<" + body if edge.bidirectional and head == ">" else body
+
+
+def _slug(text: str) -> str:
+    slug = re.sub(r"\W+", "_", text.strip()).strip("_")
+    return slug or "node"
+
+
+def _split_statements(line: str) -> List[str]:
+    """Split a line on ``;`` outside labels and quotes."""
+    if ";" not in line:
+        return [line.strip()] if line.strip() else []
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth = max(0, depth - 1)
+        elif char == ";" and depth == 0:
+            parts.append(line[start:i])
+            start = i + 1
+    parts.append(line[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+class _Parser:
+    def __init__(self):
+        self.chart = Flowchart()
+        self.issues: List[str] = []
+        self.renames: Dict[str, str] = {}
+        self.stack: List[Subgraph] = []
+
+    # ---------- nodes ----------
+
+    def _node_id(self, raw: str) -> str:
+        if raw in self.renames:
+            return self.renames[raw]
+        node_id = raw
+        if raw.lower() in RESERVED_IDS and raw == raw.lower():
+            node_id = f"{raw}_node"
+            self.issues.append(f"renamed reserved node id '{raw}'")
+        self.renames[raw] = node_id
+        return node_id
+
+    def _parse_label(self, text: str, pos: int, closers) -> Tuple[Optional[str], str, int]:
+        if text.startswith('"', pos):
+            end = text.find('"', pos + 1)
+            if end != -1:
+                for closer, shape in closers:
+                    if text.startswith(closer, end + 1):
+                        return text[pos + 1:end], shape, end + 1 + len(closer)
+        # First closer followed by a statement boundary, so brackets inside
+        # an unquoted label are kept as text
+        best = None
+        for closer, shape in closers:
+            search = pos
+            while (index := text.find(closer, search)) != -1:
+                if _LABEL_BOUNDARY.match(text, index + len(closer)):
+                    if best is None or index < best[0]:
+                        best = (index, closer, shape)
+                    break
+                search = index + 1
+        if best:
+            index, closer, shape = best
+            return text[pos:index], shape, index + len(closer)
+        edge = _EDGE_START.search(text, pos)
+        end = edge.start() if edge else len(text)
+        self.issues.append(f"closed unterminated label '{text[pos:end].strip()}'")
+        return text[pos:end], closers[0][1], end
+
+    def _parse_node(self, text: str, pos: int, staged: Dict[str, Node]) -> Tuple[Optional[str], int]:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        raw_id, label, shape = None, None, None
+
+        spaced = _SPACED_ID.match(text, pos)
+        if spaced and not _OPENER.match(text, spaced.end()):
+            # "User Login --> Dashboard": words become the label of a slugged id
+            label = " ".join(spaced.group().split())
+            raw_id = _slug(label)
+            pos = spaced.end()
+            self.issues.append(f"node id '{label}' contained spaces")
+        else:
+            match = _ID.match(text, pos)
+            if match:
+                raw_id, pos = match.group(), match.end()
+            opener = _OPENER.match(text, pos)
+            if opener:
+                label, shape, pos = self._parse_label(text, opener.end(), _SHAPE_CLOSERS[opener.group()])
+            if raw_id is None:
+                if label is None:
+                    return None, pos
+                raw_id = _slug(label)
+                self.issues.append(f"added missing node id for '{label.strip()}'")
+
+        node_id = self._node_id(raw_id)
+        classes = []
+        while (match := _CLASS.match(text, pos)):
+            classes.append(match.group(1))
+            pos = match.end()
+
+        node = staged.get(node_id) or self.chart.nodes.get(node_id) or Node(node_id)
+        node = Node(node.id, node.label, node.shape, list(node.classes))
+        if label is not None:
+            label = " ".join(label.split())
+            if label:
+                node.label = label
+                node.shape = shape or "rect"
+            else:
+                self.issues.append(f"dropped empty label of '{node_id}'")
+        node.classes.extend(cls for cls in classes if cls not in node.classes)
+        staged[node_id] = node
+        return node_id, pos
+
+    def _parse_group(self, text: str, pos: int, staged: Dict[str, Node]) -> Tuple[Optional[List[str]], int]:
+        node_id, pos = self._parse_node(text, pos, staged)
+        if node_id is None:
+            return None, pos
+        group = [node_id]
+        while True:
+            match = _AMPERSAND.match(text, pos)
+            if not match:
+                return group, pos
+            node_id, pos = self._parse_node(text, match.end(), staged)
+            if node_id is None:
+                return None, pos
+            group.append(node_id)
+
+    # ---------- edges ----------
+
+    def _parse_edge(self, text: str, pos: int) -> Tuple[Optional[dict], int]:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+
+        match = _EDGE_TEXT.match(text, pos)
+        if match:
+            bidirectional, opener, label, closer = match.groups()
+            operator, pos = opener + closer, match.end()
+        else:
+            match = _EDGE.match(text, pos)
+            if not match:
+                return None, pos
+            bidirectional, operator = match.groups()
+            pos, label = match.end(), None
+            if operator in ("->", "=>", "→", "⟶"):
+                self.issues.append(f"replaced invalid arrow '{operator}'")
+                operator = "==>" if operator == "=>" else "-->"
+            labeled = _EDGE_LABEL.match(text, pos)
+            if labeled:
+                label, pos = labeled.group(1), labeled.end()
+
+        if label is not None:
+            label = " ".join(label.strip().strip('"').split()) or None
+        head = operator[-1] if operator[-1] in ">ox" else ""
+        line = "dotted" if "." in operator else "thick" if "=" in operator else "solid"
+        return {
+            "label": label,
+            "line": line,
+            "head": head,
+            "bidirectional": bool(bidirectional) and head == ">",
+        }, pos
+
+    # ---------- statements ----------
+
+    def parse_chain(self, text: str) -> bool:
+        if _SPACED_ID.fullmatch(text):
+            # Prose ("Here is the diagram"), not a node
+            return False
+        staged: Dict[str, Node] = {}
+        edges: List[Edge] = []
+        sources, pos = self._parse_group(text, 0, staged)
+        if sources is None:
+            return False
+        while True:
+            while pos < len(text) and text[pos].isspace():
+                pos += 1
+            if pos >= len(text):
+                break
+            edge, pos = self._parse_edge(text, pos)
+            if edge is None:
+                return False
+            targets, pos = self._parse_group(text, pos, staged)
+            if targets is None:
+                return False
+            edges.extend(Edge(source, target, **edge) for source in sources for target in targets)
+            sources = targets
+
+        if self.stack:
+            # As in Mermaid, a node mentioned inside a subgraph joins the
+            # innermost open one and leaves any subgraph it was in before
+            subgraph = self.stack[-1]
+            subgraph_ids = {other.id for other in self.chart.subgraphs}
+            for node_id in staged:
+                if node_id in subgraph.node_ids or node_id in subgraph_ids:
+                    continue
+                for other in self.chart.subgraphs:
+                    if node_id in other.node_ids:
+                        other.node_ids.remove(node_id)
+                subgraph.node_ids.append(node_id)
+        self.chart.nodes.update(staged)
+        self.chart.edges.extend(edges)
+        return True
+
+    def open_subgraph(self, rest: str):
+        rest = rest.strip()
+        titled = re.match(r"^(\w+(?:-\w+)*)\s*\[(.*)\]$", rest)
+        if titled:
+            subgraph_id, title = titled.group(1), titled.group(2).strip().strip('"')
+        elif rest.startswith('"'):
+            title = rest.strip('"')
+            subgraph_id = _slug(title)
+        elif _ID.fullmatch(rest):
+            subgraph_id, title = rest, None
+        else:
+            title = rest or None
+            subgraph_id = _slug(rest) if rest else f"subgraph_{len(self.chart.subgraphs) + 1}"
+        subgraph = Subgraph(self._node_id(subgraph_id), title or None,
+                            parent=self.stack[-1].id if self.stack else None)
+        self.chart.subgraphs.append(subgraph)
+        self.stack.append(subgraph)
+
+
+def lint_mermaid(code: str) -> LintResult:
+    """
+    Parse, auto-fix and canonicalise a flowchart diagram.
+
+    Diagram types other than flowchart/graph are passed through unchanged.
+
+    Args:
+        code: Mermaid source (fences and refusals already removed)
+
+    Returns:
+        LintResult: ``ok`` with the canonical ``code`` and the fixes applied,
+        or not ok with the reasons the diagram was rejected
+    """
+    if not code or not code.strip():
+        return LintResult(False, None, ["diagram is empty"])
+    if "\n" not in code and "\\n" in code:
+        code = code.replace("\\n", "\n")
+
+    lines = [line.strip() for line in code.strip().splitlines()]
+    # Comments and markdown fences
+    lines = [line for line in lines if line and not line.startswith(("%%", "```"))]
+    if not lines:
+        return LintResult(False, None, ["diagram is empty"])
+    if lines[0].startswith(OTHER_DIAGRAM_HEADERS):
+        return LintResult(True, "\n".join(lines))
+
+    parser = _Parser()
+    chart, issues = parser.chart, parser.issues
+
+    header = _HEADER.match(lines[0])
+    if header:
+        chart.header = header.group(1).lower()
+        chart.direction = (header.group(2) or "TD").upper()
+        if not header.group(2):
+            issues.append("added missing graph direction")
+        lines[0] = lines[0][header.end():]
+    else:
+        issues.append("added missing flowchart header")
+
+    statements, dropped = 0, []
+    for line in lines:
+        for statement in _split_statements(line):
+            statements += 1
+            keyword = statement.split(None, 1)[0]
+            repeated = _HEADER.match(statement)
+            if repeated and not statement[repeated.end():]:
+                issues.append("dropped repeated header")
+            elif keyword == "subgraph":
+                parser.open_subgraph(statement[len("subgraph"):])
+            elif statement == "end":
+                if parser.stack:
+                    parser.stack.pop()
+                else:
+                    issues.append("dropped 'end' without a subgraph")
+            elif keyword == "direction" and parser.stack:
+                direction = statement.split(None, 1)[-1].strip().upper()
+                if direction in DIRECTIONS:
+                    parser.stack[-1].direction = direction
+            elif keyword in DIRECTIVES:
+                chart.directives.append(statement)
+            elif not parser.parse_chain(statement):
+                dropped.append(statement)
+
+    if parser.stack:
+        issues.append(f"closed {len(parser.stack)} unterminated subgraph(s)")
+    for statement in dropped:
+        issues.append(f"dropped unparseable statement '{statement[:60]}'")
+
+    if not chart.nodes:
+        return LintResult(False, None, issues + ["diagram has no nodes"])
+    if statements and len(dropped) / statements > MAX_DROPPED_SHARE:
+        return LintResult(False, None, issues + [f"{len(dropped)} of {statements} statements unparseable"])
+    return LintResult(True, chart.to_mermaid(), issues, chart)
+
+
+def parse_flowchart(code: str) -> Flowchart:
+    """
+    Parse a flowchart diagram into its AST (with auto-fixes applied).
+
+    Raises:
+        MermaidSyntaxError: If the diagram is not a usable flowchart
+    """
+    result = lint_mermaid(code)
+    if not result.ok or result.diagram is None:
+        raise MermaidSyntaxError("; ".join(result.issues) or "not a flowchart")
+    return result.diagram
+
+
+if __name__ == "__main__":
+    failures = 0
+    for source, expected in ROUND_TRIP_CASES:
+        first = lint_mermaid(source).code
+        second = lint_mermaid(first or "").code
+        if first != expected or second != expected:
+            failures += 1
+            print(f"FAIL {source!r}:\n{first}\n-- relinted --\n{second}")
+    print(f"{len(ROUND_TRIP_CASES) - failures}/{len(ROUND_TRIP_CASES)} round-trip cases pass")
+    raise SystemExit(1 if failures else 0)
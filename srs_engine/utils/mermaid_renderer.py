@@ -0,0 +1,260 @@
+"""
+Mermaid Renderer Pool
+
+Spawning ``mmdc`` per diagram pays for a Node start and a headless browser
+launch every time. The pool keeps N long-lived Node workers
+(``mermaid_worker.mjs``), each with a warm browser, and sends them mermaid
+source as JSON lines over stdin; PNG/SVG bytes come back on stdout. Render
+latency drops to layout time and concurrent renders spread across workers.
+"""
+
+import atexit
+import base64
+import itertools
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# "pool" renders on warm workers (falling back to mmdc), "mmdc" spawns mmdc per
+# diagram, "native" uses the in-process flowchart renderer
+DIAGRAM_RENDERER = os.getenv("SRS_DIAGRAM_RENDERER", "pool").lower()
+RENDERER_WORKERS = int(os.getenv("SRS_MERMAID_WORKERS", str(min(4, os.cpu_count() or 1))))
+WORKER_STARTUP_TIMEOUT = float(os.getenv("SRS_MERMAID_STARTUP_TIMEOUT", "30"))
+RENDER_TIMEOUT = 60.0
+# "svg" embeds vector diagrams with a low-resolution PNG fallback for older
+# Word readers, "png" embeds high-resolution PNGs only
+DIAGRAM_FORMAT = os.getenv("SRS_DIAGRAM_FORMAT", "svg").lower()
+
+WORKER_SCRIPT = Path(__file__).with_name("mermaid_worker.mjs")
+
+# Same output as ``mmdc -w 2400 -H 1600 -t forest -b white -s 2``; next to
+# an SVG the PNG is only a fallback and is rendered at scale 1
+RENDER_OPTIONS = {
+    "width": 2400,
+    "height": 1600,
+    "theme": "forest",
+    "background": "white",
+    "scale": 1 if DIAGRAM_FORMAT == "svg" else 2,
+}
+
+# Word's SVG renderer ignores <foreignObject>, so vector labels must be SVG text
+# (a file, because mmdc only takes its config that way)
+SVG_CONFIG_FILE = Path(__file__).with_name("mermaid_svg_config.json")
+SVG_MERMAID_CONFIG = json.loads(SVG_CONFIG_FILE.read_text(encoding="utf-8"))
+
+
+class RendererUnavailable(RuntimeError):
+    """Node, mermaid-cli or the browser is missing, so the pool cannot render."""
+
+
+class RenderError(RuntimeError):
+    """The worker rendered nothing for a diagram (usually a syntax error)."""
+
+
+def _node_modules_roots() -> List[str]:
+    """Directories the worker searches for mermaid-cli and puppeteer."""
+    configured = os.getenv("SRS_MERMAID_NODE_MODULES")
+    if configured:
+        return configured.split(os.pathsep)
+    npm = shutil.which("npm")
+    if not npm:
+        return []
+    try:
+        root = subprocess.run([npm, "root", "-g"], capture_output=True, text=True, timeout=15).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return []
+    # mermaid-cli installed with -g keeps its own puppeteer nested
+    return [root, os.path.join(root, "@mermaid-js", "mermaid-cli", "node_modules")] if root else []
+
+
+class _Worker:
+    """One Node process with a warm browser; serves one request at a time."""
+
+    def __init__(self, node: str, env: Dict[str, str]):
+        self.process = subprocess.Popen(
+            [node, str(WORKER_SCRIPT)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            env=env,
+        )
+        self.lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        threading.Thread(target=self._read_lines, daemon=True).start()
+
+        try:
+            ready = self._next_message(WORKER_STARTUP_TIMEOUT)
+            if not ready.get("ready"):
+                raise RendererUnavailable(ready.get("error", "mermaid worker failed to start"))
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_lines(self):
+        for line in self.process.stdout:
+            self.lines.put(line)
+        self.lines.put(None)
+
+    def _next_message(self, timeout: float) -> dict:
+        """Next protocol message; other stdout lines (e.g. library logs) are skipped."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                line = self.lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                self.close()
+                raise TimeoutError(f"mermaid worker did not answer within {timeout:.1f}s")
+            if line is None:
+                raise RendererUnavailable("mermaid worker exited")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                message = None
+            if isinstance(message, dict):
+                return message
+            print(f"⚠️ Mermaid worker output skipped: {line.strip()[:200]}")
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def render(self, request: dict, timeout: float) -> bytes:
+        self.process.stdin.write(json.dumps(request) + "\n")
+        self.process.stdin.flush()
+        while True:
+            response = self._next_message(timeout)
+            if response.get("id") == request["id"]:
+                break
+        if not response.get("ok"):
+            raise RenderError(response.get("error", "render failed"))
+        return base64.b64decode(response["data"])
+
+    def close(self):
+        if self.alive:
+            self.process.kill()
+            self.process.wait()
+
+
+class MermaidRendererPool:
+    """
+    Pool of warm mermaid workers, started lazily and shared by all requests.
+
+    ``render`` is blocking and thread-safe; call it from worker threads
+    (``asyncio.to_thread``) to render several diagrams at once.
+    """
+
+    def __init__(self, size: int = RENDERER_WORKERS):
+        self.size = max(1, size)
+        self.idle: "queue.Queue[_Worker]" = queue.Queue()
+        self.started = 0
+        self.lock = threading.Lock()
+        self.unavailable: Optional[str] = None
+        self.env: Optional[Dict[str, str]] = None
+        self.ids = itertools.count(1)
+
+    def _spawn(self) -> _Worker:
+        node = shutil.which("node")
+        if not node:
+            raise RendererUnavailable("node command not found")
+        if self.env is None:
+            self.env = {**os.environ, "SRS_MERMAID_NODE_MODULES": os.pathsep.join(_node_modules_roots())}
+        return _Worker(node, self.env)
+
+    def _checkout(self, timeout: float) -> _Worker:
+        if self.unavailable:
+            raise RendererUnavailable(self.unavailable)
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            spawn = self.started < self.size
+            if spawn:
+                self.started += 1
+        if not spawn:
+            try:
+                return self.idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"no mermaid worker free within {timeout:.1f}s")
+        try:
+            worker = self._spawn()
+            print(f"🖌️ Mermaid worker started ({self.started}/{self.size})")
+            return worker
+        except Exception as e:
+            with self.lock:
+                self.started -= 1
+            if isinstance(e, RendererUnavailable):
+                # Do not retry a missing toolchain on every diagram
+                self.unavailable = str(e)
+            raise
+
+    def _checkin(self, worker: _Worker):
+        if worker.alive:
+            self.idle.put(worker)
+        else:
+            with self.lock:
+                self.started -= 1
+
+    def warm_up(self, workers: int = 1):
+        """Start ``workers`` workers ahead of the first request."""
+        started = [self._checkout(WORKER_STARTUP_TIMEOUT) for _ in range(min(workers, self.size))]
+        for worker in started:
+            self._checkin(worker)
+
+    def render(self, mermaid_code: str, output_format: str = "png", timeout: Optional[float] = None) -> bytes:
+        """
+        Render mermaid source to image bytes on a warm worker.
+
+        Args:
+            mermaid_code: Mermaid diagram source
+            output_format: "png" or "svg"
+            timeout: Seconds to wait for a worker and for the render
+
+        Returns:
+            bytes: Rendered image
+
+        Raises:
+            RendererUnavailable: If the pool cannot run on this machine
+            RenderError: If mermaid rejected the diagram
+            TimeoutError: If the render took longer than ``timeout``
+        """
+        timeout = timeout or RENDER_TIMEOUT
+        worker = self._checkout(timeout)
+        request = {
+            "id": next(self.ids),
+            "code": mermaid_code,
+            "format": output_format,
+            "config": SVG_MERMAID_CONFIG if output_format == "svg" else {},
+            **RENDER_OPTIONS,
+        }
+        try:
+            return worker.render(request, timeout)
+        except (TimeoutError, RendererUnavailable):
+            # A stuck or dead worker is replaced by a fresh one on the next checkout
+            worker.close()
+            raise
+        finally:
+            self._checkin(worker)
+
+    def close(self):
+        """Stop all idle workers."""
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.close()
+            with self.lock:
+                self.started -= 1
+
+
+renderer_pool = MermaidRendererPool()
+atexit.register(renderer_pool.close)
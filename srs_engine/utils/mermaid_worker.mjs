@@ -0,0 +1,81 @@
+// Long-lived Mermaid renderer used by srs_engine/utils/mermaid_renderer.py.
+//
+// Launches one headless browser at startup and keeps it warm, then renders
+// diagrams with mermaid-cli's renderMermaid() for each request.
+// Protocol: one JSON object per line on stdin/stdout.
+//   ready:    {"ready": true} | {"ready": false, "error": "..."}
+//   request:  {"id", "code", "format", "width", "height", "theme", "background", "scale", "config"}
+//   response: {"id", "ok": true, "data": "<base64>"} | {"id", "ok": false, "error": "..."}
+
+import { createInterface } from "node:readline";
+import { readFileSync } from "node:fs";
+import { join } from "node:path";
+import { pathToFileURL } from "node:url";
+
+// Global npm installs are not visible to ESM bare imports, so fall back to
+// the node_modules directories passed in by the Python side.
+const SEARCH_ROOTS = (process.env.SRS_MERMAID_NODE_MODULES || "")
+  .split(process.platform === "win32" ? ";" : ":")
+  .filter(Boolean);
+
+function packageEntry(root, name) {
+  const dir = join(root, name);
+  const pkg = JSON.parse(readFileSync(join(dir, "package.json"), "utf8"));
+  let entry = pkg.exports;
+  while (entry && typeof entry === "object") {
+    entry = entry["."] ?? entry.import ?? entry.default ?? entry.node;
+  }
+  return join(dir, entry || pkg.module || pkg.main || "index.js");
+}
+
+async function load(name) {
+  try {
+    return await import(name);
+  } catch (err) {
+    for (const root of SEARCH_ROOTS) {
+      try {
+        return await import(pathToFileURL(packageEntry(root, name)).href);
+      } catch {
+        // try the next root
+      }
+    }
+    throw err;
+  }
+}
+
+function send(message) {
+  process.stdout.write(JSON.stringify(message) + "\n");
+}
+
+async function main() {
+  let browser, renderMermaid;
+  try {
+    ({ renderMermaid } = await load("@mermaid-js/mermaid-cli"));
+    const puppeteer = (await load("puppeteer")).default;
+    browser = await puppeteer.launch({ headless: "shell", args: ["--no-sandbox"] });
+  } catch (err) {
+    send({ ready: false, error: String(err && err.message ? err.message : err) });
+    process.exit(1);
+  }
+  send({ ready: true });
+
+  const lines = createInterface({ input: process.stdin, terminal: false });
+  for await (const line of lines) {
+    if (!line.trim()) continue;
+    let request;
+    try {
+      request = JSON.parse(line);
+      const { data } = await renderMermaid(browser, request.code, request.format || "png", {
+        viewport: { width: request.width, height: request.height, deviceScaleFactor: request.scale },
+        backgroundColor: request.background,
+        mermaidConfig: { theme: request.theme, ...(request.config || {}) },
+      });
+      send({ id: request.id, ok: true, data: Buffer.from(data).toString("base64") });
+    } catch (err) {
+      send({ id: request && request.id, ok: false, error: String(err && err.message ? err.message : err) });
+    }
+  }
+  await browser.close();
+}
+
+main();
@@ -4,9 +4,22 @@ from google.adk.models.lite_llm import LiteLlm
 
 load_dotenv(find_dotenv())
 
+from .hedging import HEDGING_ENABLED
+from .stream_validation import StreamValidatedLiteLlm
+
 GROQ_MODEL = os.getenv("GROQ_MODEL")
+STREAM_VALIDATION = os.getenv("SRS_STREAM_VALIDATION", "true").lower() == "true"
 
 
-groq_llm = LiteLlm(
-    model=GROQ_MODEL
-)
+# Schema-bound calls are streamed and aborted early when the output drifts,
+# and hedged with a duplicate request when they run slow
+if STREAM_VALIDATION or HEDGING_ENABLED:
+    groq_llm = StreamValidatedLiteLlm(
+        model=GROQ_MODEL,
+        validate_stream=STREAM_VALIDATION,
+        hedging=HEDGING_ENABLED
+    )
+else:
+    groq_llm = LiteLlm(
+        model=GROQ_MODEL
+    )
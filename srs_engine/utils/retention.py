@@ -0,0 +1,160 @@
+"""
+Artifact Retention
+
+Bounds the disk used by generated documents and images. A sweep:
+
+1. drops jobs older than ``SRS_ARTIFACT_TTL_HOURS`` from the artifact index,
+2. drops the oldest remaining jobs while the stored blobs exceed
+   ``SRS_ARTIFACT_QUOTA_MB``,
+3. deletes blobs whose reference count (index entries pointing at them)
+   fell to zero - a blob shared with a newer job stays,
+4. removes job workspaces left behind by crashed processes and files in
+   the legacy ``generated_srs`` / ``generated_images`` folders past the TTL.
+
+Steps 1-3 are driven by the SQLite index, never by listing the blob
+directory, and work in batches, so a sweep costs time proportional to what
+it deletes even with hundreds of thousands of files. ``RetentionManager.run``
+repeats the sweep in the background every ``SRS_RETENTION_INTERVAL_SECONDS``.
+"""
+
+import asyncio
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .artifact_store import ArtifactStore, WORKSPACE_DIR, artifact_store
+from .diagram_cache import DIAGRAM_CACHE_DIR
+
+
+RETENTION_ENABLED = os.getenv("SRS_RETENTION", "true").lower() == "true"
+ARTIFACT_TTL_HOURS = float(os.getenv("SRS_ARTIFACT_TTL_HOURS", "168"))
+ARTIFACT_QUOTA_MB = float(os.getenv("SRS_ARTIFACT_QUOTA_MB", "2048"))
+RETENTION_INTERVAL_SECONDS = float(os.getenv("SRS_RETENTION_INTERVAL_SECONDS", "600"))
+# A workspace lives only while its job runs; older ones belong to dead processes
+WORKSPACE_TTL_HOURS = float(os.getenv("SRS_WORKSPACE_TTL_HOURS", "6"))
+
+# Jobs removed per transaction, so a large backlog never holds the index lock long
+SWEEP_BATCH_JOBS = 200
+
+# Output folders of earlier versions, which nothing cleans up any more
+LEGACY_DIRS = [Path("./srs_engine/generated_srs"), Path("./srs_engine/generated_images")]
+
+
+class RetentionManager:
+    """TTL and quota enforcement for the artifact store and job workspaces."""
+
+    def __init__(
+        self,
+        store: ArtifactStore = artifact_store,
+        ttl_hours: float = ARTIFACT_TTL_HOURS,
+        quota_mb: float = ARTIFACT_QUOTA_MB,
+        workspace_ttl_hours: float = WORKSPACE_TTL_HOURS,
+        legacy_dirs: Optional[List[Path]] = None,
+    ):
+        self.store = store
+        self.ttl_seconds = ttl_hours * 3600
+        self.quota_bytes = int(quota_mb * 1024 * 1024)
+        self.workspace_ttl_seconds = workspace_ttl_hours * 3600
+        self.legacy_dirs = LEGACY_DIRS if legacy_dirs is None else legacy_dirs
+
+    def _remove(self, job_ids: List[str], stats: Dict[str, int]) -> int:
+        blobs, freed = self.store.remove_jobs(job_ids)
+        stats["jobs"] += len(job_ids)
+        stats["blobs"] += blobs
+        stats["bytes"] += freed
+        return freed
+
+    def _oldest_jobs(self, limit: int, before: Optional[float] = None) -> List[str]:
+        # Range scan on the created_at index; a job's artifacts are committed together
+        query, params = "SELECT job_id FROM artifacts", []
+        if before is not None:
+            query += " WHERE created_at < ?"
+            params.append(before)
+        with self.store.lock:
+            rows = self.store.db.execute(query + " ORDER BY created_at LIMIT ?", params + [limit]).fetchall()
+        return list(dict.fromkeys(row[0] for row in rows))
+
+    def _expire_jobs(self, now: float, stats: Dict[str, int]):
+        while True:
+            job_ids = self._oldest_jobs(SWEEP_BATCH_JOBS, before=now - self.ttl_seconds)
+            if not job_ids:
+                return
+            self._remove(job_ids, stats)
+
+    def _enforce_quota(self, stats: Dict[str, int]):
+        with self.store.lock:
+            total = self.store.db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        while total > self.quota_bytes:
+            job_ids = self._oldest_jobs(SWEEP_BATCH_JOBS)
+            if not job_ids:
+                return
+            # One job at a time, so no more is removed than the quota needs
+            for job_id in job_ids:
+                total -= self._remove([job_id], stats)
+                if total <= self.quota_bytes:
+                    return
+
+    def _sweep_workspaces(self, now: float, stats: Dict[str, int]):
+        if not WORKSPACE_DIR.is_dir():
+            return
+        with os.scandir(WORKSPACE_DIR) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False) and entry.stat().st_mtime < now - self.workspace_ttl_seconds:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    stats["workspaces"] += 1
+
+    def _sweep_legacy(self, now: float, stats: Dict[str, int]):
+        cutoff = now - self.ttl_seconds
+        cache_dir = DIAGRAM_CACHE_DIR.resolve()
+        for directory in self.legacy_dirs:
+            if not directory.is_dir():
+                continue
+            for root, dirs, files in os.walk(directory):
+                # The render cache bounds itself
+                dirs[:] = [d for d in dirs if (Path(root) / d).resolve() != cache_dir]
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        info = os.stat(path)
+                        if info.st_mtime < cutoff:
+                            os.unlink(path)
+                            stats["legacy_files"] += 1
+                            stats["bytes"] += info.st_size
+                    except FileNotFoundError:
+                        continue
+
+    def sweep(self) -> Dict[str, int]:
+        """
+        Run one retention pass (blocking).
+
+        Returns:
+            Dict[str, int]: Jobs, blobs, workspaces and legacy files removed, and bytes freed
+        """
+        now = time.time()
+        stats = {"jobs": 0, "blobs": 0, "workspaces": 0, "legacy_files": 0, "bytes": 0}
+        self._expire_jobs(now, stats)
+        self._enforce_quota(stats)
+        self._sweep_workspaces(now, stats)
+        self._sweep_legacy(now, stats)
+        if any(stats.values()):
+            print(
+                f"🧹 Retention sweep: {stats['jobs']} jobs, {stats['blobs']} blobs, "
+                f"{stats['workspaces']} workspaces, {stats['legacy_files']} legacy files "
+                f"({stats['bytes'] / (1024 * 1024):.1f} MB freed)"
+            )
+        return stats
+
+    async def run(self, interval: float = RETENTION_INTERVAL_SECONDS):
+        """Sweep forever in a worker thread every ``interval`` seconds; cancel to stop."""
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                # A failed pass is retried on the next tick
+                print(f"⚠️ Retention sweep failed: {e}")
+            await asyncio.sleep(interval)
+
+
+retention_manager = RetentionManager()
@@ -0,0 +1,151 @@
+"""
+Schema Contract Utility
+
+Generates the JSON-structure part of agent prompts directly from the Pydantic
+output schemas, in a compact notation, so prompts no longer restate (and
+drift from) the models in ``srs_engine/schemas``.
+
+Notation:
+    {key:type,...}   object with exactly these keys
+    [type]           array of type
+    type|null        value may be null
+    key?             key may be omitted
+"""
+
+import types
+from functools import lru_cache
+from typing import Any, List, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+
+_SCALARS = {
+    str: "str",
+    int: "int",
+    float: "float",
+    bool: "bool",
+    dict: "object",
+    Any: "any",
+}
+
+CONTRACT_LEGEND = (
+    "Notation: {key:type} = object with exactly these keys, [type] = array, "
+    "type|null = nullable, key? = optional. Keys not listed are forbidden."
+)
+
+
+def _type_contract(annotation: Any) -> str:
+    origin = get_origin(annotation)
+
+    if origin in (Union, types.UnionType):
+        args = get_args(annotation)
+        rendered = [_type_contract(arg) for arg in args if arg is not type(None)]
+        if len(rendered) != len(args):
+            rendered.append("null")
+        return "|".join(rendered)
+
+    if origin in (list, List, tuple, set):
+        args = get_args(annotation)
+        return f"[{_type_contract(args[0]) if args else 'any'}]"
+
+    if origin is dict:
+        return "object"
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return model_contract(annotation)
+
+    return _SCALARS.get(annotation, getattr(annotation, "__name__", str(annotation)))
+
+
+@lru_cache(maxsize=None)
+def model_contract(model: type) -> str:
+    """
+    Render a Pydantic model as a single-line compact contract.
+
+    Args:
+        model: Pydantic model class
+
+    Returns:
+        str: Contract, e.g. ``{title:str,terms:[{term:str,definition:str}]}``
+    """
+    fields = []
+    for name, field in model.model_fields.items():
+        key = name if field.is_required() else f"{name}?"
+        fields.append(f"{key}:{_type_contract(field.annotation)}")
+    return "{" + ",".join(fields) + "}"
+
+
+@lru_cache(maxsize=None)
+def schema_contract(model: type) -> str:
+    """
+    Render a Pydantic model as a contract with one top-level key per line.
+
+    Args:
+        model: Pydantic model class
+
+    Returns:
+        str: Multi-line contract
+    """
+    lines = ["{"]
+    for name, field in model.model_fields.items():
+        key = name if field.is_required() else f"{name}?"
+        lines.append(f"  {key}:{_type_contract(field.annotation)}")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def annotation_at(model: type, loc: tuple) -> Any:
+    """
+    Resolve the annotation of the field addressed by a validation error path.
+
+    Args:
+        model: Pydantic model class
+        loc: Path of field names and list indices, e.g. ``("features", 0, "description")``
+
+    Returns:
+        Any: Annotation of the addressed field (None if the path is unknown)
+    """
+    annotation: Any = model
+    for part in loc:
+        while get_origin(annotation) in (Union, types.UnionType):
+            annotation = next((a for a in get_args(annotation) if a is not type(None)), None)
+        if isinstance(part, int):
+            args = get_args(annotation)
+            if get_origin(annotation) not in (list, List, tuple, set) or not args:
+                return None
+            annotation = args[0]
+        elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            field = annotation.model_fields.get(part)
+            if field is None:
+                return None
+            annotation = field.annotation
+        else:
+            return None
+    return annotation
+
+
+def format_loc(loc: tuple) -> str:
+    """Render a field path as ``features[0].description``."""
+    path = ""
+    for part in loc:
+        path += f"[{part}]" if isinstance(part, int) else (f".{part}" if path else str(part))
+    return path
+
+
+def field_contract(model: type, loc: tuple) -> str:
+    """Render the contract of the field addressed by ``loc``."""
+    annotation = annotation_at(model, loc)
+    return "any" if annotation is None else _type_contract(annotation)
+
+
+def schema_prompt_block(model: type) -> str:
+    """
+    Build the prompt block describing the required output structure.
+
+    Args:
+        model: Pydantic output schema of the agent
+
+    Returns:
+        str: Legend followed by the contract
+    """
+    return f"{CONTRACT_LEGEND}\n{schema_contract(model)}\n"
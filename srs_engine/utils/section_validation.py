@@ -0,0 +1,446 @@
+"""
+Section Validation Utility
+
+Validates parsed section dicts against their Pydantic schemas (with cached
+validators) before they reach the document generator. Cheap problems are
+fixed locally; the remaining invalid sub-fields are re-requested from the
+model with a minimal prompt instead of re-running the whole section agent.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from ..schemas.assumptions_schema import AssumptionsSection
+from ..schemas.external_interfaces_schema import ExternalInterfacesSection
+from ..schemas.glossary_schema import GlossaryResponse
+from ..schemas.introduction_schema import IntroductionSection
+from ..schemas.nfr_schema import NonFunctionalRequirementsSection
+from ..schemas.overall_description_schema import OverallDescriptionSection
+from ..schemas.system_features_schema import SystemFeaturesSection
+from .feature_fanout import missing_features
+from .input_views import slice_user_inputs
+from .json_repair import repair_json
+from .mermaid_lint import lint_mermaid
+from .schema_contract import CONTRACT_LEGEND, field_contract, format_loc
+from .state_render import compact_json
+from .tokens import estimate_tokens
+
+
+# output_key -> (schema, agent that writes it)
+SECTION_SCHEMAS = {
+    "introduction_section": (IntroductionSection, "introduction_agent"),
+    "overall_description_section": (OverallDescriptionSection, "overall_description_agent"),
+    "system_features_section": (SystemFeaturesSection, "system_features_agent"),
+    "external_interfaces_section": (ExternalInterfacesSection, "external_interfaces_agent"),
+    "nfr_section": (NonFunctionalRequirementsSection, "nfr_agent"),
+    "glossary_section": (GlossaryResponse, "glossary_agent"),
+    "assumptions_section": (AssumptionsSection, "assumptions_agent"),
+}
+
+INTERFACE_KEYS = [name for name in ExternalInterfacesSection.model_fields if name != "title"]
+
+MAX_REASK_ROUNDS = 2
+MAX_REASK_FIELDS = 8
+
+
+@lru_cache(maxsize=None)
+def get_validator(section_key: str) -> TypeAdapter:
+    """Return the cached validator for a section."""
+    return TypeAdapter(SECTION_SCHEMAS[section_key][0])
+
+
+def validate_section(section_key: str, data: Any) -> List[Dict[str, Any]]:
+    """
+    Validate a section dict against its schema.
+
+    Args:
+        section_key: Session state key of the section
+        data: Parsed section
+
+    Returns:
+        List[Dict[str, Any]]: Pydantic error dicts (empty when valid)
+    """
+    try:
+        get_validator(section_key).validate_python(data)
+        errors = []
+    except ValidationError as e:
+        errors = e.errors()
+    check = SECTION_CHECKS.get(section_key)
+    if check and isinstance(data, dict):
+        known = {tuple(error["loc"]) for error in errors}
+        errors += [error for error in check(data) if error["loc"] not in known]
+    return errors
+
+
+def diagram_errors(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Flag interface diagrams the Mermaid linter cannot repair.
+
+    Fixable problems are left to ``clean_interface_diagrams``; only diagrams
+    that would have to be replaced are reported, so they get re-asked.
+
+    Args:
+        data: External interfaces section
+
+    Returns:
+        List[Dict[str, Any]]: Error dicts shaped like Pydantic's
+    """
+    errors = []
+    for key in INTERFACE_KEYS:
+        interface = data.get(key)
+        diagram = interface.get("interface_diagram") if isinstance(interface, dict) else None
+        code = diagram.get("code") if isinstance(diagram, dict) else None
+        if not isinstance(code, str):
+            continue
+        result = lint_mermaid(code)
+        if not result.ok:
+            errors.append({
+                "loc": (key, "interface_diagram", "code"),
+                "msg": f"invalid Mermaid flowchart ({result.issues[-1]}); "
+                       "use graph TD/LR with Id[Label] nodes and --> edges",
+                "type": "mermaid_syntax",
+                "input": code,
+            })
+    return errors
+
+
+# Checks beyond the schema, per section
+SECTION_CHECKS = {
+    "external_interfaces_section": diagram_errors,
+}
+
+
+def _get_path(data: Any, loc: tuple) -> Any:
+    for part in loc:
+        data = data[part]
+    return data
+
+
+def _step_into(data: Any, part: Any) -> None:
+    """Check that ``part`` addresses an existing slot (or a new dict key) of ``data``."""
+    if isinstance(data, dict):
+        if not isinstance(part, str):
+            raise TypeError(f"index {part} into an object")
+    elif isinstance(data, list):
+        if not isinstance(part, int):
+            raise TypeError(f"key {part!r} into an array")
+        if part > len(data):
+            raise IndexError(f"index {part} past the end of an array of {len(data)}")
+    else:
+        raise TypeError(f"{part!r} into a {type(data).__name__}")
+
+
+def _set_path(data: Any, loc: tuple, value: Any):
+    """
+    Set ``value`` at ``loc``, creating missing intermediate containers.
+
+    A list index may address an existing item or append right after the
+    last one; anything further out raises instead of padding the list.
+
+    Raises:
+        TypeError: A step does not match the container it indexes
+        IndexError: A list index lies beyond the end of the list
+    """
+    for index, part in enumerate(loc[:-1]):
+        _step_into(data, part)
+        nxt = loc[index + 1]
+        if isinstance(data, list) and part == len(data):
+            data.append([] if isinstance(nxt, int) else {})
+        elif isinstance(data, dict) and not isinstance(data.get(part), (dict, list)):
+            data[part] = [] if isinstance(nxt, int) else {}
+        data = data[part]
+    _step_into(data, loc[-1])
+    if isinstance(data, list) and loc[-1] == len(data):
+        data.append(value)
+    else:
+        data[loc[-1]] = value
+
+
+def _delete_path(data: Any, loc: tuple):
+    try:
+        parent = _get_path(data, loc[:-1])
+        del parent[loc[-1]]
+    except (KeyError, IndexError, TypeError):
+        pass
+
+
+def _parse_loc(path: str) -> tuple:
+    loc = []
+    for piece in path.replace("]", "").replace("[", ".").split("."):
+        if piece:
+            loc.append(int(piece) if piece.isdigit() else piece)
+    return tuple(loc)
+
+
+def apply_local_fixes(section_key: str, data: Dict[str, Any], errors: List[Dict[str, Any]]) -> List[str]:
+    """
+    Fix errors that need no model call.
+
+    - extra keys are dropped (schemas forbid them)
+    - ``{"title": {"title": "x"}}`` style single-value wrappers are unwrapped
+    - a single string where a list of strings is expected is wrapped in a list
+
+    Args:
+        section_key: Session state key of the section
+        data: Section dict, modified in place
+        errors: Validation errors for ``data``
+
+    Returns:
+        List[str]: Description of every fix applied
+    """
+    fixes = []
+    for error in errors:
+        loc, kind, value = tuple(error["loc"]), error["type"], error.get("input")
+        if kind == "extra_forbidden":
+            _delete_path(data, loc)
+            fixes.append(f"dropped extra key {format_loc(loc)}")
+        elif kind == "string_type" and isinstance(value, dict) and len(value) == 1:
+            inner = next(iter(value.values()))
+            if isinstance(inner, str) and _try_set_path(section_key, data, loc, inner):
+                fixes.append(f"unwrapped {format_loc(loc)}")
+        elif (
+            kind == "list_type"
+            and isinstance(value, str)
+            and field_contract(SECTION_SCHEMAS[section_key][0], loc) == "[str]"
+            and _try_set_path(section_key, data, loc, [value])
+        ):
+            fixes.append(f"wrapped {format_loc(loc)} in a list")
+    return fixes
+
+
+def _try_set_path(section_key: str, data: Any, loc: tuple, value: Any) -> bool:
+    """``_set_path`` that logs and skips a path it cannot apply."""
+    try:
+        _set_path(data, loc, value)
+        return True
+    except (IndexError, KeyError, TypeError) as e:
+        print(f"⚠️ {section_key}: skipped patch path {format_loc(loc)}: {e}")
+        return False
+
+
+def apply_patch(
+    section_key: str,
+    data: Dict[str, Any],
+    patch: Dict[str, Any],
+    targets: List[Tuple[tuple, str, str]]
+) -> int:
+    """
+    Apply a re-ask answer, restricted to the requested paths.
+
+    Paths that are not a requested target (or inside one) are ignored, so a
+    re-ask cannot rewrite fields that were already valid.
+
+    Args:
+        section_key: Session state key of the section
+        data: Section dict, modified in place
+        patch: Parsed re-ask answer mapping paths to values
+        targets: Output of ``reask_targets`` the re-ask was built from
+
+    Returns:
+        int: Number of paths applied
+    """
+    requested = [loc for loc, _, _ in targets]
+    applied = 0
+    for path, value in patch.items():
+        loc = _parse_loc(path)
+        if not loc or not any(loc[:len(target)] == target for target in requested):
+            print(f"⚠️ {section_key}: ignored unrequested patch path {path!r}")
+            continue
+        applied += _try_set_path(section_key, data, loc, value)
+    return applied
+
+
+def reask_targets(section_key: str, errors: List[Dict[str, Any]]) -> List[Tuple[tuple, str, str]]:
+    """
+    Reduce validation errors to the sub-fields that must be re-requested.
+
+    Args:
+        section_key: Session state key of the section
+        errors: Validation errors left after local fixes
+
+    Returns:
+        List[Tuple[tuple, str, str]]: (path, expected contract, error message)
+    """
+    model = SECTION_SCHEMAS[section_key][0]
+    locs = []
+    for error in errors:
+        loc = tuple(error["loc"])
+        if loc not in locs:
+            locs.append(loc)
+
+    # Too many scattered errors: ask for whole top-level fields instead.
+    if len(locs) > MAX_REASK_FIELDS:
+        locs = list(dict.fromkeys(loc[:1] for loc in locs))
+
+    # Drop paths already covered by a broader target.
+    locs = [loc for loc in locs if not any(other != loc and loc[:len(other)] == other for other in locs)]
+    messages = {tuple(e["loc"]): e["msg"] for e in errors}
+    return [(loc, field_contract(model, loc), messages.get(loc, "invalid")) for loc in locs]
+
+
+def build_reask_prompt(
+    section_key: str,
+    data: Dict[str, Any],
+    targets: List[Tuple[tuple, str, str]],
+    inputs: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build a minimal prompt asking only for the invalid sub-fields.
+
+    Args:
+        section_key: Session state key of the section
+        data: Current (partially valid) section
+        targets: Output of ``reask_targets``
+        inputs: Full user inputs, sliced to the section agent's view
+
+    Returns:
+        str: Prompt text
+    """
+    agent_name = SECTION_SCHEMAS[section_key][1]
+    lines = [
+        f"Some fields of the {section_key} JSON of a Software Requirements Specification are missing or invalid.",
+        "Return ONLY a JSON object whose keys are exactly the paths below and whose values are the corrected values.",
+        CONTRACT_LEGEND,
+        "",
+        "Fields:",
+    ]
+    for loc, contract, message in targets:
+        lines.append(f"- {format_loc(loc)}: {contract} ({message})")
+    if inputs:
+        lines += ["", f"user_inputs {compact_json(slice_user_inputs(agent_name, inputs))}"]
+    lines += ["", f"current {section_key} {compact_json(data)}"]
+    return "\n".join(lines)
+
+
+async def _complete_json(prompt: str) -> Any:
+    """
+    Run a single JSON-mode completion and parse the result.
+
+    The call goes to the section agents' model and, with hedging on, through
+    ``hedged_call`` under the ``reask`` key, so re-asks share the hedge token
+    budget and latency history with the agent calls.
+    """
+    import litellm
+
+    from .hedging import HEDGING_ENABLED, hedged_call
+    from .model import groq_llm
+
+    def call(model_override: Optional[str] = None):
+        return litellm.acompletion(
+            model=model_override or groq_llm.model,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=0.0,
+        )
+
+    if HEDGING_ENABLED:
+        response = await hedged_call(
+            "reask",
+            call,
+            estimate_tokens(prompt),
+            output_tokens=lambda result: getattr(getattr(result, "usage", None), "completion_tokens", None),
+        )
+    else:
+        response = await call()
+    parsed, _ = repair_json(response.choices[0].message.content or "")
+    return parsed
+
+
+async def ensure_valid_section(
+    section_key: str,
+    data: Optional[Dict[str, Any]],
+    inputs: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Validate a section, fix it locally and re-ask only the invalid fields.
+
+    Args:
+        section_key: Session state key of the section
+        data: Parsed section (None/empty if the agent produced nothing usable)
+        inputs: Full user inputs, used as context for re-asks
+
+    Returns:
+        Dict[str, Any]: The section, valid unless re-asks were exhausted
+    """
+    data = data if isinstance(data, dict) else {}
+
+    errors = validate_section(section_key, data)
+    if not errors:
+        return data
+
+    fixes = apply_local_fixes(section_key, data, errors)
+    if fixes:
+        print(f"🔧 {section_key}: {', '.join(fixes)}")
+        errors = validate_section(section_key, data)
+
+    for attempt in range(1, MAX_REASK_ROUNDS + 1):
+        if not errors:
+            break
+        targets = reask_targets(section_key, errors)
+        print(f"🔁 {section_key}: re-asking {len(targets)} field(s) (round {attempt}): "
+              f"{', '.join(format_loc(loc) for loc, _, _ in targets)}")
+        try:
+            patch = await _complete_json(build_reask_prompt(section_key, data, targets, inputs))
+        except Exception as e:
+            print(f"❌ {section_key}: re-ask failed: {e}")
+            break
+        if not isinstance(patch, dict):
+            continue
+        apply_patch(section_key, data, patch, targets)
+        errors = validate_section(section_key, data)
+        if errors:
+            apply_local_fixes(section_key, data, errors)
+            errors = validate_section(section_key, data)
+
+    if errors:
+        print(f"⚠️ {section_key}: still invalid after re-asks: "
+              f"{', '.join(format_loc(tuple(e['loc'])) for e in errors)}")
+    return data
+
+
+async def ensure_features_covered(
+    data: Dict[str, Any],
+    core_features: Optional[List[str]],
+    inputs: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Re-ask the core features a fanned-out System Features section lost.
+
+    A feature chunk that failed or timed out leaves its features out of the
+    merge. They are re-requested as new ``features[i]`` items through the
+    same minimal re-ask used for invalid fields.
+
+    Args:
+        data: Merged SystemFeaturesSection dict, modified in place
+        core_features: ``FunctionalScope.core_features``
+        inputs: Full user inputs, used as context for the re-ask
+
+    Returns:
+        Dict[str, Any]: The section with the recovered features appended
+    """
+    section_key = "system_features_section"
+    missing = missing_features(data, core_features)
+    if not missing:
+        return data
+    print(f"⚠️ {section_key}: {len(missing)} core feature(s) missing after merge: {', '.join(missing)}")
+
+    features = data.setdefault("features", [])
+    contract = field_contract(SystemFeaturesSection, ("features", 0))
+    targets = [
+        (("features", len(features) + offset), contract, f"missing; write the feature {name!r}")
+        for offset, name in enumerate(missing)
+    ]
+    try:
+        patch = await _complete_json(build_reask_prompt(section_key, data, targets, inputs))
+    except Exception as e:
+        print(f"❌ {section_key}: re-ask of missing features failed: {e}")
+        return data
+    if isinstance(patch, dict):
+        apply_patch(section_key, data, patch, targets)
+
+    still_missing = missing_features(data, core_features)
+    if still_missing:
+        print(f"⚠️ {section_key}: still missing after re-ask: {', '.join(still_missing)}")
+    return data
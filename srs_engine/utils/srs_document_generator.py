@@ -10,10 +10,147 @@ from docx import Document
 from docx.shared import Pt, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
 from docx.enum.style import WD_STYLE_TYPE
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.part import Part
+from docx.oxml.ns import qn, nsdecls
+from docx.oxml import OxmlElement, parse_xml
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+import docx
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from typing import Dict, Any, List, Optional, Union
+
+from .image_optimizer import EMBED_WIDTH_INCHES
+
+
+# "python-docx" builds the document tree in memory, "stream" writes
+# WordprocessingML straight into the zip (see docx_stream_writer)
+DOCX_WRITER = os.getenv("SRS_DOCX_WRITER", "python-docx").lower()
+
+# Office 2016+ reads an SVG from this blip extension and older readers show
+# the PNG the blip itself points at
+SVG_BLIP_EXTENSION = "{96DAC541-7B7A-43D3-8B79-37D633B846F1}"
+SVG_NAMESPACE = "http://schemas.microsoft.com/office/drawing/2016/SVG/main"
+_SVG_VIEW_BOX = re.compile(rb'viewBox="\s*[-\d.]+[\s,]+[-\d.]+[\s,]+([\d.]+)[\s,]+([\d.]+)')
+
+
+def _read_image(image: Optional[Union[str, Path, bytes]]) -> Optional[bytes]:
+    """Image bytes from in-memory data or a file path; None when missing."""
+    if isinstance(image, (bytes, bytearray)):
+        return bytes(image) or None
+    if image and Path(image).exists():
+        return Path(image).read_bytes()
+    return None
+
+
+def fit_picture_to_svg(picture, svg: bytes):
+    """
+    Size an inline picture's frame from the SVG viewBox so the vector image is not stretched.
+
+    Args:
+        picture: Inline picture with ``width`` and ``height`` in EMU
+        svg: SVG document bytes
+    """
+    view_box = _SVG_VIEW_BOX.search(svg)
+    if view_box and float(view_box.group(1)) > 0:
+        width, height = (float(value) for value in view_box.groups())
+        picture.height = int(picture.width * height / width)
+
+
+# Page layout in inches: 1.25" left margin, 1" elsewhere, US Letter
+PAGE_SETUP = {
+    "left_margin": 1.25,
+    "right_margin": 1.0,
+    "top_margin": 1.0,
+    "bottom_margin": 1.0,
+    "page_width": 8.5,
+    "page_height": 11,
+}
+
+FONT_NAME = "Arial"
+NORMAL_FONT_SIZE = 12
+
+# Heading styles: font size and spacing in points (all bold, black)
+HEADING_STYLES = {
+    "Heading 1": {"size": 16, "space_before": 24, "space_after": 12},
+    "Heading 2": {"size": 14, "space_before": 18, "space_after": 9},
+    "Heading 3": {"size": 13, "space_before": 12, "space_after": 6},
+    "TOC Heading": {"size": 16, "space_before": 24, "space_after": 12, "center": True},
+}
+
+# Style key -> serialized base template
+_template_cache: Dict[str, bytes] = {}
+_template_lock = threading.Lock()
+
+
+def style_key() -> str:
+    """Hash of the style configuration; a change to it builds a new template."""
+    material = json.dumps(
+        {
+            "page": PAGE_SETUP,
+            "font": FONT_NAME,
+            "normal_size": NORMAL_FONT_SIZE,
+            "headings": HEADING_STYLES,
+            "python_docx": getattr(docx, "__version__", ""),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _build_template() -> bytes:
+    """Blank document with the page setup and styles applied, as .docx bytes."""
+    doc = Document()
+    for section in doc.sections:
+        for attribute, inches in PAGE_SETUP.items():
+            setattr(section, attribute, Inches(inches))
+
+    styles = doc.styles
+    normal_font = styles['Normal'].font
+    normal_font.name = FONT_NAME
+    normal_font.size = Pt(NORMAL_FONT_SIZE)
+
+    for style_name, config in HEADING_STYLES.items():
+        try:
+            style = styles[style_name]
+        except KeyError:
+            style = styles.add_style(style_name, WD_STYLE_TYPE.PARAGRAPH)
+        style.font.name = FONT_NAME
+        style.font.size = Pt(config["size"])
+        style.font.bold = True
+        style.font.color.rgb = RGBColor(0, 0, 0)
+        style.paragraph_format.space_before = Pt(config["space_before"])
+        style.paragraph_format.space_after = Pt(config["space_after"])
+        if config.get("center"):
+            style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def base_template() -> bytes:
+    """
+    Styled base template for new documents, built once per style configuration.
+
+    Returns:
+        bytes: .docx package to open with ``Document(io.BytesIO(...))``
+    """
+    key = style_key()
+    template = _template_cache.get(key)
+    if template is None:
+        with _template_lock:
+            template = _template_cache.get(key)
+            if template is None:
+                template = _build_template()
+                # Only the current configuration is kept
+                _template_cache.clear()
+                _template_cache[key] = template
+    return template
 
 
 class SRSDocumentGenerator:
@@ -31,87 +168,12 @@ class SRSDocumentGenerator:
         self.project_name = project_name
         self.authors = authors if authors else ["Author Name"]
         self.organization = organization
-        self.doc = Document()
-        self._setup_document()
-        self._setup_styles()
-        
-    def _setup_document(self):
-        """Configure document-level settings (margins, page size)."""
-        sections = self.doc.sections
-        for section in sections:
-            # Set margins: 1.25" left, 1" top/right/bottom
-            section.left_margin = Inches(1.25)
-            section.right_margin = Inches(1.0)
-            section.top_margin = Inches(1.0)
-            section.bottom_margin = Inches(1.0)
-            
-            # Set page size to US Letter
-            section.page_width = Inches(8.5)
-            section.page_height = Inches(11)
-            
-    def _setup_styles(self):
-        """Set up custom styles for the document."""
-        styles = self.doc.styles
-        
-        # Modify Normal style
-        normal_style = styles['Normal']
-        normal_font = normal_style.font
-        normal_font.name = 'Arial'
-        normal_font.size = Pt(12)
-        
-        # Heading 1 style
-        try:
-            h1_style = styles['Heading 1']
-        except KeyError:
-            h1_style = styles.add_style('Heading 1', WD_STYLE_TYPE.PARAGRAPH)
-        h1_font = h1_style.font
-        h1_font.name = 'Arial'
-        h1_font.size = Pt(16)
-        h1_font.bold = True
-        h1_font.color.rgb = RGBColor(0, 0, 0)
-        h1_style.paragraph_format.space_before = Pt(24)
-        h1_style.paragraph_format.space_after = Pt(12)
-        
-        # Heading 2 style
-        try:
-            h2_style = styles['Heading 2']
-        except KeyError:
-            h2_style = styles.add_style('Heading 2', WD_STYLE_TYPE.PARAGRAPH)
-        h2_font = h2_style.font
-        h2_font.name = 'Arial'
-        h2_font.size = Pt(14)
-        h2_font.bold = True
-        h2_font.color.rgb = RGBColor(0, 0, 0)
-        h2_style.paragraph_format.space_before = Pt(18)
-        h2_style.paragraph_format.space_after = Pt(9)
-        
-        # Heading 3 style
-        try:
-            h3_style = styles['Heading 3']
-        except KeyError:
-            h3_style = styles.add_style('Heading 3', WD_STYLE_TYPE.PARAGRAPH)
-        h3_font = h3_style.font
-        h3_font.name = 'Arial'
-        h3_font.size = Pt(13)
-        h3_font.bold = True
-        h3_font.color.rgb = RGBColor(0, 0, 0)
-        h3_style.paragraph_format.space_before = Pt(12)
-        h3_style.paragraph_format.space_after = Pt(6)
-        
-        # TOC Heading style
-        try:
-            toc_heading_style = styles['TOC Heading']
-        except KeyError:
-            toc_heading_style = styles.add_style('TOC Heading', WD_STYLE_TYPE.PARAGRAPH)
-        toc_heading_font = toc_heading_style.font
-        toc_heading_font.name = 'Arial'
-        toc_heading_font.size = Pt(16)
-        toc_heading_font.bold = True
-        toc_heading_font.color.rgb = RGBColor(0, 0, 0)
-        toc_heading_style.paragraph_format.space_before = Pt(24)
-        toc_heading_style.paragraph_format.space_after = Pt(12)
-        toc_heading_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
+        # Clone of the styled base template; styles are not rebuilt per document
+        self.doc = Document(io.BytesIO(base_template()))
+        # SVG digest -> relationship id, so repeated diagrams share one part
+        self._svg_rel_ids: Dict[str, str] = {}
+
+
     def _add_header_footer(self):
         """Add header and footer to all content pages (not title/TOC)."""
         # Get the last section (content section)
@@ -478,66 +540,92 @@ class SRSDocumentGenerator:
     def add_external_interfaces_section(
         self, 
         interfaces_data: Dict[str, Any],
-        image_paths: Dict[str, str]
+        image_paths: Dict[str, Union[str, bytes]],
+        vector_paths: Optional[Dict[str, Union[str, bytes]]] = None
     ):
         """
         Add External Interface Requirements section to the document.
         
         Args:
             interfaces_data: Dictionary containing external interfaces section data
-            image_paths: Dictionary with paths to interface diagrams
+            image_paths: Interface diagrams (PNG), as file paths or bytes
+            vector_paths: Optional SVG versions of the diagrams (paths or
+                bytes), embedded with the PNG as fallback
         """
+        vector_paths = vector_paths or {}
         # Section title
         self.doc.add_heading(interfaces_data.get('title', '4. External Interface Requirements'), level=1)
         
-        # 4.1 User Interfaces
-        user_interfaces = interfaces_data.get('user_interfaces', {})
-        self.doc.add_heading(user_interfaces.get('title', '4.1 User Interfaces'), level=2)
-        self.doc.add_paragraph(user_interfaces.get('description', ''))
-        
-        # Add user interface diagram
-        if 'user_interfaces' in image_paths and image_paths['user_interfaces'] and Path(image_paths['user_interfaces']).exists():
-            self.doc.add_paragraph("User Interface Architecture:", style='Heading 3')
-            self.doc.add_picture(str(image_paths['user_interfaces']), width=Inches(6.0))
-            last_paragraph = self.doc.paragraphs[-1]
-            last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # 4.2 Hardware Interfaces
-        hardware_interfaces = interfaces_data.get('hardware_interfaces', {})
-        self.doc.add_heading(hardware_interfaces.get('title', '4.2 Hardware Interfaces'), level=2)
-        self.doc.add_paragraph(hardware_interfaces.get('description', ''))
-        
-        # Add hardware interface diagram
-        if 'hardware_interfaces' in image_paths and image_paths['hardware_interfaces'] and Path(image_paths['hardware_interfaces']).exists():
-            self.doc.add_paragraph("Hardware Interface Architecture:", style='Heading 3')
-            self.doc.add_picture(str(image_paths['hardware_interfaces']), width=Inches(6.0))
-            last_paragraph = self.doc.paragraphs[-1]
-            last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # 4.3 Software Interfaces
-        software_interfaces = interfaces_data.get('software_interfaces', {})
-        self.doc.add_heading(software_interfaces.get('title', '4.3 Software Interfaces'), level=2)
-        self.doc.add_paragraph(software_interfaces.get('description', ''))
-        
-        # Add software interface diagram
-        if 'software_interfaces' in image_paths and image_paths['software_interfaces'] and Path(image_paths['software_interfaces']).exists():
-            self.doc.add_paragraph("Software Interface Architecture:", style='Heading 3')
-            self.doc.add_picture(str(image_paths['software_interfaces']), width=Inches(6.0))
-            last_paragraph = self.doc.paragraphs[-1]
-            last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # 4.4 Communication Interfaces
-        communication_interfaces = interfaces_data.get('communication_interfaces', {})
-        self.doc.add_heading(communication_interfaces.get('title', '4.4 Communication Interfaces'), level=2)
-        self.doc.add_paragraph(communication_interfaces.get('description', ''))
-        
-        # Add communication interface diagram
-        if 'communication_interfaces' in image_paths and image_paths['communication_interfaces'] and Path(image_paths['communication_interfaces']).exists():
-            self.doc.add_paragraph("Communication Interface Architecture:", style='Heading 3')
-            self.doc.add_picture(str(image_paths['communication_interfaces']), width=Inches(6.0))
-            last_paragraph = self.doc.paragraphs[-1]
-            last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        # 4.1 - 4.4 interface subsections, each followed by its diagram
+        for interface_key, default_title, label in (
+            ('user_interfaces', '4.1 User Interfaces', 'User'),
+            ('hardware_interfaces', '4.2 Hardware Interfaces', 'Hardware'),
+            ('software_interfaces', '4.3 Software Interfaces', 'Software'),
+            ('communication_interfaces', '4.4 Communication Interfaces', 'Communication'),
+        ):
+            interface = interfaces_data.get(interface_key, {})
+            self.doc.add_heading(interface.get('title', default_title), level=2)
+            self.doc.add_paragraph(interface.get('description', ''))
+            self._add_interface_diagram(
+                image_paths.get(interface_key), f"{label} Interface Architecture:", vector_paths.get(interface_key)
+            )
+
+    def _add_interface_diagram(
+        self,
+        image: Optional[Union[str, Path, bytes]],
+        caption: str,
+        svg: Optional[Union[str, Path, bytes]] = None
+    ):
+        """
+        Add an interface diagram, or a placeholder note when it could not be rendered.
+
+        Args:
+            image: Rendered diagram as PNG bytes or a file path (may be missing)
+            caption: Heading shown above the diagram
+            svg: Optional vector version of the diagram (bytes or path)
+        """
+        self.doc.add_paragraph(caption, style='Heading 3')
+        image = _read_image(image)
+        if image:
+            # Keep the paragraph instead of looking it up again via doc.paragraphs,
+            # which rescans the whole body
+            paragraph = self.doc.add_paragraph()
+            picture = paragraph.add_run().add_picture(io.BytesIO(image), width=Inches(EMBED_WIDTH_INCHES))
+            svg = _read_image(svg)
+            if svg:
+                self._attach_svg(picture, svg)
+            paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        else:
+            placeholder = self.doc.add_paragraph()
+            placeholder.add_run("[Diagram not available: the diagram could not be rendered]").italic = True
+            placeholder.alignment = WD_ALIGN_PARAGRAPH.CENTER
     
+    def _attach_svg(self, picture, svg: bytes):
+        """
+        Make an inline picture show ``svg``, keeping its PNG as the fallback.
+
+        Args:
+            picture: InlineShape returned by ``add_picture``
+            svg: SVG document bytes
+        """
+        digest = hashlib.sha1(svg).hexdigest()
+        rel_id = self._svg_rel_ids.get(digest)
+        if rel_id is None:
+            package = self.doc.part.package
+            svg_part = Part(package.next_partname("/word/media/image%d.svg"), "image/svg+xml", svg, package)
+            rel_id = self._svg_rel_ids[digest] = self.doc.part.relate_to(svg_part, RT.IMAGE)
+
+        blip = picture._inline.xpath('.//a:blip')[0]
+        extensions = blip.find(qn('a:extLst'))
+        if extensions is None:
+            extensions = OxmlElement('a:extLst')
+            blip.append(extensions)
+        extension = OxmlElement('a:ext')
+        extension.set('uri', SVG_BLIP_EXTENSION)
+        extension.append(parse_xml(f'<asvg:svgBlip xmlns:asvg="{SVG_NAMESPACE}" {nsdecls("r")} r:embed="{rel_id}"/>'))
+        extensions.append(extension)
+        fit_picture_to_svg(picture, svg)
+
     def add_nfr_section(self, nfr_data: Dict[str, Any]):
         """
         Add Non-Functional Requirements section to the document.
@@ -648,6 +736,102 @@ class SRSDocumentGenerator:
         self.doc.save(output_path)
 
 
+class SRSDocumentBuilder:
+    """
+    Build an SRS document section by section as the data arrives.
+
+    The title page and TOC are written on creation, each ``add_section``
+    appends the next section in document order, and ``finish`` adds the
+    header/footer and saves. Sections 1-5 can thus be laid out while the
+    stage 2 agents still run, leaving only glossary and assumptions for the
+    end. ``writer`` picks the python-docx or the streaming backend.
+    Not thread-safe: call the methods one at a time (each may run in a
+    worker thread).
+    """
+
+    SECTION_ORDER = [
+        "introduction_section",
+        "overall_description_section",
+        "system_features_section",
+        "external_interfaces_section",
+        "nfr_section",
+        "glossary_section",
+        "assumptions_section",
+    ]
+
+    def __init__(
+        self,
+        project_name: str,
+        authors: List[str] = None,
+        organization: str = "Organization Name",
+        writer: str = DOCX_WRITER
+    ):
+        if writer == "stream":
+            from .docx_stream_writer import StreamingSRSDocumentGenerator
+            self.generator = StreamingSRSDocumentGenerator(project_name, authors, organization)
+        else:
+            self.generator = SRSDocumentGenerator(project_name, authors, organization)
+        self.generator._add_title_page()
+        self.generator._add_table_of_contents()
+        self.added = 0
+
+    def add_section(
+        self,
+        section_key: str,
+        section_data: Dict[str, Any],
+        image_paths: Optional[Dict[str, Union[str, bytes]]] = None,
+        vector_paths: Optional[Dict[str, Union[str, bytes]]] = None
+    ):
+        """
+        Append the next section of the document.
+
+        Args:
+            section_key: Key in SECTION_ORDER; must be the next one
+            section_data: Section data
+            image_paths: Interface diagrams (external_interfaces_section only)
+            vector_paths: SVG versions of the diagrams (external_interfaces_section only)
+
+        Raises:
+            ValueError: If the section is not the next one in document order
+        """
+        expected = self.SECTION_ORDER[self.added] if self.added < len(self.SECTION_ORDER) else None
+        if section_key != expected:
+            raise ValueError(f"Expected {expected or 'no more sections'}, got {section_key}")
+
+        if section_key == "external_interfaces_section":
+            self.generator.add_external_interfaces_section(section_data, image_paths or {}, vector_paths)
+        else:
+            adders = {
+                "introduction_section": self.generator.add_introduction_section,
+                "overall_description_section": self.generator.add_overall_description_section,
+                "system_features_section": self.generator.add_system_features_section,
+                "nfr_section": self.generator.add_nfr_section,
+                "glossary_section": self.generator.add_glossary_section,
+                "assumptions_section": self.generator.add_assumptions_section,
+            }
+            adders[section_key](section_data)
+        self.added += 1
+
+    def finish(self, output_path: str, sections: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """
+        Append the remaining sections, add the header and footer, and save.
+
+        Args:
+            output_path: Path where the document should be saved
+            sections: Remaining sections by key, e.g. glossary and assumptions
+
+        Returns:
+            str: Path to the generated document
+        """
+        for section_key in self.SECTION_ORDER[self.added:]:
+            self.add_section(section_key, (sections or {}).get(section_key, {}))
+
+        # Header and footer must come after all content is added
+        self.generator._add_header_footer()
+        self.generator.save(output_path)
+        return output_path
+
+
 def generate_srs_document(
     project_name: str,
     introduction_section: Dict[str, Any],
@@ -657,10 +841,11 @@ def generate_srs_document(
     nfr_section: Dict[str, Any],
     glossary_section: Dict[str, Any],
     assumptions_section: Dict[str, Any],
-    image_paths: Dict[str, str],
+    image_paths: Dict[str, Union[str, bytes]],
     output_path: str,
     authors: List[str] = None,
-    organization: str = "Organization Name"
+    organization: str = "Organization Name",
+    vector_paths: Optional[Dict[str, Union[str, bytes]]] = None
 ) -> str:
     """
     Generate a complete SRS document from JSON data with Table of Contents.
@@ -674,12 +859,15 @@ def generate_srs_document(
         nfr_section: Non-functional requirements section data
         glossary_section: Glossary section data
         assumptions_section: Assumptions section data
-        image_paths: Dictionary with paths to interface diagrams
+        image_paths: Dictionary with interface diagrams, as PNG file paths or
+            PNG bytes (rendered in memory)
             Expected keys: 'user_interfaces', 'hardware_interfaces', 
                           'software_interfaces', 'communication_interfaces'
         output_path: Path where the document should be saved
         authors: List of document author names (default: ["Author Name"])
         organization: Organization name (default: "Organization Name")
+        vector_paths: Optional SVG versions of the diagrams (same keys and
+            types as image_paths); each is embedded with its PNG as the fallback
     
     Returns:
         str: Path to the generated document
@@ -709,28 +897,13 @@ def generate_srs_document(
         )
         ```
     """
-    # Create generator instance
-    generator = SRSDocumentGenerator(project_name, authors, organization)
-    
-    # Add title page
-    generator._add_title_page()
-    
-    # Add Table of Contents
-    generator._add_table_of_contents()
-    
-    # Add all sections
-    generator.add_introduction_section(introduction_section)
-    generator.add_overall_description_section(overall_description_section)
-    generator.add_system_features_section(system_features_section)
-    generator.add_external_interfaces_section(external_interfaces_section, image_paths)
-    generator.add_nfr_section(nfr_section)
-    generator.add_glossary_section(glossary_section)
-    generator.add_assumptions_section(assumptions_section)
-    
-    # Add header and footer (must be after all content is added)
-    generator._add_header_footer()
-    
-    # Save the document
-    generator.save(output_path)
-    
-    return output_path
\ No newline at end of file
+    builder = SRSDocumentBuilder(project_name, authors, organization)
+    builder.add_section("introduction_section", introduction_section)
+    builder.add_section("overall_description_section", overall_description_section)
+    builder.add_section("system_features_section", system_features_section)
+    builder.add_section("external_interfaces_section", external_interfaces_section, image_paths, vector_paths)
+    builder.add_section("nfr_section", nfr_section)
+    return builder.finish(output_path, {
+        "glossary_section": glossary_section,
+        "assumptions_section": assumptions_section,
+    })
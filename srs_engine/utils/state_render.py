@@ -0,0 +1,254 @@
+"""
+Session State Rendering Utility
+
+ADK substitutes ``{key}`` placeholders in agent instructions with ``str()``
+of the session state value, which for nested dicts is a verbose Python repr.
+This module renders the same placeholders with a compact canonical form
+(minimal JSON or a denser key:value notation) and reports the tokens saved.
+"""
+
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from .input_views import slice_user_inputs
+from .tokens import estimate_tokens
+
+
+# "json" (minimal canonical JSON) or "kv" (dense key:value notation)
+STATE_FORMAT = os.getenv("SRS_STATE_FORMAT", "json")
+
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)(\?)?\}")
+_KV_SPECIAL = re.compile(r"[,;:{}\[\]\"\n]|^\s|\s$")
+
+
+def _decode(value: Any) -> Any:
+    """Turn section values stored as JSON strings or models into plain data."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, str):
+        stripped = value.strip()
+        if stripped[:1] in ("{", "["):
+            try:
+                return json.loads(stripped)
+            except json.JSONDecodeError:
+                return value
+    return value
+
+
+def _prune(value: Any) -> Any:
+    """Drop None values from mappings, recursively."""
+    if isinstance(value, dict):
+        return {k: _prune(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_prune(v) for v in value]
+    return value
+
+
+def compact_json(value: Any) -> str:
+    """
+    Serialise a value as minimal canonical JSON.
+
+    Keys are sorted, separators carry no whitespace and None values are dropped.
+
+    Args:
+        value: State value (dict, list, scalar or JSON string)
+
+    Returns:
+        str: Canonical JSON text
+    """
+    return json.dumps(
+        _prune(_decode(value)),
+        separators=(",", ":"),
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str
+    )
+
+
+def _kv_scalar(value: Any) -> str:
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = str(value)
+    if not text or _KV_SPECIAL.search(text):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+def _kv(value: Any) -> str:
+    if isinstance(value, dict):
+        return "{" + ";".join(f"{k}:{_kv(v)}" for k, v in sorted(value.items())) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_kv(v) for v in value) + "]"
+    return _kv_scalar(value)
+
+
+def dense_kv(value: Any) -> str:
+    """
+    Serialise a value in a dense key:value notation.
+
+    Top-level mapping entries go on their own line as ``key:value``; nested
+    mappings render as ``{k:v;k:v}`` and lists as ``[a,b]``. Strings are only
+    quoted when they contain a delimiter.
+
+    Args:
+        value: State value (dict, list, scalar or JSON string)
+
+    Returns:
+        str: Dense key:value text
+    """
+    value = _prune(_decode(value))
+    if isinstance(value, dict):
+        return "\n".join(f"{k}:{_kv(v)}" for k, v in sorted(value.items()))
+    return _kv(value)
+
+
+def render_value(value: Any, fmt: Optional[str] = None) -> str:
+    """Render a single state value in the configured format."""
+    fmt = fmt or STATE_FORMAT
+    if isinstance(value, str) and _decode(value) is value:
+        return value
+    if fmt == "kv":
+        return dense_kv(value)
+    return compact_json(value)
+
+
+def render_instruction(
+    template: str,
+    state: Mapping[str, Any],
+    fmt: Optional[str] = None,
+    agent_name: Optional[str] = None
+) -> str:
+    """
+    Substitute ``{key}`` / ``{key?}`` placeholders from session state.
+
+    Placeholders whose key is not in state are left untouched (optional ones
+    are removed), so literal braces in prompt examples survive unchanged.
+    ``{user_inputs}`` is narrowed to the agent's declared input view. The
+    value is only injected at the first occurrence of a key, prefixed with the
+    key name; later occurrences refer back to it by name.
+
+    Args:
+        template: Instruction text containing placeholders
+        state: Session state mapping
+        fmt: "json" or "kv" (default: SRS_STATE_FORMAT)
+        agent_name: Agent being prompted, used to slice user_inputs
+
+    Returns:
+        str: Rendered instruction
+    """
+    rendered = {}
+
+    def _replace(match):
+        key, optional = match.group(1), match.group(2)
+        if key not in state:
+            return "" if optional else match.group(0)
+        if key in rendered:
+            return key
+        value = state[key]
+        if key == "user_inputs":
+            value = slice_user_inputs(agent_name, value)
+        rendered[key] = render_value(value, fmt)
+        return f"{key} {rendered[key]}"
+
+    return _PLACEHOLDER.sub(_replace, template)
+
+
+def render_instruction_default(template: str, state: Mapping[str, Any]) -> str:
+    """Render placeholders the way ADK does by default (``str()`` of the value)."""
+    def _replace(match):
+        key, optional = match.group(1), match.group(2)
+        if key not in state:
+            return "" if optional else match.group(0)
+        return str(state[key])
+
+    return _PLACEHOLDER.sub(_replace, template)
+
+
+def state_instruction(template: str, fmt: Optional[str] = None) -> Callable:
+    """
+    Build an ADK instruction provider that renders state compactly.
+
+    ADK skips its own state injection when ``instruction`` is a callable, so
+    the provider fully controls how ``{user_inputs}`` and ``*_section`` values
+    appear in the prompt. The invoking agent's name selects its input view.
+
+    Args:
+        template: Instruction text containing placeholders
+        fmt: "json" or "kv" (default: SRS_STATE_FORMAT)
+
+    Returns:
+        Callable: Provider taking a ReadonlyContext and returning the prompt
+    """
+    def provider(context) -> str:
+        return render_instruction(template, context.state, fmt, context.agent_name)
+
+    provider.template = template
+    return provider
+
+
+def agent_instruction_templates(agent) -> Dict[str, str]:
+    """
+    Collect the instruction templates of an agent tree.
+
+    Args:
+        agent: Root ADK agent (Sequential/Parallel/Llm)
+
+    Returns:
+        Dict[str, str]: Agent name -> instruction template
+    """
+    templates = {}
+    instruction = getattr(agent, "instruction", None)
+    template = getattr(instruction, "template", instruction)
+    if isinstance(template, str) and template:
+        templates[agent.name] = template
+    for sub_agent in getattr(agent, "sub_agents", None) or []:
+        templates.update(agent_instruction_templates(sub_agent))
+    return templates
+
+
+def token_savings_report(
+    templates: Dict[str, str],
+    state: Mapping[str, Any],
+    fmt: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare default ADK rendering with compact, sliced rendering per agent.
+
+    Args:
+        templates: Agent name -> instruction template
+        state: Session state used for substitution
+        fmt: "json" or "kv" (default: SRS_STATE_FORMAT)
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per-agent default/compact/saved token counts,
+        plus a "total" entry
+    """
+    report = {}
+    total_default = total_compact = 0
+    for name, template in templates.items():
+        default_tokens = estimate_tokens(render_instruction_default(template, state))
+        compact_tokens = estimate_tokens(render_instruction(template, state, fmt, name))
+        saved = default_tokens - compact_tokens
+        report[name] = {
+            "default_tokens": default_tokens,
+            "compact_tokens": compact_tokens,
+            "saved_tokens": saved,
+            "saved_pct": round(100.0 * saved / default_tokens, 1) if default_tokens else 0.0
+        }
+        total_default += default_tokens
+        total_compact += compact_tokens
+
+    saved = total_default - total_compact
+    report["total"] = {
+        "default_tokens": total_default,
+        "compact_tokens": total_compact,
+        "saved_tokens": saved,
+        "saved_pct": round(100.0 * saved / total_default, 1) if total_default else 0.0
+    }
+    return report
@@ -0,0 +1,381 @@
+"""
+Stream Validation Utility
+
+Section agents are streamed internally and every chunk is fed to an
+incremental JSON validator that checks the output against the agent's
+``output_schema`` while it is being generated. As soon as the stream can no
+longer become a valid section (prose instead of JSON, a broken structure, an
+object where an array belongs) the HTTP stream is closed and the call is
+retried, instead of paying for the rest of the output and discovering the
+problem after parsing.
+
+Problems fixed locally at no model cost (raw newlines or bad escapes in
+strings, trailing commas, a trailing sentence after the object, keys the
+schema does not have) never abort a stream.
+"""
+
+import os
+import types as pytypes
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, List, Optional, Union, get_args, get_origin
+
+from google.adk.models.lite_llm import LiteLlm, LiteLLMClient
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import BaseModel, Field
+
+from .hedging import hedged_call
+from .schema_contract import annotation_at, format_loc
+from .tokens import estimate_tokens
+
+
+STREAM_MAX_ATTEMPTS = int(os.getenv("SRS_STREAM_MAX_ATTEMPTS", "3"))
+STREAM_MAX_PREFIX_CHARS = int(os.getenv("SRS_STREAM_MAX_PREFIX_CHARS", "80"))
+
+_NUMBER_CHARS = set("0123456789+-.eE")
+_LITERALS = ("true", "false", "null")
+
+# Streams opened by the current task, so an aborted call can close its HTTP
+# connection instead of leaving it to the garbage collector.
+_open_streams: ContextVar[Optional[List[Any]]] = ContextVar("srs_open_streams", default=None)
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    while get_origin(annotation) in (Union, pytypes.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        annotation = args[0] if len(args) == 1 else None
+    return annotation
+
+
+def _expected_kind(annotation: Any) -> Optional[str]:
+    annotation = _unwrap_optional(annotation)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return "object"
+    if annotation is dict or get_origin(annotation) is dict:
+        return "object"
+    if get_origin(annotation) in (list, List, tuple, set):
+        return "array"
+    return None
+
+
+class IncrementalJSONValidator:
+    """
+    Character-level JSON validator that can be fed a stream chunk by chunk.
+
+    ``feed`` returns a description of the first violation (None while the
+    stream can still become valid). ``complete`` turns True once the root
+    value is closed and ``end`` is the offset just after it.
+    """
+
+    def __init__(self, schema: Any = None, max_prefix_chars: int = STREAM_MAX_PREFIX_CHARS):
+        self.schema = schema if isinstance(schema, type) and issubclass(schema, BaseModel) else None
+        self.max_prefix_chars = max_prefix_chars
+        self.consumed = 0
+        self.prefix_chars = 0
+        # Each frame is [bracket, state, path, key_or_index]; states are
+        # object: "key_or_end" | "key" | "colon" | "value" | "comma_or_end"
+        # array:  "value_or_end" | "value" | "comma_or_end"
+        self.stack: List[list] = []
+        self.in_string = False
+        self.escape = False
+        self.string_is_key = False
+        self.key_chars: List[str] = []
+        self.bare: Optional[List[str]] = None
+        self.started = False
+        self.complete = False
+        self.end: Optional[int] = None
+        self.violation: Optional[str] = None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        Consume the next piece of the stream.
+
+        Args:
+            chunk: Text delta from the model
+
+        Returns:
+            Optional[str]: Violation message, or None while still valid
+        """
+        if self.violation:
+            return self.violation
+        for ch in chunk:
+            self.violation = self._step(ch)
+            self.consumed += 1
+            if self.violation:
+                break
+        return self.violation
+
+    # -- grammar ---------------------------------------------------------
+
+    def _step(self, ch: str) -> Optional[str]:
+        if self.complete:
+            if ch.isspace() or ch == "`":
+                return None
+            return "text after the JSON object"
+
+        if not self.started:
+            if ch in "{[":
+                if self.schema is not None and ch == "[":
+                    return "expected a JSON object, got an array"
+                self.started = True
+                self.stack.append([ch, "key_or_end" if ch == "{" else "value_or_end", (), None])
+                return None
+            if not ch.isspace():
+                self.prefix_chars += 1
+                if self.prefix_chars > self.max_prefix_chars:
+                    return "prose instead of a JSON object"
+            return None
+
+        if self.in_string:
+            return self._string_char(ch)
+
+        if self.bare is not None:
+            if ch.isalnum() or ch in _NUMBER_CHARS:
+                self.bare.append(ch)
+                return self._check_bare(final=False)
+            violation = self._check_bare(final=True)
+            self.bare = None
+            if violation:
+                return violation
+
+        if ch.isspace():
+            return None
+
+        frame = self.stack[-1]
+        bracket, state, path = frame[0], frame[1], frame[2]
+
+        if bracket == "{":
+            if state in ("key", "key_or_end"):
+                if ch == '"':
+                    self.in_string, self.string_is_key, self.key_chars = True, True, []
+                    return None
+                if ch == "}":
+                    return self._close()
+                return f"expected a key in {format_loc(path) or 'the root object'}, got {ch!r}"
+            if state == "colon":
+                if ch == ":":
+                    frame[1] = "value"
+                    return None
+                return f"expected ':' after key {format_loc(path + (frame[3],))}"
+            if state == "value":
+                return self._start_value(ch, path + (frame[3],))
+            if ch == ",":
+                frame[1] = "key"
+                return None
+            if ch == "}":
+                return self._close()
+            return f"expected ',' or '}}' in {format_loc(path) or 'the root object'}, got {ch!r}"
+
+        if state in ("value", "value_or_end"):
+            if ch == "]":
+                return self._close()
+            frame[3] = 0 if frame[3] is None else frame[3] + 1
+            return self._start_value(ch, path + (frame[3],))
+        if ch == ",":
+            frame[1] = "value"
+            return None
+        if ch == "]":
+            return self._close()
+        return f"expected ',' or ']' in {format_loc(path) or 'the root array'}, got {ch!r}"
+
+    def _string_char(self, ch: str) -> Optional[str]:
+        if self.escape:
+            self.escape = False
+        elif ch == "\\":
+            self.escape = True
+        elif ch == '"':
+            self.in_string = False
+            if self.string_is_key:
+                return self._end_key("".join(self.key_chars))
+            return None
+        if self.string_is_key:
+            self.key_chars.append(ch)
+        return None
+
+    def _check_bare(self, final: bool) -> Optional[str]:
+        token = "".join(self.bare)
+        if any(literal.startswith(token) for literal in _LITERALS):
+            if final and token not in _LITERALS:
+                return f"invalid literal {token!r}"
+            return None
+        if all(c in _NUMBER_CHARS for c in token):
+            return None
+        return f"unexpected bare word {token!r}"
+
+    def _start_value(self, ch: str, path: tuple) -> Optional[str]:
+        self.stack[-1][1] = "comma_or_end"
+        if ch == "{":
+            actual = "object"
+        elif ch == "[":
+            actual = "array"
+        elif ch == '"':
+            actual = "string"
+        elif ch in "-0123456789tfn":
+            actual = None
+        else:
+            return f"unexpected {ch!r} at {format_loc(path)}"
+
+        if self.schema is not None and actual is not None:
+            expected = _expected_kind(annotation_at(self.schema, path))
+            if (expected == "object" and actual != "object") or (expected == "array" and actual == "object"):
+                return f"expected {expected} at {format_loc(path)}, got {actual}"
+
+        if ch in "{[":
+            self.stack.append([ch, "key_or_end" if ch == "{" else "value_or_end", path, None])
+        elif ch == '"':
+            self.in_string, self.string_is_key = True, False
+        else:
+            self.bare = [ch]
+        return None
+
+    def _end_key(self, key: str) -> Optional[str]:
+        # Keys the schema does not have are not checked: section validation
+        # drops them locally, which is cheaper than a retry
+        frame = self.stack[-1]
+        frame[1], frame[3] = "colon", key
+        return None
+
+    def _close(self) -> Optional[str]:
+        self.stack.pop()
+        if not self.stack:
+            self.complete = True
+            self.end = self.consumed + 1
+        return None
+
+
+class _TrackingLiteLLMClient(LiteLLMClient):
+    """LiteLLM client that records the streams it opens for the current task."""
+
+    async def acompletion(self, model: Any, messages: Any, tools: Any, **kwargs: Any):
+        response = await super().acompletion(model, messages, tools, **kwargs)
+        streams = _open_streams.get()
+        if kwargs.get("stream") and streams is not None:
+            streams.append(response)
+        return response
+
+
+def _request_tokens(llm_request: LlmRequest) -> int:
+    """Approximate prompt size of a request."""
+    texts = []
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if isinstance(instruction, str):
+        texts.append(instruction)
+    elif instruction is not None and getattr(instruction, "parts", None):
+        texts.extend(part.text or "" for part in instruction.parts)
+    for content in llm_request.contents or []:
+        texts.extend(part.text or "" for part in content.parts or [])
+    return sum(estimate_tokens(text) for text in texts)
+
+
+def _output_tokens(result: tuple) -> Optional[int]:
+    final = result[0]
+    if final is not None and final.usage_metadata is not None:
+        return final.usage_metadata.candidates_token_count
+    return None
+
+
+def _response_text(response: LlmResponse) -> str:
+    if not response.content or not response.content.parts:
+        return ""
+    return "".join(part.text or "" for part in response.content.parts if not part.thought)
+
+
+class StreamValidatedLiteLlm(LiteLlm):
+    """
+    LiteLlm that streams schema-bound calls through ``IncrementalJSONValidator``.
+
+    Calls without an output schema (or with tools) are passed through
+    unchanged. Partial responses are not forwarded; the agent receives a
+    single final response exactly as with a non-streaming call. With
+    ``hedging`` on, slow attempts are duplicated through ``hedged_call``.
+    """
+
+    llm_client: LiteLLMClient = Field(default_factory=_TrackingLiteLLMClient, exclude=True)
+    validate_stream: bool = True
+    hedging: bool = False
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        config = llm_request.config
+        schema = config.response_schema if config else None
+        if schema is None or (config and config.tools):
+            async for response in super().generate_content_async(llm_request, stream):
+                yield response
+            return
+
+        for attempt in range(1, STREAM_MAX_ATTEMPTS + 1):
+            final_attempt = attempt == STREAM_MAX_ATTEMPTS
+            final, text, model_version = await self._attempt(llm_request, schema, abort=not final_attempt)
+            if final is not None:
+                yield final
+                return
+            if text is not None:
+                # Root object finished and the model kept talking: keep the object.
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=text)]),
+                    model_version=model_version,
+                )
+                return
+
+    async def _attempt(self, llm_request: LlmRequest, schema: Any, abort: bool):
+        """Run one attempt, hedged when enabled."""
+
+        def call(model_override: Optional[str] = None):
+            request = llm_request.model_copy(deep=True)
+            if model_override:
+                request.model = model_override
+            return self._stream_attempt(request, schema, abort)
+
+        if not self.hedging:
+            return await call()
+        return await hedged_call(
+            getattr(schema, "__name__", "response"),
+            call,
+            _request_tokens(llm_request),
+            usable=lambda result: result[0] is not None or result[1] is not None,
+            output_tokens=_output_tokens,
+        )
+
+    async def _stream_attempt(self, llm_request: LlmRequest, schema: Any, abort: bool):
+        """
+        Run one streamed call.
+
+        Returns:
+            Tuple of (final response, truncated text, model version). The
+            response is set when the stream ran to the end, the text when it
+            was stopped after a complete object, neither when it was aborted.
+        """
+        validator = IncrementalJSONValidator(schema)
+        parts: List[str] = []
+        model_version = None
+        streams: List[Any] = []
+        token = _open_streams.set(streams)
+        responses = super().generate_content_async(llm_request, stream=True)
+        try:
+            async for response in responses:
+                model_version = response.model_version or model_version
+                if not response.partial:
+                    return response, None, model_version
+                chunk = _response_text(response)
+                if not chunk:
+                    continue
+                parts.append(chunk)
+                if not self.validate_stream:
+                    continue
+                violation = validator.feed(chunk)
+                if violation and validator.complete:
+                    return None, "".join(parts)[:validator.end], model_version
+                if violation and abort:
+                    print(f"✂️ {self.model}: aborted stream after {validator.consumed} chars ({violation}), retrying")
+                    return None, None, model_version
+            return None, None, model_version
+        finally:
+            for open_stream in streams:
+                try:
+                    await open_stream.aclose()
+                except Exception:
+                    pass
+            await responses.aclose()
+            _open_streams.reset(token)
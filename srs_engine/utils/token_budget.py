@@ -0,0 +1,298 @@
+"""
+Prompt Token Budget Auditor
+
+Renders every agent's final prompt for a given SRSRequest, counts tokens per
+agent and per stage, and predicts whether the run fits the provider's
+tokens-per-minute (TPM) window, how long it will take and what it will cost.
+Everything runs offline: prompts are rendered locally and tokens estimated.
+
+Usage:
+    python -m srs_engine.utils.token_budget request.json [--tpm 30000] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from .feature_fanout import FEATURE_PART_PREFIX, feature_chunks
+from .state_render import render_instruction
+from .tokens import estimate_tokens
+
+
+TPM_LIMIT = int(os.getenv("GROQ_TPM_LIMIT", "30000"))
+RATE_WINDOW_SECONDS = 60.0
+PREFILL_TOKENS_PER_SECOND = float(os.getenv("GROQ_PREFILL_TOKENS_PER_SECOND", "4000"))
+OUTPUT_TOKENS_PER_SECOND = float(os.getenv("GROQ_OUTPUT_TOKENS_PER_SECOND", "450"))
+REQUEST_OVERHEAD_SECONDS = float(os.getenv("GROQ_REQUEST_OVERHEAD_SECONDS", "0.5"))
+INPUT_PRICE_PER_M = float(os.getenv("GROQ_INPUT_PRICE_PER_M", "0.11"))
+OUTPUT_PRICE_PER_M = float(os.getenv("GROQ_OUTPUT_PRICE_PER_M", "0.34"))
+# Share of the audited tokens kept free in the TPM window for calls the audit
+# cannot predict: stream-abort retries and validation re-asks
+TPM_SAFETY_MARGIN = float(os.getenv("SRS_TPM_SAFETY_MARGIN", "0.15"))
+
+# Typical response sizes at "Technical" detail level, in tokens.
+EXPECTED_OUTPUT_TOKENS = {
+    "introduction_section": 700,
+    "overall_description_section": 1000,
+    "user_interfaces_section": 900,
+    "hardware_interfaces_section": 900,
+    "software_interfaces_section": 900,
+    "communication_interfaces_section": 900,
+    "nfr_section": 900,
+    "glossary_section": 1200,
+    "assumptions_section": 900,
+}
+TOKENS_PER_FEATURE = 250
+DETAIL_LEVEL_SCALE = {
+    "High-level": 0.7,
+    "Technical": 1.0,
+    "Enterprise-grade": 1.4,
+}
+
+# Mirrors the user message sent by create_prompt()
+USER_PROMPT = "Based on the provided SRS data, generate the SRS document as per the schema."
+
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\??\}")
+
+
+def _llm_agents(agent) -> List[Any]:
+    """Flatten an agent tree into its LLM agents."""
+    if getattr(agent, "instruction", None) is not None and not getattr(agent, "sub_agents", None):
+        return [agent]
+    found = []
+    for sub_agent in getattr(agent, "sub_agents", None) or []:
+        found.extend(_llm_agents(sub_agent))
+    return found
+
+
+def expected_output_tokens(output_key: str, inputs: Dict[str, Any]) -> int:
+    """
+    Predict the response size of the agent writing ``output_key``.
+
+    Args:
+        output_key: Session state key the agent writes to
+        inputs: Full user inputs
+
+    Returns:
+        int: Expected output tokens
+    """
+    detail = inputs.get("output_control", {}).get("srs_detail_level", "Technical")
+    scale = DETAIL_LEVEL_SCALE.get(detail, 1.0)
+    features = inputs.get("functional_scope", {}).get("core_features", [])
+    if output_key == "system_features_section":
+        base = 100 + TOKENS_PER_FEATURE * max(1, len(features))
+    elif output_key.startswith(FEATURE_PART_PREFIX):
+        chunks = feature_chunks(features) if features else [[]]
+        index = min(int(output_key[len(FEATURE_PART_PREFIX):]), len(chunks)) - 1
+        base = 50 + TOKENS_PER_FEATURE * max(1, len(chunks[index]))
+    else:
+        base = EXPECTED_OUTPUT_TOKENS.get(output_key, 800)
+    return int(base * scale)
+
+
+def audit_agent(agent, state: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Render one agent's final prompt and count its tokens.
+
+    Sections not yet in ``state`` (stage-two inputs) are costed at their
+    expected output size.
+
+    Args:
+        agent: ADK LlmAgent
+        state: Session state available when the agent runs
+        inputs: Full user inputs
+
+    Returns:
+        Dict[str, Any]: Token counts for the agent
+    """
+    instruction = agent.instruction
+    template = getattr(instruction, "template", instruction)
+    rendered = render_instruction(template, state, agent_name=agent.name)
+
+    pending_tokens = sum(
+        expected_output_tokens(key, inputs)
+        for key in set(_PLACEHOLDER.findall(rendered))
+        if key.endswith("_section")
+    )
+
+    schema_tokens = 0
+    if getattr(agent, "output_schema", None) is not None:
+        schema_tokens = estimate_tokens(
+            json.dumps(agent.output_schema.model_json_schema(), separators=(",", ":"))
+        )
+
+    input_tokens = (
+        estimate_tokens(rendered)
+        + estimate_tokens(agent.description or "")
+        + estimate_tokens(USER_PROMPT)
+        + schema_tokens
+        + pending_tokens
+    )
+    output_tokens = expected_output_tokens(agent.output_key, inputs)
+    seconds = (
+        REQUEST_OVERHEAD_SECONDS
+        + input_tokens / PREFILL_TOKENS_PER_SECOND
+        + output_tokens / OUTPUT_TOKENS_PER_SECOND
+    )
+    return {
+        "agent": agent.name,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "estimated_seconds": round(seconds, 2),
+        "estimated_cost_usd": round(
+            input_tokens * INPUT_PRICE_PER_M / 1e6 + output_tokens * OUTPUT_PRICE_PER_M / 1e6, 6
+        ),
+    }
+
+
+def audit_pipeline(stages: List[Any], inputs: Dict[str, Any], tpm_limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Audit a multi-stage agent pipeline against the provider's TPM window.
+
+    Agents inside a stage run in parallel, so a stage takes as long as its
+    slowest agent and consumes the sum of its agents' tokens.
+
+    Args:
+        stages: Root agent of each stage, in execution order
+        inputs: Full user inputs (``SRSRequest.dict()``)
+        tpm_limit: Tokens-per-minute limit (default: GROQ_TPM_LIMIT)
+
+    Returns:
+        Dict[str, Any]: Per-agent and per-stage token counts, fit prediction,
+        recommended waits between stages, duration and cost estimates
+    """
+    tpm_limit = tpm_limit or TPM_LIMIT
+    state = {"user_inputs": inputs}
+
+    stage_reports = []
+    for index, stage in enumerate(stages, 1):
+        agents = [audit_agent(agent, state, inputs) for agent in _llm_agents(stage)]
+        stage_reports.append({
+            "stage": index,
+            "name": getattr(stage, "name", f"stage_{index}"),
+            "agents": agents,
+            "input_tokens": sum(a["input_tokens"] for a in agents),
+            "output_tokens": sum(a["output_tokens"] for a in agents),
+            "total_tokens": sum(a["total_tokens"] for a in agents),
+            "estimated_seconds": max((a["estimated_seconds"] for a in agents), default=0.0),
+            "estimated_cost_usd": round(sum(a["estimated_cost_usd"] for a in agents), 6),
+            "fits_tpm": sum(a["total_tokens"] for a in agents) <= tpm_limit,
+        })
+
+    # A stage may only start once enough of the previous stage's tokens have
+    # left the rolling TPM window.
+    waits = []
+    for previous, current in zip(stage_reports, stage_reports[1:]):
+        waits.append(round(inter_stage_wait(previous, current, previous["estimated_seconds"], tpm_limit), 2))
+
+    total_seconds = sum(s["estimated_seconds"] for s in stage_reports) + sum(waits)
+    return {
+        "tpm_limit": tpm_limit,
+        "stages": stage_reports,
+        "inter_stage_wait_seconds": waits,
+        "total_tokens": sum(s["total_tokens"] for s in stage_reports),
+        "fits_tpm": all(s["fits_tpm"] for s in stage_reports),
+        "estimated_seconds": round(total_seconds, 2),
+        "estimated_cost_usd": round(sum(s["estimated_cost_usd"] for s in stage_reports), 6),
+    }
+
+
+def reserved_tokens(audited_tokens: int) -> int:
+    """
+    Tokens to keep free in the TPM window on top of the audited prompts.
+
+    Covers stream-abort retries and validation re-asks (``TPM_SAFETY_MARGIN``
+    of the audited tokens) and, with hedging on, the whole hedge budget,
+    which can be spent within a single window.
+
+    Args:
+        audited_tokens: Audited tokens of the stages sharing the window
+
+    Returns:
+        int: Reserved tokens
+    """
+    # Imported here: hedging reads TPM_LIMIT from this module
+    from .hedging import HEDGE_TOKENS_PER_MINUTE, HEDGING_ENABLED
+
+    reserve = math.ceil(audited_tokens * TPM_SAFETY_MARGIN)
+    if HEDGING_ENABLED:
+        reserve += HEDGE_TOKENS_PER_MINUTE
+    return reserve
+
+
+def inter_stage_wait(
+    previous_stage: Dict[str, Any],
+    next_stage: Dict[str, Any],
+    elapsed_seconds: float,
+    tpm_limit: Optional[int] = None
+) -> float:
+    """
+    Seconds to wait before starting ``next_stage`` so it stays within TPM.
+
+    Args:
+        previous_stage: Stage report of the stage that just finished
+        next_stage: Stage report of the stage about to start
+        elapsed_seconds: Actual (or estimated) duration of the previous stage
+        tpm_limit: Tokens-per-minute limit (default: GROQ_TPM_LIMIT)
+
+    Returns:
+        float: Seconds to wait (0 when both stages and the reserve fit in one window)
+    """
+    tpm_limit = tpm_limit or TPM_LIMIT
+    audited = previous_stage["total_tokens"] + next_stage["total_tokens"]
+    if audited + reserved_tokens(audited) <= tpm_limit:
+        return 0.0
+    return max(0.0, RATE_WINDOW_SECONDS - elapsed_seconds)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Format an audit report as a plain-text table."""
+    lines = [f"TPM limit: {report['tpm_limit']}"]
+    for stage, wait in zip(report["stages"], report["inter_stage_wait_seconds"] + [None]):
+        lines.append("")
+        lines.append(
+            f"Stage {stage['stage']} ({stage['name']}): {stage['total_tokens']} tokens, "
+            f"~{stage['estimated_seconds']}s, ${stage['estimated_cost_usd']:.4f}, "
+            f"{'fits' if stage['fits_tpm'] else 'EXCEEDS'} TPM"
+        )
+        for agent in stage["agents"]:
+            lines.append(
+                f"  {agent['agent']:<36} in={agent['input_tokens']:>6}  out={agent['output_tokens']:>6}  "
+                f"~{agent['estimated_seconds']}s"
+            )
+        if wait is not None:
+            lines.append(f"  wait before next stage: {wait}s")
+    lines.append("")
+    lines.append(
+        f"Total: {report['total_tokens']} tokens, ~{report['estimated_seconds']}s, "
+        f"${report['estimated_cost_usd']:.4f}, {'fits' if report['fits_tpm'] else 'EXCEEDS'} TPM"
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    from srs_engine.main import create_technical_srs_agent
+    from srs_engine.schemas.srs_input_schema import SRSRequest
+
+    parser = argparse.ArgumentParser(description="Offline prompt token budget for an SRS request.")
+    parser.add_argument("request", help="Path to an SRSRequest JSON file")
+    parser.add_argument("--tpm", type=int, default=None, help="Tokens-per-minute limit")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.request, encoding="utf-8") as f:
+        srs_request = SRSRequest(**json.load(f))
+
+    inputs = srs_request.dict()
+    stages = asyncio.run(create_technical_srs_agent(inputs))
+    report = audit_pipeline(list(stages), inputs, args.tpm)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Token Estimation Utility
+
+Offline token estimator used to size prompts without calling the provider.
+It approximates BPE tokenisers by splitting words into 4-character pieces and
+runs of punctuation (common in JSON) into 2-character pieces.
+"""
+
+import math
+import re
+
+
+_TOKEN_PATTERN = re.compile(r"(\w+)|[^\w\s]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in a piece of text.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        int: Approximate token count
+    """
+    if not text:
+        return 0
+    total = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        piece = match.group(0)
+        total += math.ceil(len(piece) / (4 if match.group(1) else 2))
+    return total